@@ -0,0 +1,47 @@
+"""
+Dependencies resolving the shared resources created in the application lifespan
+"""
+from fastapi import HTTPException, Request
+from ..services.cache import FlashcardCache
+from ..services.deadline import set_deadline
+from ..services.flashcard_service import FlashcardService
+from ..services.jobs import JobManager
+from ..services.scheduler import UpstreamScheduler, current_user_id
+from ..services.store import FlashcardStore
+
+def get_flashcard_service(request: Request) -> FlashcardService:
+    return request.app.state.flashcard_service
+
+def get_flashcard_cache(request: Request) -> FlashcardCache:
+    return request.app.state.flashcard_cache
+
+def get_job_manager(request: Request) -> JobManager:
+    return request.app.state.job_manager
+
+def get_flashcard_store(request: Request) -> FlashcardStore:
+    return request.app.state.flashcard_store
+
+def get_upstream_scheduler(request: Request) -> UpstreamScheduler:
+    return request.app.state.flashcard_service.scheduler
+
+async def identify_user(request: Request) -> str:
+    """Attribute upstream usage to the caller so the scheduler can queue users fairly."""
+    user_id = request.headers.get("X-User-Id") or (request.client.host if request.client else "anonymous")
+    current_user_id.set(user_id)
+    return user_id
+
+def request_deadline(default: float):
+    """Give the request a time budget; clients may shorten it with an X-Request-Timeout header (seconds)."""
+    async def apply_deadline(request: Request) -> None:
+        timeout = default
+        header = request.headers.get("X-Request-Timeout")
+        if header is not None:
+            try:
+                requested = float(header)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="X-Request-Timeout must be a number of seconds")
+            if requested <= 0:
+                raise HTTPException(status_code=400, detail="X-Request-Timeout must be positive")
+            timeout = min(timeout, requested)
+        set_deadline(timeout)
+    return apply_deadline
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import logging
+from ...models.flashcard import Flashcard, FlashcardPage
+from ...services.export import FILE_EXTENSIONS, MEDIA_TYPES, export_cards
+from ...services.scheduler import current_user_id
+from ...services.store import FlashcardStore, InvalidCursorError
+from ..deps import get_flashcard_store
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("", response_model=FlashcardPage)
+async def list_cards(
+    document: Optional[str] = Query(None, description="Only cards generated from this file name"),
+    topic: Optional[str] = None,
+    tag: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    store: FlashcardStore = Depends(get_flashcard_store),
+):
+    """List the caller's saved flashcards, newest first."""
+    try:
+        items, next_cursor = await asyncio.to_thread(
+            store.list_cards,
+            current_user_id.get(),
+            limit=limit,
+            cursor=cursor,
+            source_document=document,
+            topic=topic,
+            tag=tag,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FlashcardPage(items=items, next_cursor=next_cursor)
+
+@router.get("/export")
+async def export_library(
+    format: str = Query("csv", pattern="^(csv|jsonl|anki)$"),
+    gzip: bool = Query(False, description="Compress the export with gzip"),
+    document: Optional[str] = Query(None, description="Only cards generated from this file name"),
+    topic: Optional[str] = None,
+    tag: Optional[str] = None,
+    store: FlashcardStore = Depends(get_flashcard_store),
+):
+    """Download the caller's saved flashcards as CSV, JSONL or an Anki import file, streamed page by page."""
+    filename = f"flashcards.{FILE_EXTENSIONS[format]}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_cards(store, current_user_id.get(), format, compress=gzip, source_document=document, topic=topic, tag=tag),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/{card_id}", response_model=Flashcard)
+async def get_card(card_id: str, store: FlashcardStore = Depends(get_flashcard_store)):
+    card = await asyncio.to_thread(store.get_card, current_user_id.get(), card_id)
+    if card is None:
+        raise HTTPException(status_code=404, detail="Flashcard not found")
+    return card
@@ -1,46 +1,299 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import ValidationError
+from typing import AsyncIterator, Awaitable, Callable, List
+from contextlib import nullcontext
+import asyncio
+import json
 import logging
+import sqlite3
 from ...services.flashcard_service import FlashcardService
-from ...models.flashcard import Flashcard, FlashcardResponse
+from ...services.pdf_extraction import PageRecord
+from ...services.cache import FlashcardCache
+from ...services.circuit_breaker import UpstreamUnavailableError, is_upstream_failure
+from ...services.deadline import DeadlineExceededError
+from ...services.scheduler import SchedulerTimeoutError, UpstreamScheduler, current_user_id
+from ...services.store import FlashcardStore
+from ...services.uploads import SpooledUpload, spool_upload
+from ...models.flashcard import BatchDocumentResult, BatchFlashcardResponse, Flashcard, FlashcardResponse
+from ...core.config import get_settings
+from ...core.metrics import VALIDATION, stage
+from ..deps import (
+    get_flashcard_cache,
+    get_flashcard_service,
+    get_flashcard_store,
+    get_upstream_scheduler,
+    request_deadline,
+)
 
 router = APIRouter()
+settings = get_settings()
 logger = logging.getLogger(__name__)
-flashcard_service = FlashcardService()
 
-@router.post("/generate", response_model=FlashcardResponse)
-async def create_flashcards(file: UploadFile = File(...)):
+def _page_indexer(flashcard_store: FlashcardStore, upload: SpooledUpload) -> Callable[[PageRecord], Awaitable[None]]:
+    """Stage each extracted page for the search index as it arrives, so no request holds the whole text."""
+
+    async def index_page(page: PageRecord) -> None:
+        if not page.text.strip():
+            return
+        try:
+            await asyncio.to_thread(flashcard_store.add_document_page, upload.digest, page.page_number, page.text)
+        except sqlite3.Error as e:
+            logger.error(f"Could not index page {page.page_number} of {upload.filename}: {str(e)}")
+
+    return index_page
+
+async def _generate_cached(
+    flashcard_service: FlashcardService,
+    flashcard_cache: FlashcardCache,
+    flashcard_store: FlashcardStore,
+    upload: SpooledUpload,
+) -> List[dict]:
+    """Cards for an upload; pages extracted on the way are staged for the search index."""
+
+    async def generate():
+        return await flashcard_service.generate_flashcards_from_pdf(
+            upload.source, on_page=_page_indexer(flashcard_store, upload)
+        )
+
+    # Identical uploads share one cached (or in-flight) generation
+    cache_key = flashcard_service.cache_key_for_digest(upload.digest)
+    flashcards_data = await flashcard_cache.get_or_compute(cache_key, generate)
+    if not flashcards_data:
+        raise HTTPException(status_code=400, detail="No flashcards could be generated")
+    return flashcards_data
+
+async def _save_deck(
+    flashcard_store: FlashcardStore,
+    upload: SpooledUpload,
+    flashcards: List[Flashcard],
+) -> List[Flashcard]:
+    """Add a generated deck to the caller's library; the deck is still returned if saving fails."""
     try:
-        # Validate file type
-        if file.content_type != "application/pdf":
-            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+        return await asyncio.to_thread(
+            flashcard_store.save_deck,
+            current_user_id.get(),
+            flashcards,
+            upload.digest,
+            upload.filename,
+            duplicate_threshold=settings.DEDUP_THRESHOLD if settings.DEDUP_LIBRARY else None,
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Could not save flashcards for {upload.filename}: {str(e)}")
+        return flashcards
 
-        # Read file content
-        file_content = await file.read()
-        
-        # Extract text from PDF
-        text = flashcard_service.extract_text_from_pdf(file_content)
-        
-        if not text:
-            raise HTTPException(status_code=400, detail="No text could be extracted from the PDF")
-        
-        # Generate flashcards
-        flashcards_data = await flashcard_service.generate_flashcards(text)
-        
-        if not flashcards_data:
-            raise HTTPException(status_code=400, detail="No flashcards could be generated")
+@router.post(
+    "/generate",
+    response_model=FlashcardResponse,
+    dependencies=[Depends(request_deadline(settings.REQUEST_TIMEOUT))],
+)
+async def create_flashcards(
+    file: UploadFile = File(...),
+    flashcard_service: FlashcardService = Depends(get_flashcard_service),
+    flashcard_cache: FlashcardCache = Depends(get_flashcard_cache),
+    flashcard_store: FlashcardStore = Depends(get_flashcard_store),
+):
+    upload = None
+    try:
+        # Validates type, size and PDF header while copying the upload in chunks
+        upload = await spool_upload(file)
+        flashcards_data = await _generate_cached(flashcard_service, flashcard_cache, flashcard_store, upload)
         
         # Convert to Flashcard objects
-        flashcards = [Flashcard(**card) for card in flashcards_data]
+        with stage(VALIDATION):
+            flashcards = [Flashcard(**card) for card in flashcards_data]
+        flashcards = await _save_deck(flashcard_store, upload, flashcards)
         
         return FlashcardResponse(flashcards=flashcards)
         
     except HTTPException as he:
         raise he
+    except UpstreamUnavailableError as e:
+        logger.error(f"Upstream unavailable: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Service temporarily unavailable. Please try again later.",
+            headers={"Retry-After": str(int(e.retry_after) + 1)},
+        )
+    except DeadlineExceededError as e:
+        logger.error(f"Request timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Request timed out: {str(e)}")
+    except SchedulerTimeoutError as e:
+        logger.error(f"Upstream capacity exhausted: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many requests are queued. Please try again later.",
+            headers={"Retry-After": "30"},
+        )
     except Exception as e:
+        if is_upstream_failure(e):
+            # Connection errors and timeouts that outlasted the retries; the breaker may open soon
+            logger.error(f"Upstream request failed: {str(e)}")
+            raise HTTPException(
+                status_code=503,
+                detail="Service temporarily unavailable. Please try again later.",
+                headers={"Retry-After": str(int(settings.UPSTREAM_RESET_TIMEOUT))},
+            )
         logger.error(f"Error processing file: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.close()
+
+@router.post(
+    "/generate/batch",
+    response_model=BatchFlashcardResponse,
+    dependencies=[Depends(request_deadline(settings.BATCH_REQUEST_TIMEOUT))],
+)
+async def create_flashcards_batch(
+    files: List[UploadFile] = File(...),
+    flashcard_service: FlashcardService = Depends(get_flashcard_service),
+    flashcard_cache: FlashcardCache = Depends(get_flashcard_cache),
+    flashcard_store: FlashcardStore = Depends(get_flashcard_store),
+):
+    """Generate flashcards for many PDFs at once, reporting success or failure per document.
+
+    Documents are extracted concurrently through the shared worker pool and all of their chunks
+    compete for the same upstream concurrency limit, so the batch runs at the provider's rate
+    rather than one document at a time.
+    """
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BATCH_MAX_FILES} files per batch")
+
+    document_slots = asyncio.Semaphore(settings.BATCH_DOCUMENT_CONCURRENCY)
+
+    async def process(file: UploadFile) -> BatchDocumentResult:
+        upload = None
+        try:
+            upload = await spool_upload(file)
+            async with document_slots:
+                flashcards_data = await _generate_cached(flashcard_service, flashcard_cache, flashcard_store, upload)
+            with stage(VALIDATION):
+                flashcards = [Flashcard(**{**card, "source_document": file.filename}) for card in flashcards_data]
+            flashcards = await _save_deck(flashcard_store, upload, flashcards)
+            return BatchDocumentResult(filename=file.filename, status="completed", flashcards=flashcards)
+        except HTTPException as e:
+            error = e.detail
+        except DeadlineExceededError as e:
+            error = f"Request timed out: {str(e)}"
+        except (UpstreamUnavailableError, SchedulerTimeoutError) as e:
+            error = f"Service temporarily unavailable: {str(e)}"
+        except Exception as e:
+            if is_upstream_failure(e):
+                error = f"Service temporarily unavailable: {str(e)}"
+            else:
+                error = f"Error processing file: {str(e)}"
+        finally:
+            if upload is not None:
+                upload.close()
+        logger.error(f"Batch document {file.filename} failed: {error}")
+        return BatchDocumentResult(filename=file.filename, status="failed", error=error)
+
+    results = await asyncio.gather(*(process(file) for file in files))
+    succeeded = sum(1 for result in results if result.status == "completed")
+    return BatchFlashcardResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+async def _iterate_cached(cards: List[dict]) -> AsyncIterator[dict]:
+    for card in cards:
+        yield card
+
+async def _index_pages(
+    pages: AsyncIterator[PageRecord], index_page: Callable[[PageRecord], Awaitable[None]]
+) -> AsyncIterator[PageRecord]:
+    async for page in pages:
+        await index_page(page)
+        yield page
+
+def _format_event(event: str, data: str, media_type: str) -> str:
+    if media_type == "text/event-stream":
+        return f"event: {event}\ndata: {data}\n\n"
+    return f'{{"event": "{event}", "data": {data}}}\n'
+
+@router.post("/generate/stream", dependencies=[Depends(request_deadline(settings.REQUEST_TIMEOUT))])
+async def stream_flashcards(
+    file: UploadFile = File(...),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    flashcard_service: FlashcardService = Depends(get_flashcard_service),
+    flashcard_cache: FlashcardCache = Depends(get_flashcard_cache),
+    flashcard_store: FlashcardStore = Depends(get_flashcard_store),
+):
+    """Stream each validated flashcard as NDJSON lines or server-sent events."""
+    upload = await spool_upload(file)
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    cache_key = flashcard_service.cache_key_for_digest(upload.digest)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            # Joins a /generate or stream already generating this document instead of paying again
+            cached = await flashcard_cache.get_or_join(cache_key)
+            async with nullcontext() if cached is not None else flashcard_cache.leading(cache_key) as publish:
+                if cached is not None:
+                    cards = _iterate_cached(cached)
+                else:
+                    pages = _index_pages(
+                        flashcard_service.extract_pages(upload.source), _page_indexer(flashcard_store, upload)
+                    )
+                    cards = flashcard_service.stream_flashcards_from_pages(pages)
+
+                generated = []
+                validated = []
+                async for card in cards:
+                    try:
+                        flashcard = Flashcard(**card)
+                    except ValidationError as e:
+                        logger.warning(f"Dropping invalid streamed flashcard: {str(e)}")
+                        continue
+                    generated.append(card)
+                    validated.append(flashcard)
+                    yield _format_event("flashcard", flashcard.model_dump_json(), media_type)
+
+                if publish is not None:
+                    # Cached and saved like the /generate deck, which shares the cache key
+                    deck = flashcard_service.deduplicate(generated)
+                    kept = {id(card) for card in deck}
+                    validated = [flashcard for card, flashcard in zip(generated, validated) if id(card) in kept]
+                    if deck:
+                        await flashcard_cache.set(cache_key, deck)
+                    publish(deck)
+            if validated:
+                await _save_deck(flashcard_store, upload, validated)
+            if not generated:
+                yield _format_event("error", json.dumps({"detail": "No flashcards could be generated"}), media_type)
+                return
+            yield _format_event("done", json.dumps({"count": len(generated)}), media_type)
+        except DeadlineExceededError as e:
+            logger.error(f"Flashcard stream timed out: {str(e)}")
+            yield _format_event("error", json.dumps({"detail": f"Request timed out: {str(e)}"}), media_type)
+        except Exception as e:
+            logger.error(f"Error streaming flashcards: {str(e)}")
+            if is_upstream_failure(e) or isinstance(e, (UpstreamUnavailableError, SchedulerTimeoutError)):
+                # The status line has already been sent, so the retry hint travels in the event
+                detail = {
+                    "detail": "Service temporarily unavailable. Please try again later.",
+                    "retry_after": int(getattr(e, "retry_after", settings.UPSTREAM_RESET_TIMEOUT)),
+                }
+            else:
+                detail = {"detail": f"Error processing file: {str(e)}"}
+            yield _format_event("error", json.dumps(detail), media_type)
+        finally:
+            upload.close()
+
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also covers clients that disconnect before the stream starts
+        background=BackgroundTask(upload.close),
+    )
 
 @router.get("/health")
-async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+async def health_check(flashcard_service: FlashcardService = Depends(get_flashcard_service)):
+    upstream = flashcard_service.upstream_health()
+    healthy = all(breaker["state"] == "closed" for breaker in upstream.values())
+    return {"status": "healthy" if healthy else "degraded", "upstream": upstream}
+
+@router.get("/scheduler")
+async def scheduler_stats(scheduler: UpstreamScheduler = Depends(get_upstream_scheduler)):
+    """Queue depth, waits and remaining budget per upstream provider."""
+    return scheduler.stats()
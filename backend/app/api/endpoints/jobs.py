@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from typing import List
+import hashlib
+import logging
+from ...models.flashcard import Flashcard
+from ...models.job import Job, JobSubmitResponse
+from ...services.cache import FlashcardCache
+from ...services.flashcard_service import FlashcardService
+from ...services.jobs import JobManager, JobProgressReporter
+from ...services.store import FlashcardStore
+from ...services.uploads import SpooledUpload, spool_upload
+from ..deps import get_job_manager
+from .flashcards import _page_indexer, _save_deck
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+async def run_generation(
+    flashcard_service: FlashcardService,
+    flashcard_cache: FlashcardCache,
+    flashcard_store: FlashcardStore,
+    pdf_content: bytes,
+    progress: JobProgressReporter,
+) -> List[dict]:
+    """Extract, chunk and generate flashcards for a queued job, reporting progress as it goes.
+
+    The deck is saved to the submitter's library, with the extracted pages indexed for search,
+    and returned with its stored ids.
+    """
+    # Jobs queued without a digest (before it was recorded) hash the payload here
+    digest = progress.job.digest or hashlib.sha256(pdf_content).hexdigest()
+    upload = SpooledUpload(progress.job.filename, len(pdf_content), digest, content=pdf_content)
+    index_page = _page_indexer(flashcard_store, upload)
+
+    async def page_extracted(page):
+        progress.page_extracted()
+        await index_page(page)
+
+    async def generate():
+        return await flashcard_service.generate_flashcards_from_pdf(
+            pdf_content,
+            on_page=page_extracted,
+            on_progress=progress.chunks_changed,
+        )
+
+    flashcards_data = await flashcard_cache.get_or_compute(flashcard_service.cache_key_for_digest(digest), generate)
+    if not flashcards_data:
+        raise HTTPException(status_code=400, detail="No flashcards could be generated")
+    flashcards = await _save_deck(flashcard_store, upload, [Flashcard(**card) for card in flashcards_data])
+    return [card.model_dump() for card in flashcards]
+
+@router.post("", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+    file: UploadFile = File(...),
+    priority: int = Query(0, ge=0, le=10),
+    job_manager: JobManager = Depends(get_job_manager),
+):
+    # The queue stores the payload itself (possibly in Redis), so validated bytes are handed over
+    with await spool_upload(file) as upload:
+        job = await job_manager.submit(
+            upload.read_bytes(), priority=priority, filename=file.filename, digest=upload.digest
+        )
+    return JobSubmitResponse(id=job.id, status=job.status)
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str, job_manager: JobManager = Depends(get_job_manager)):
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.delete("/{job_id}", response_model=Job)
+async def cancel_job(job_id: str, job_manager: JobManager = Depends(get_job_manager)):
+    job = await job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
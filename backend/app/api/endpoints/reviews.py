@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+import asyncio
+import logging
+from ...models.review import CardReview, DueCard, ReviewQueue, ReviewSession, ReviewSessionResult
+from ...services.scheduler import current_user_id
+from ...services.store import CardNotFoundError, FlashcardStore
+from ..deps import get_flashcard_store
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/due", response_model=ReviewQueue)
+async def due_cards(
+    limit: int = Query(20, ge=1, le=200),
+    new_limit: int = Query(10, ge=0, le=200, description="At most this many never-reviewed cards"),
+    store: FlashcardStore = Depends(get_flashcard_store),
+):
+    """The caller's next cards to study: overdue reviews first, then new cards."""
+    due = await asyncio.to_thread(
+        store.due_cards, current_user_id.get(), datetime.utcnow(), limit=limit, new_limit=new_limit
+    )
+    return ReviewQueue(items=[DueCard(card=card, review=review) for card, review in due])
+
+@router.post("", response_model=ReviewSessionResult)
+async def record_reviews(session: ReviewSession, store: FlashcardStore = Depends(get_flashcard_store)):
+    """Grade a study session's cards and reschedule them, all in one write."""
+    now = datetime.utcnow()
+    grades = [(str(grade.card_id), grade.grade, grade.reviewed_at or now) for grade in session.grades]
+    try:
+        results = await asyncio.to_thread(store.record_reviews, current_user_id.get(), grades)
+    except CardNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return ReviewSessionResult(reviews=[CardReview(card_id=card_id, review=review) for card_id, review in results])
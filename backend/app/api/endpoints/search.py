@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+import asyncio
+import logging
+from ...models.flashcard import DocumentSearchHit, FlashcardSearchHit, SearchResponse
+from ...services.scheduler import current_user_id
+from ...services.store import FlashcardStore, match_expression
+from ..deps import get_flashcard_store
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; end a word with * for prefix search"),
+    scope: str = Query("all", pattern="^(all|cards|documents)$"),
+    document: Optional[str] = Query(None, description="Only cards generated from this file name"),
+    topic: Optional[str] = None,
+    tag: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    store: FlashcardStore = Depends(get_flashcard_store),
+):
+    """Search the caller's flashcards and their source documents, best BM25 matches first."""
+    if match_expression(q) is None:
+        raise HTTPException(status_code=400, detail="Query must contain at least one word")
+    user_id = current_user_id.get()
+    response = SearchResponse(query=q)
+    if scope in ("all", "cards"):
+        hits = await asyncio.to_thread(
+            store.search_cards, user_id, q, limit=limit, source_document=document, topic=topic, tag=tag
+        )
+        response.cards = [FlashcardSearchHit(card=card, score=score) for card, score in hits]
+    # Card filters do not apply to whole documents
+    if scope in ("all", "documents") and not (document or topic or tag):
+        hits = await asyncio.to_thread(store.search_documents, user_id, q, limit=limit)
+        response.documents = [
+            DocumentSearchHit(document_digest=digest, source_document=name, snippet=snippet, score=score)
+            for digest, name, snippet, score in hits
+        ]
+    return response
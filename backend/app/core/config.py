@@ -19,16 +19,86 @@ class Settings(BaseSettings):
     
     # Cache Configuration
     CACHE_TTL: int = 3600  # 1 hour in seconds
-    
+    CACHE_MAX_MEMORY_ENTRIES: int = 256
+    CACHE_DB_PATH: Optional[str] = os.path.join("data", "flashcard_cache.sqlite3")  # None disables the disk tier
+    CACHE_MAX_DISK_BYTES: int = 256 * 1024 * 1024  # 256MB
+
+    # Flashcard Library
+    FLASHCARD_DB_PATH: str = os.path.join("data", "flashcards.sqlite3")
+    EXPORT_PAGE_SIZE: int = 500  # Cards read from the library per query while exporting
+    EXPORT_GZIP_LEVEL: int = 6
+
     # API Keys
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+
+    # Upstream endpoints; None uses the provider default (set to a local mock server for benchmarks)
+    OPENAI_BASE_URL: Optional[str] = None
+    GROQ_BASE_URL: Optional[str] = None
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
+    OPENAI_REQUESTS_PER_MINUTE: int = RATE_LIMIT_PER_MINUTE
+    OPENAI_TOKENS_PER_MINUTE: int = 60000
+    GROQ_REQUESTS_PER_MINUTE: int = 30
+    GROQ_TOKENS_PER_MINUTE: int = 12000
+    SCHEDULER_MAX_QUEUE_WAIT: float = 300.0  # Seconds a request may wait for upstream capacity
     
     # File Upload Settings
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_FILE_TYPES: list = ["application/pdf"]
+    UPLOAD_SPOOL_MAX_MEMORY: int = 1024 * 1024  # Larger uploads are spooled to a temp file
+    UPLOAD_CHUNK_SIZE: int = 256 * 1024
+    BATCH_MAX_FILES: int = 30
+    BATCH_DOCUMENT_CONCURRENCY: int = 4  # Documents extracted at once; chunks still share LLM_MAX_CONCURRENCY
+
+    # PDF Extraction Settings
+    PDF_EXTRACTION_WORKERS: int = min(4, os.cpu_count() or 1)  # 0 runs extraction in a thread instead
+    PDF_PAGES_PER_TASK: int = 25  # Page range size handed to each worker
+    PDF_PAGE_TIMEOUT: float = 10.0  # Seconds before a single page is skipped
+    PDF_MAX_INFLIGHT_RANGES: int = 8  # Page ranges extracted ahead of the consumer
+    PDF_EXTRACTION_ENGINE: str = "pypdf2"  # "pypdf2", "pypdf" or "pdfminer" (needs pdfminer.six)
+    PDF_TEXT_LAYER_PROBE: bool = True  # Skip pages whose resources declare no fonts (scans)
+
+    # Generation Settings
+    CHUNK_TOKEN_BUDGET: int = 3000  # Estimated prompt tokens of document text per LLM call
+    LLM_MAX_CONCURRENCY: int = 4  # Concurrent upstream LLM calls per worker
+    PROMPT_COMPACTION: bool = True  # Strip repeated headers/footers and duplicates before prompting
+    COMPACTION_SAMPLE_PAGES: int = 12  # Pages buffered to learn which lines repeat
+    INCREMENTAL_REGENERATION: bool = True  # Reuse cards for chunks whose text was seen before
+    CHUNK_CACHE_TTL: int = 30 * 24 * 3600  # Seconds cards are remembered per chunk fingerprint
+    CHUNK_CACHE_MAX_MEMORY_ENTRIES: int = 2048
+    CHUNK_CACHE_DB_PATH: Optional[str] = os.path.join("data", "chunk_cache.sqlite3")  # None keeps it in memory only
+
+    # Near-duplicate Detection
+    DEDUP_CARDS: bool = True  # Collapse paraphrased cards within a generated deck
+    DEDUP_LIBRARY: bool = True  # Drop new cards that duplicate one already in the user's library
+    DEDUP_THRESHOLD: float = 0.5  # Estimated Jaccard similarity of content words at which cards are duplicates
+    # MinHash permutations and LSH bands; changing either invalidates the stored library index
+    DEDUP_NUM_PERM: int = 64
+    DEDUP_BANDS: int = 16
+
+    # Upstream Connection Settings
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept open
+    UPSTREAM_FAILURE_THRESHOLD: int = 5  # Consecutive failures before failing fast
+    UPSTREAM_RESET_TIMEOUT: float = 30.0  # Seconds before retrying an unhealthy upstream
+
+    # Deadline Settings
+    REQUEST_TIMEOUT: float = 120.0  # Seconds a generation request may take end to end
+    BATCH_REQUEST_TIMEOUT: float = 600.0
+    JOB_TIMEOUT: float = 1800.0  # Seconds a background job may run
+    HEDGE_REQUESTS: bool = False  # Race a second LLM call against slow ones (costs extra tokens)
+    HEDGE_PERCENTILE: float = 95.0  # Latency percentile after which a call is hedged
+    HEDGE_MIN_DELAY: float = 0.5
+    HEDGE_LATENCY_WINDOW: int = 200  # Recent calls the percentile is computed over
+    HEDGE_MIN_SAMPLES: int = 20  # No hedging until this many calls were observed
+
+    # Background Job Settings
+    JOB_QUEUE_BACKEND: str = "memory"  # "memory" or "redis"
+    JOB_WORKERS: int = 2  # Concurrent generation jobs per API worker
+    JOB_RESULT_TTL: int = 24 * 3600  # Seconds job state is kept in Redis
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     
     class Config:
         case_sensitive = True
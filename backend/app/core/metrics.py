@@ -0,0 +1,103 @@
+"""
+Prometheus metrics and per-request stage timings for the generation pipeline
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# Stage names, in pipeline order
+UPLOAD = "upload"
+EXTRACTION = "extraction"
+COMPACTION = "compaction"
+PROMPT_BUILD = "prompt_build"
+UPSTREAM_QUEUE = "upstream_queue"
+LLM = "llm"
+PARSE = "parse"
+VALIDATION = "validation"
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+STAGE_SECONDS = Histogram(
+    "flashcards_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets=_LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "flashcards_http_request_seconds", "HTTP request latency", ["method", "route", "status"], buckets=_LATENCY_BUCKETS
+)
+DOCUMENT_PAGES = Histogram(
+    "flashcards_document_pages", "Pages per extracted document", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+DOCUMENT_CHARACTERS = Histogram(
+    "flashcards_document_characters", "Extracted characters per document",
+    buckets=(1e3, 5e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6),
+)
+LLM_TOKENS = Histogram(
+    "flashcards_llm_tokens", "Tokens per upstream LLM call", ["provider", "kind"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+CARDS_PER_DOCUMENT = Histogram(
+    "flashcards_cards_per_document", "Flashcards generated per document", buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500)
+)
+LLM_ERRORS = Counter("flashcards_llm_errors_total", "Failed upstream LLM calls", ["provider"])
+PARSED_CARDS = Counter(
+    "flashcards_parsed_cards_total", "Cards parsed from LLM output: valid, salvaged from malformed output, or dropped",
+    ["outcome"],
+)
+HEDGED_REQUESTS = Counter(
+    "flashcards_hedged_requests_total", "Hedged upstream requests sent, and those that beat the original",
+    ["provider", "outcome"],
+)
+PAGES_WITHOUT_TEXT = Counter(
+    "flashcards_pdf_pages_without_text_total", "Pages skipped before parsing because they have no text layer"
+)
+CHUNK_CARDS = Counter(
+    "flashcards_chunks_total", "Chunks whose cards were reused from an earlier generation or generated", ["outcome"]
+)
+
+# Stage durations of the request being handled; set by ServerTimingMiddleware
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Observe a stage duration and add it to the current request's Server-Timing entry."""
+    STAGE_SECONDS.labels(stage=name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        # Concurrent chunks add up, so a stage can exceed the request's wall time
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_usage(provider: str, usage) -> None:
+    """Observe prompt/completion token counts from an OpenAI-style ``usage`` object."""
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if isinstance(tokens, int):
+            LLM_TOKENS.labels(provider=provider, kind=kind).observe(tokens)
+
+
+def format_server_timing(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def render_metrics() -> tuple:
+    """Body and content type for a Prometheus scrape."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,24 +1,80 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
+from functools import partial
 import logging
-import aiohttp
 import asyncio
-from .api.endpoints import flashcards
+from .api.deps import identify_user
+from .core.config import get_settings
+from .core.metrics import render_metrics
+from .core.middleware import MULTIPART_OVERHEAD, MaxBodySizeMiddleware, ServerTimingMiddleware
+from .api.endpoints import cards, flashcards, jobs, reviews, search
+from .services.cache import FlashcardCache
+from .services.circuit_breaker import UpstreamUnavailableError, is_upstream_failure
+from .services.flashcard_service import FlashcardService
+from .services.jobs import JobManager, create_job_queue
+from .services.store import FlashcardStore
+from .services.pdf_extraction import shutdown_extraction_executor
+from .services.scheduler import SchedulerTimeoutError
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Upstream clients, cache and job workers are created once per worker process
+    chunk_cache = FlashcardCache(
+        ttl=settings.CHUNK_CACHE_TTL,
+        max_memory_entries=settings.CHUNK_CACHE_MAX_MEMORY_ENTRIES,
+        db_path=settings.CHUNK_CACHE_DB_PATH,
+    )
+    flashcard_service = FlashcardService(chunk_cache=chunk_cache)
+    flashcard_cache = FlashcardCache()
+    flashcard_store = FlashcardStore()
+    job_manager = JobManager(
+        partial(jobs.run_generation, flashcard_service, flashcard_cache, flashcard_store),
+        queue=create_job_queue(),
+    )
+    app.state.flashcard_service = flashcard_service
+    app.state.flashcard_cache = flashcard_cache
+    app.state.flashcard_store = flashcard_store
+    app.state.job_manager = job_manager
+    job_manager.start()
+    try:
+        yield
+    finally:
+        await job_manager.stop()
+        await flashcard_service.aclose()
+        flashcard_cache.close()
+        chunk_cache.close()
+        flashcard_store.close()
+        shutdown_extraction_executor()
+
 app = FastAPI(
     title="AI Notes Generator API",
     description="API for generating flashcards from PDF documents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Refuse oversized uploads before they are spooled or parsed (added first so CORS wraps the 413)
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    max_body_size=settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    path_limits={
+        "/api/v1/flashcards/generate/batch": settings.BATCH_MAX_FILES * (settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD),
+    },
 )
 
+# Wraps the size limit so every request that reaches the app is timed
+app.add_middleware(ServerTimingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -26,15 +82,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 # Include routers
 app.include_router(
     flashcards.router,
     prefix="/api/v1/flashcards",
-    tags=["flashcards"]
+    tags=["flashcards"],
+    dependencies=[Depends(identify_user)]
+)
+app.include_router(
+    cards.router,
+    prefix="/api/v1/cards",
+    tags=["cards"],
+    dependencies=[Depends(identify_user)]
+)
+app.include_router(
+    search.router,
+    prefix="/api/v1/search",
+    tags=["search"],
+    dependencies=[Depends(identify_user)]
+)
+app.include_router(
+    reviews.router,
+    prefix="/api/v1/reviews",
+    tags=["reviews"],
+    dependencies=[Depends(identify_user)]
+)
+app.include_router(
+    jobs.router,
+    prefix="/api/v1/jobs",
+    tags=["jobs"],
+    dependencies=[Depends(identify_user)]
 )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, media_type = render_metrics()
+    return Response(content=body, media_type=media_type)
+
 @app.get("/")
 async def root():
     return {"message": "AI Notes Generator API is running"}
@@ -43,12 +130,22 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
-@app.exception_handler(aiohttp.ClientError)
-async def client_error_handler(request: Request, exc: aiohttp.ClientError):
-    logger.error(f"Network error occurred: {str(exc)}")
+@app.exception_handler(UpstreamUnavailableError)
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailableError):
+    logger.error(f"Upstream unavailable: {str(exc)}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable. Please try again later."},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)}
+    )
+
+@app.exception_handler(SchedulerTimeoutError)
+async def scheduler_timeout_handler(request: Request, exc: SchedulerTimeoutError):
+    logger.error(f"Upstream capacity exhausted: {str(exc)}")
     return JSONResponse(
         status_code=503,
-        content={"detail": "Service temporarily unavailable. Please try again later."}
+        content={"detail": "Too many requests are queued. Please try again later."},
+        headers={"Retry-After": "30"}
     )
 
 @app.exception_handler(asyncio.TimeoutError)
@@ -61,6 +158,13 @@ async def timeout_error_handler(request: Request, exc: asyncio.TimeoutError):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
+    # Matched here rather than by class so httpx is not imported at startup
+    if is_upstream_failure(exc):
+        logger.error(f"Network error occurred: {str(exc)}")
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service temporarily unavailable. Please try again later."}
+        )
     logger.error(f"Unexpected error occurred: {str(exc)}")
     return JSONResponse(
         status_code=500,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 from uuid import UUID, uuid4
 
@@ -17,11 +17,41 @@ class Flashcard(FlashcardBase):
     id: UUID = Field(default_factory=uuid4)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
-    user_id: Optional[UUID] = None
+    user_id: Optional[str] = None
     source_document: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 class FlashcardResponse(BaseModel):
-    flashcards: list[Flashcard] 
\ No newline at end of file
+    flashcards: list[Flashcard] 
+
+class BatchDocumentResult(BaseModel):
+    filename: Optional[str] = None
+    status: Literal["completed", "failed"]
+    flashcards: list[Flashcard] = Field(default_factory=list)
+    error: Optional[str] = None
+
+class BatchFlashcardResponse(BaseModel):
+    results: list[BatchDocumentResult]
+    succeeded: int
+    failed: int
+
+class FlashcardPage(BaseModel):
+    items: list[Flashcard]
+    next_cursor: Optional[str] = None
+
+class FlashcardSearchHit(BaseModel):
+    card: Flashcard
+    score: float
+
+class DocumentSearchHit(BaseModel):
+    document_digest: str
+    source_document: Optional[str] = None
+    snippet: str
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    cards: list[FlashcardSearchHit] = Field(default_factory=list)
+    documents: list[DocumentSearchHit] = Field(default_factory=list)
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+from uuid import UUID, uuid4
+from .flashcard import Flashcard
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class JobProgress(BaseModel):
+    pages_extracted: int = 0
+    chunks_total: int = 0
+    chunks_completed: int = 0
+
+class Job(BaseModel):
+    id: UUID = Field(default_factory=uuid4)
+    status: JobStatus = JobStatus.QUEUED
+    priority: int = Field(0, ge=0, le=10)
+    filename: Optional[str] = None
+    # SHA-256 of the uploaded PDF, the document's cache and library key
+    digest: Optional[str] = None
+    user_id: Optional[str] = None
+    progress: JobProgress = Field(default_factory=JobProgress)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    flashcards: Optional[list[Flashcard]] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+class JobSubmitResponse(BaseModel):
+    id: UUID
+    status: JobStatus
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+from .flashcard import Flashcard
+
+class ReviewState(BaseModel):
+    ease: float
+    interval_days: float = 0
+    repetitions: int = 0
+    lapses: int = 0
+    due_at: Optional[datetime] = None  # None until the card is first reviewed
+    last_reviewed_at: Optional[datetime] = None
+
+class DueCard(BaseModel):
+    card: Flashcard
+    review: ReviewState
+
+class ReviewQueue(BaseModel):
+    items: list[DueCard]
+
+class ReviewGrade(BaseModel):
+    card_id: UUID
+    grade: int = Field(..., ge=0, le=5, description="SM-2 recall quality: 0 blackout to 5 perfect")
+    reviewed_at: Optional[datetime] = None
+
+class ReviewSession(BaseModel):
+    grades: list[ReviewGrade] = Field(..., min_length=1, max_length=1000)
+
+class CardReview(BaseModel):
+    card_id: UUID
+    review: ReviewState
+
+class ReviewSessionResult(BaseModel):
+    reviews: list[CardReview]
@@ -0,0 +1,291 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..core.config import get_settings
+from .deadline import DeadlineExceededError, wait_within_deadline
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Handed to coalesced callers when the leading caller gave up rather than failed
+_LEADER_GONE = object()
+
+
+def make_cache_key(pdf_content: bytes, model: str, prompt_version: str, **params: Any) -> str:
+    """Build a content-addressed cache key for a PDF and its generation settings."""
+    digest = hashlib.sha256(pdf_content).hexdigest()
+    return make_cache_key_from_digest(digest, model, prompt_version, **params)
+
+
+def make_cache_key_from_digest(digest: str, model: str, prompt_version: str, **params: Any) -> str:
+    """Build a cache key from an already computed SHA-256 digest of the PDF."""
+    fingerprint = json.dumps(
+        {"model": model, "prompt_version": prompt_version, "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(f"{digest}:{fingerprint}".encode("utf-8")).hexdigest()
+
+
+class MemoryLRUCache:
+    """In-memory LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expires_at: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        if expires_at is None:
+            expires_at = time.time() + self.ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheStore:
+    """Persistent on-disk cache store with TTL and total-size eviction."""
+
+    def __init__(self, path: str, ttl: int, max_bytes: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return expires_at, json.loads(value)
+
+    def set(self, key: str, value: Any) -> float:
+        now = time.time()
+        expires_at = now + self.ttl
+        payload = json.dumps(value, default=str)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, payload, len(payload), expires_at, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+        return expires_at
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under the size limit."""
+        self._conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM cache_entries ORDER BY accessed_at ASC"
+        ):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class FlashcardCache:
+    """Two-tier (memory + SQLite) cache that coalesces concurrent identical requests."""
+
+    def __init__(
+        self,
+        ttl: int = settings.CACHE_TTL,
+        max_memory_entries: int = settings.CACHE_MAX_MEMORY_ENTRIES,
+        db_path: Optional[str] = settings.CACHE_DB_PATH,
+        max_disk_bytes: int = settings.CACHE_MAX_DISK_BYTES,
+    ):
+        self.memory = MemoryLRUCache(max_memory_entries, ttl)
+        self.disk: Optional[SQLiteCacheStore] = None
+        if db_path:
+            try:
+                self.disk = SQLiteCacheStore(db_path, ttl, max_disk_bytes)
+            except sqlite3.Error as e:
+                logger.error(f"Could not open on-disk cache at {db_path}: {str(e)}")
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is None:
+            return None
+        try:
+            entry = await asyncio.to_thread(self.disk.get, key)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading on-disk cache: {str(e)}")
+            return None
+        if entry is None:
+            return None
+        expires_at, value = entry
+        self.memory.set(key, value, expires_at)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        expires_at = None
+        if self.disk is not None:
+            try:
+                expires_at = await asyncio.to_thread(self.disk.set, key, value)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing on-disk cache: {str(e)}")
+        self.memory.set(key, value, expires_at)
+
+    async def get_or_join(self, key: str) -> Optional[Any]:
+        """The cached value for ``key``, or the result of a generation of it already in flight.
+
+        None means the caller should generate the value itself: it must enter ``leading(key)``
+        without awaiting anything first, so later callers join it instead of generating again.
+        """
+        checked_disk = False
+        while True:
+            value = self.memory.get(key)
+            if value is not None:
+                logger.info(f"Cache hit for {key[:12]}")
+                return value
+
+            future = self._in_flight.get(key)
+            if future is None:
+                if checked_disk:
+                    return None
+                value = await self.get(key)
+                if value is not None:
+                    logger.info(f"Cache hit for {key[:12]}")
+                    return value
+                # Someone may have started generating while the disk was read
+                checked_disk = True
+                continue
+            logger.info(f"Joining in-flight generation for {key[:12]}")
+            value = await wait_within_deadline(asyncio.shield(future), what="a shared generation")
+            if value is not _LEADER_GONE:
+                return value
+
+    @asynccontextmanager
+    async def leading(self, key: str) -> AsyncIterator[Callable[[Any], None]]:
+        """Register the caller as the one generating ``key``; concurrent callers wait for it.
+
+        The yielded ``publish`` hands the generated value to the waiters (caching it is up to the
+        caller). Upstream and parsing errors are shared with every waiter. If the caller is
+        cancelled, runs out of its own time budget or leaves without publishing, the waiters are
+        woken and one of them takes over.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+
+        def publish(value: Any) -> None:
+            if not future.done():
+                future.set_result(value)
+
+        try:
+            yield publish
+        except (asyncio.CancelledError, DeadlineExceededError):
+            # Our cancellation or deadline is not the other callers' failure
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else is waiting on it
+                future.exception()
+            raise
+        finally:
+            # Also reached when a streaming response is closed early
+            publish(_LEADER_GONE)
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``, computing it at most once across concurrent callers."""
+        value = await self.get_or_join(key)
+        if value is not None:
+            return value
+        async with self.leading(key) as publish:
+            value = await compute()
+            if value:
+                await self.set(key, value)
+            publish(value)
+            return value
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
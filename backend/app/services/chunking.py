@@ -0,0 +1,152 @@
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Iterator, List, Optional, Tuple
+
+from .pdf_extraction import PageRecord
+
+# Rough average for English text with GPT/Llama-style BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+_HEADING = re.compile(
+    r"^\s*(?:(?i:chapter|section|part|lecture)\b.*|\d+(?:\.\d+)*\.?\s+[A-Z].{0,80}|[A-Z][A-Z0-9 ,:&\-]{3,80})\s*$"
+)
+
+
+# A chunk that is this full ends at the next page break, so edits to one page do not shift
+# the boundaries (and fingerprints) of every later chunk
+PAGE_CUT_RATIO = 0.75
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for prompt budgeting."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_fingerprint(text: str) -> str:
+    """Content hash of a chunk that ignores whitespace-only differences in extraction."""
+    return hashlib.sha256(_WHITESPACE.sub(" ", text).strip().encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    """A slice of the document small enough for a single LLM call"""
+    index: int
+    text: str
+    start_page: Optional[int]
+    end_page: Optional[int]
+    token_estimate: int
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and len(stripped) <= 80 and bool(_HEADING.match(stripped)) and not stripped.endswith(".")
+
+
+def _split_blocks(text: str) -> Iterator[Tuple[str, bool]]:
+    """Split text into paragraphs, yielding ``(block, starts_section)`` pairs."""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        lines: List[str] = []
+        for line in paragraph.split("\n"):
+            if _is_heading(line) and lines:
+                yield "\n".join(lines).strip(), _is_heading(lines[0])
+                lines = []
+            lines.append(line)
+        block = "\n".join(lines).strip()
+        if block:
+            yield block, _is_heading(lines[0])
+
+
+def _split_oversized(block: str, max_tokens: int) -> Iterator[str]:
+    """Break a block larger than the budget on sentence boundaries, then hard-wrap."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    current = ""
+    for sentence in _SENTENCE_BREAK.split(block):
+        while len(sentence) > max_chars:
+            if current:
+                yield current
+                current = ""
+            yield sentence[:max_chars]
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            yield current
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        yield current
+
+
+class _ChunkBuilder:
+    """Greedily packs blocks into chunks, preferring to cut at section headings."""
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self.index = 0
+        self.blocks: List[str] = []
+        self.tokens = 0
+        self.start_page: Optional[int] = None
+        self.end_page: Optional[int] = None
+
+    def add(
+        self,
+        block: str,
+        starts_section: bool,
+        page_number: Optional[int],
+        starts_page: bool = False,
+    ) -> Iterator[TextChunk]:
+        pieces = [block] if estimate_tokens(block) <= self.max_tokens else list(_split_oversized(block, self.max_tokens))
+        for piece in pieces:
+            tokens = estimate_tokens(piece) + 1
+            over_budget = self.tokens + tokens > self.max_tokens
+            # A new section is a natural boundary once the chunk is reasonably full
+            section_cut = starts_section and self.tokens >= self.max_tokens // 2
+            page_cut = starts_page and self.tokens >= self.max_tokens * PAGE_CUT_RATIO
+            if self.blocks and (over_budget or section_cut or page_cut):
+                yield self.flush()
+            if not self.blocks:
+                self.start_page = page_number
+            self.blocks.append(piece)
+            self.tokens += tokens
+            self.end_page = page_number
+            starts_section = starts_page = False
+
+    def flush(self) -> TextChunk:
+        text = "\n\n".join(self.blocks)
+        chunk = TextChunk(
+            index=self.index,
+            text=text,
+            start_page=self.start_page,
+            end_page=self.end_page,
+            token_estimate=estimate_tokens(text),
+        )
+        self.index += 1
+        self.blocks = []
+        self.tokens = 0
+        return chunk
+
+
+def chunk_text(text: str, max_tokens: int) -> List[TextChunk]:
+    """Split plain text into chunks of at most ``max_tokens`` estimated tokens."""
+    builder = _ChunkBuilder(max_tokens)
+    chunks: List[TextChunk] = []
+    for block, starts_section in _split_blocks(text):
+        chunks.extend(builder.add(block, starts_section, None))
+    if builder.blocks:
+        chunks.append(builder.flush())
+    return chunks
+
+
+async def chunk_pages(pages: AsyncIterable[PageRecord], max_tokens: int) -> AsyncIterator[TextChunk]:
+    """Incrementally chunk a stream of pages, yielding each chunk as soon as it is full."""
+    builder = _ChunkBuilder(max_tokens)
+    async for page in pages:
+        for position, (block, starts_section) in enumerate(_split_blocks(page.text)):
+            for chunk in builder.add(block, starts_section, page.page_number, starts_page=position == 0):
+                yield chunk
+    if builder.blocks:
+        yield builder.flush()
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from ..core.config import get_settings
+from .deadline import DeadlineExceededError
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised without calling upstream while its circuit breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether an error says the provider is unhealthy (as opposed to a bad request)."""
+    # Deferred with the SDKs; it is already loaded by the time a request fails
+    import httpx
+
+    if isinstance(error, DeadlineExceededError):
+        # Our own request budget ran out; that says nothing about the provider
+        return False
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    # openai/groq SDK errors share these class names and attributes
+    if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and status_code >= 500
+
+
+class CircuitBreaker:
+    """Tracks upstream health from real call outcomes instead of probing before every call.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls fail fast for
+    ``reset_timeout`` seconds; then a single trial call is let through (half-open) to decide
+    whether to close the circuit again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = settings.UPSTREAM_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.UPSTREAM_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    def before_request(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        elapsed = time.monotonic() - (self.opened_at or 0.0)
+        if self.state == self.OPEN and elapsed >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise UpstreamUnavailableError(self.name, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for {self.name} closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Run ``func`` through the breaker, recording its outcome."""
+        self.before_request()
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._trial_in_flight = False
+            raise
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.record_failure()
+            else:
+                # The provider answered; a bad request says nothing about its health
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.consecutive_failures}
@@ -0,0 +1,169 @@
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Set
+
+from ..core.config import get_settings
+from ..core.metrics import COMPACTION, stage
+from .chunking import estimate_tokens
+from .pdf_extraction import PageRecord
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Presentation forms that PDF text layers emit instead of plain letters
+_CHARACTER_FIXES = str.maketrans({
+    "\ufb00": "ff",
+    "\ufb01": "fi",
+    "\ufb02": "fl",
+    "\ufb03": "ffi",
+    "\ufb04": "ffl",
+    "\ufb05": "st",
+    "\ufb06": "st",
+    "\u00ad": "",  # soft hyphen
+    "\u200b": "",  # zero-width space
+    "\u00a0": " ",  # non-breaking space
+})
+_HYPHENATED_BREAK = re.compile(r"(\w)-\n[ \t]*([a-z])")
+_INLINE_WHITESPACE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_DIGITS = re.compile(r"\d+")
+_WORDS = re.compile(r"[a-z]+")
+
+# Running headers/footers sit in the first or last few lines of a page
+EDGE_LINES = 3
+# Paragraphs shorter than this are too generic to treat as duplicates
+MIN_DUPLICATE_CHARS = 40
+
+
+@dataclass
+class CompactionStats:
+    """Before/after numbers for one document"""
+    pages: int = 0
+    boilerplate_lines: int = 0
+    duplicate_paragraphs: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def reduction(self) -> float:
+        return 1 - self.tokens_after / self.tokens_before if self.tokens_before else 0.0
+
+
+def normalize_text(text: str) -> str:
+    """Fix ligatures and hyphenation across line breaks, and collapse whitespace."""
+    text = text.translate(_CHARACTER_FIXES)
+    text = _HYPHENATED_BREAK.sub(r"\1\2", text)
+    lines = [_INLINE_WHITESPACE.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _line_key(line: str) -> int:
+    # Page numbers and dates change from page to page; the rest of a running header does not
+    return hash(_DIGITS.sub("#", line.lower()))
+
+
+def _paragraph_key(paragraph: str) -> int:
+    return hash(" ".join(_WORDS.findall(paragraph.lower())))
+
+
+class PageCompactor:
+    """Strip repeated headers/footers and duplicate paragraphs from a stream of pages.
+
+    The first ``sample_pages`` pages are buffered to learn which edge lines repeat; a line is
+    boilerplate once it appears on at least ``min_repeat_ratio`` of the pages seen so far.
+    """
+
+    def __init__(self, sample_pages: int = settings.COMPACTION_SAMPLE_PAGES, min_repeat_ratio: float = 0.5):
+        self.sample_pages = max(1, sample_pages)
+        self.min_repeat_ratio = min_repeat_ratio
+        self.stats = CompactionStats()
+        self._edge_counts: Counter = Counter()
+        self._seen_paragraphs: Set[int] = set()
+
+    async def compact(self, pages: AsyncIterable[PageRecord]) -> AsyncIterator[PageRecord]:
+        buffered: List[PageRecord] = []
+        async for page in pages:
+            self._observe(page)
+            if len(buffered) < self.sample_pages:
+                buffered.append(page)
+                if len(buffered) < self.sample_pages:
+                    continue
+                for sampled in buffered:
+                    yield self._compact_page(sampled)
+                continue
+            yield self._compact_page(page)
+        if len(buffered) < self.sample_pages:
+            for sampled in buffered:
+                yield self._compact_page(sampled)
+        self._log()
+
+    def compact_pages(self, pages: Iterable[PageRecord]) -> List[PageRecord]:
+        pages = list(pages)
+        for page in pages:
+            self._observe(page)
+        compacted = [self._compact_page(page) for page in pages]
+        self._log()
+        return compacted
+
+    def _edge_lines(self, text: str) -> List[str]:
+        lines = [line.strip() for line in text.split("\n") if line.strip()]
+        if len(lines) <= 2 * EDGE_LINES:
+            return lines
+        return lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+
+    def _observe(self, page: PageRecord) -> None:
+        self.stats.pages += 1
+        self.stats.tokens_before += estimate_tokens(page.text)
+        self._edge_counts.update({_line_key(line) for line in self._edge_lines(normalize_text(page.text))})
+
+    def _is_boilerplate(self, line: str) -> bool:
+        threshold = max(2, math.ceil(self.min_repeat_ratio * self.stats.pages))
+        return self._edge_counts[_line_key(line)] >= threshold
+
+    def _compact_page(self, page: PageRecord) -> PageRecord:
+        with stage(COMPACTION):
+            return self._compact_page_text(page)
+
+    def _compact_page_text(self, page: PageRecord) -> PageRecord:
+        text = normalize_text(page.text)
+        edges = set(self._edge_lines(text))
+        kept_lines = []
+        for line in text.split("\n"):
+            if line in edges and self._is_boilerplate(line):
+                self.stats.boilerplate_lines += 1
+                continue
+            kept_lines.append(line)
+
+        paragraphs = []
+        for paragraph in _PARAGRAPH_BREAK.split("\n".join(kept_lines)):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if len(paragraph) >= MIN_DUPLICATE_CHARS:
+                key = _paragraph_key(paragraph)
+                if key in self._seen_paragraphs:
+                    self.stats.duplicate_paragraphs += 1
+                    continue
+                self._seen_paragraphs.add(key)
+            paragraphs.append(paragraph)
+
+        compacted = "\n\n".join(paragraphs)
+        self.stats.tokens_after += estimate_tokens(compacted)
+        return PageRecord(page_number=page.page_number, text=compacted, char_count=len(compacted))
+
+    def _log(self) -> None:
+        stats = self.stats
+        logger.info(
+            f"Compacted {stats.pages} pages from {stats.tokens_before} to {stats.tokens_after} estimated tokens "
+            f"({stats.reduction:.0%} saved; {stats.boilerplate_lines} boilerplate lines, "
+            f"{stats.duplicate_paragraphs} duplicate paragraphs)"
+        )
+
+
+def compact_text(text: str) -> str:
+    """Normalize a single block of text and drop duplicate paragraphs."""
+    return PageCompactor().compact_pages([PageRecord(page_number=1, text=text, char_count=len(text))])[0].text
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# time.monotonic() by which the current request must finish; None means no budget
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceededError(asyncio.TimeoutError):
+    """Raised when the request's time budget is spent before the work finished"""
+
+    def __init__(self, what: str = "request"):
+        super().__init__(f"Deadline exceeded while waiting for {what}")
+        self.what = what
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None when there is no deadline."""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def set_deadline(seconds: Optional[float]) -> None:
+    """Start a budget for the rest of this task; an earlier existing deadline is kept."""
+    if seconds is None:
+        return
+    deadline = time.monotonic() + seconds
+    existing = current_deadline.get()
+    current_deadline.set(deadline if existing is None else min(existing, deadline))
+
+
+@contextmanager
+def deadline_after(seconds: Optional[float]) -> Iterator[None]:
+    """Apply a budget to the enclosed block only; never extends an outer deadline."""
+    token = current_deadline.set(current_deadline.get())
+    try:
+        set_deadline(seconds)
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+def check_deadline(what: str = "request") -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError(what)
+
+
+def bounded_timeout(timeout: Optional[float], what: str = "request") -> Optional[float]:
+    """The smaller of ``timeout`` and the time left; raises if nothing is left."""
+    check_deadline(what)
+    left = remaining()
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+
+async def wait_within_deadline(awaitable: Awaitable[T], timeout: Optional[float] = None, what: str = "request") -> T:
+    """Await with ``timeout`` capped by the deadline.
+
+    A plain ``asyncio.TimeoutError`` means the caller's own timeout fired; DeadlineExceededError
+    means the request budget ran out first.
+    """
+    try:
+        limit = bounded_timeout(timeout, what)
+    except DeadlineExceededError:
+        # Close the coroutine or cancel the future we will never await
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        elif isinstance(awaitable, asyncio.Future):
+            awaitable.cancel()
+        raise
+    try:
+        return await asyncio.wait_for(awaitable, timeout=limit)
+    except DeadlineExceededError:
+        raise
+    except asyncio.TimeoutError:
+        left = remaining()
+        # Timers may fire a clock tick early
+        if left is not None and left <= 0.01:
+            raise DeadlineExceededError(what)
+        raise
@@ -0,0 +1,175 @@
+import itertools
+import logging
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+# Words that phrase a card rather than say what it is about, so "What is X?" and "Define X." match
+_FILLER = frozenset(
+    """
+    a an the of to in on for from and or but is are was were be been being by with as at it its this
+    that these those there their what which who whom whose when where why how does do did can could
+    define definition describe explain name state give list mean meaning means term called refer refers
+    """.split()
+)
+
+# Cards hashed together, bounding the (words x permutations) matrix to a few megabytes
+_BLOCK_CARDS = 512
+# Buckets larger than this are compared against their first card only instead of pairwise
+_MAX_PAIRWISE_BUCKET = 64
+_NO_WORDS = np.iinfo(np.uint32).max
+_KEY_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def card_text(question: str, answer: str) -> str:
+    return f"{question}\n{answer}"
+
+
+def shingles(text: str) -> List[int]:
+    """CRC32 of each distinct content word of ``text``."""
+    return sorted({zlib.crc32(word.encode("utf-8")) for word in _WORD.findall(text.lower()) if word not in _FILLER})
+
+
+class MinHasher:
+    """MinHash signatures and LSH bucket keys, computed for many cards at once with NumPy.
+
+    Each of ``num_perm`` multiply-shift hash functions is applied to every content word of a
+    block of cards in one matrix operation and reduced per card with ``minimum.reduceat``. The
+    signature is split into ``bands``; cards sharing any band's bucket key are candidate
+    duplicates, which makes finding them near-linear instead of comparing every pair.
+    """
+
+    def __init__(self, num_perm: int = settings.DEDUP_NUM_PERM, bands: int = settings.DEDUP_BANDS, seed: int = 0):
+        if num_perm % bands:
+            raise ValueError(f"DEDUP_NUM_PERM ({num_perm}) must be a multiple of DEDUP_BANDS ({bands})")
+        rng = np.random.default_rng(seed)
+        self.multipliers = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """(cards, num_perm) uint32 signatures; a card without content words gets all-max values."""
+        word_sets = [shingles(text) for text in texts]
+        signatures = np.full((len(word_sets), self.num_perm), _NO_WORDS, dtype=np.uint32)
+        with_words = [index for index, words in enumerate(word_sets) if words]
+        for start in range(0, len(with_words), _BLOCK_CARDS):
+            block = with_words[start:start + _BLOCK_CARDS]
+            lengths = np.fromiter((len(word_sets[index]) for index in block), dtype=np.int64, count=len(block))
+            words = np.fromiter(
+                itertools.chain.from_iterable(word_sets[index] for index in block),
+                dtype=np.uint64,
+                count=int(lengths.sum()),
+            )
+            # uint64 arithmetic wraps, which is exactly the multiply-shift hash
+            hashed = ((words[:, None] * self.multipliers + self.offsets) >> np.uint64(32)).astype(np.uint32)
+            starts = np.concatenate(([0], np.cumsum(lengths[:-1])))
+            signatures[block] = np.minimum.reduceat(hashed, starts, axis=0)
+        return signatures
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """(cards, bands) int64 bucket keys; the band number is mixed in so bands never collide."""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        keys = np.broadcast_to(np.arange(self.bands, dtype=np.uint64), banded.shape[:2]).copy()
+        for row in range(self.rows):
+            keys = keys * _KEY_MULTIPLIER + banded[:, :, row]
+        return keys.view(np.int64)
+
+
+@lru_cache()
+def default_hasher() -> MinHasher:
+    return MinHasher()
+
+
+def has_words(signatures: np.ndarray) -> np.ndarray:
+    return (signatures != _NO_WORDS).any(axis=1)
+
+
+def similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of corresponding signature rows."""
+    return (left == right).mean(axis=-1)
+
+
+def candidate_pairs(keys: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+    """(pairs, 2) indices of eligible cards that share a bucket in at least one band."""
+    pairs = set()
+    indices = np.flatnonzero(eligible)
+    for band in range(keys.shape[1]):
+        column = keys[indices, band]
+        order = np.argsort(column, kind="stable")
+        ordered = column[order]
+        boundaries = np.flatnonzero(ordered[1:] != ordered[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(ordered)]))
+        # Only shared buckets reach Python; there are few of them unless the deck is mostly duplicates
+        for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+            members = sorted(indices[order[start:end]].tolist())
+            if len(members) <= _MAX_PAIRWISE_BUCKET:
+                pairs.update(itertools.combinations(members, 2))
+            else:
+                pairs.update((members[0], member) for member in members[1:])
+    return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+
+def near_duplicate_clusters(
+    texts: Sequence[str], threshold: float = settings.DEDUP_THRESHOLD, hasher: Optional[MinHasher] = None
+) -> List[int]:
+    """Cluster label (the index of the cluster's first text) for each text.
+
+    Candidate pairs from LSH are confirmed by their estimated similarity and joined
+    transitively, so the whole pass is near-linear in the number of texts.
+    """
+    hasher = hasher or default_hasher()
+    signatures = hasher.signatures(texts)
+    pairs = candidate_pairs(hasher.band_keys(signatures), has_words(signatures))
+    if len(pairs):
+        pairs = pairs[similarity(signatures[pairs[:, 0]], signatures[pairs[:, 1]]) >= threshold]
+
+    parent = list(range(len(texts)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for left, right in pairs.tolist():
+        left, right = find(left), find(right)
+        if left != right:
+            # The earlier text stays the root, so labels follow document order
+            parent[max(left, right)] = min(left, right)
+    return [find(index) for index in range(len(texts))]
+
+
+def _quality(card: dict) -> Tuple[int, bool, int]:
+    """Fuller cards win: the longest answer, then a topic, then the most tags."""
+    return len(_WORD.findall(card.get("answer") or "")), bool(card.get("topic")), len(card.get("tags") or [])
+
+
+def deduplicate_cards(cards: List[dict], threshold: float = settings.DEDUP_THRESHOLD) -> List[dict]:
+    """Collapse near-duplicate cards, keeping the best card of each cluster where the cluster first appeared."""
+    if len(cards) < 2:
+        return cards
+    labels = near_duplicate_clusters(
+        [card_text(card.get("question") or "", card.get("answer") or "") for card in cards], threshold
+    )
+    best: Dict[int, int] = {}
+    for index, label in enumerate(labels):
+        # Only a strictly better card replaces the current one, so ties keep the earliest
+        if label not in best or _quality(cards[index]) > _quality(cards[best[label]]):
+            best[label] = index
+    kept = [cards[best[label]] for index, label in enumerate(labels) if label == index]
+    if len(kept) < len(cards):
+        logger.info(f"Dropped {len(cards) - len(kept)} near-duplicate flashcards out of {len(cards)}")
+    return kept
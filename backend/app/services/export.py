@@ -0,0 +1,138 @@
+import asyncio
+import csv
+import io
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from ..core.config import get_settings
+from ..models.flashcard import Flashcard
+from .store import FlashcardStore
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ["id", "question", "answer", "topic", "difficulty", "tags", "source_document", "created_at"]
+
+# Anki's text importer reads these header lines; tags go in the third column
+ANKI_HEADER = "#separator:tab\n#html:false\n#columns:Front\tBack\tTags\n#tags column:3\n"
+
+
+class _Rows(ABC):
+    """Renders pages of cards with one reusable buffer, so memory is bounded by the page size."""
+
+    header = ""
+
+    def __init__(self):
+        self.buffer = io.StringIO()
+
+    def render(self, cards: Iterable[Flashcard]) -> str:
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        for card in cards:
+            self.write(card)
+        return self.buffer.getvalue()
+
+    @abstractmethod
+    def write(self, card: Flashcard) -> None:
+        pass
+
+
+class CsvRows(_Rows):
+    header = ",".join(CSV_COLUMNS) + "\r\n"
+
+    def __init__(self):
+        super().__init__()
+        self.writer = csv.writer(self.buffer)
+
+    def write(self, card: Flashcard) -> None:
+        self.writer.writerow([
+            card.id, card.question, card.answer, card.topic or "",
+            "" if card.difficulty is None else card.difficulty, ";".join(card.tags or []),
+            card.source_document or "", card.created_at.isoformat(),
+        ])
+
+
+class JsonlRows(_Rows):
+    def write(self, card: Flashcard) -> None:
+        self.buffer.write(card.model_dump_json())
+        self.buffer.write("\n")
+
+
+class AnkiRows(_Rows):
+    """Tab-separated notes for Anki's File > Import, tagged with the card topic and tags."""
+
+    header = ANKI_HEADER
+
+    def __init__(self):
+        super().__init__()
+        self.writer = csv.writer(self.buffer, delimiter="\t", lineterminator="\n")
+
+    def write(self, card: Flashcard) -> None:
+        tags = list(card.tags or [])
+        if card.topic:
+            tags.append(card.topic)
+        # Anki separates tags with spaces
+        self.writer.writerow([card.question, card.answer, " ".join(tag.replace(" ", "_") for tag in tags)])
+
+
+EXPORT_FORMATS: Dict[str, Callable[[], _Rows]] = {"csv": CsvRows, "jsonl": JsonlRows, "anki": AnkiRows}
+
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "anki": "text/tab-separated-values"}
+
+FILE_EXTENSIONS = {"csv": "csv", "jsonl": "jsonl", "anki": "txt"}
+
+
+async def export_cards(
+    store: FlashcardStore,
+    user_id: str,
+    format: str,
+    compress: bool = False,
+    page_size: int = settings.EXPORT_PAGE_SIZE,
+    source_document: Optional[str] = None,
+    topic: Optional[str] = None,
+    tag: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """Stream a user's cards, newest first, in ``format``, optionally gzip-compressed.
+
+    The library is read one keyset page at a time and each page is encoded (and compressed)
+    before the next is fetched, so memory stays constant however many cards are exported and the
+    first bytes go out as soon as the first page is read. Cards saved after the export started
+    are not included.
+    """
+    rows = EXPORT_FORMATS[format]()
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        if compressor is None:
+            return data
+        # A sync flush per page sends each page on immediately instead of waiting for zlib's buffer
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    header = rows.header
+    cursor = None
+    exported = 0
+    while True:
+        cards: List[Flashcard]
+        cards, cursor = await asyncio.to_thread(
+            store.list_cards,
+            user_id,
+            limit=page_size,
+            cursor=cursor,
+            source_document=source_document,
+            topic=topic,
+            tag=tag,
+        )
+        exported += len(cards)
+        data = encode(header + rows.render(cards))
+        header = ""
+        if data:
+            yield data
+        if cursor is None:
+            break
+    if compressor is not None:
+        yield compressor.flush()
+    logger.info(f"Exported {exported} cards as {format}")
@@ -0,0 +1,196 @@
+import importlib
+import importlib.util
+import io
+import mmap
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Union
+
+# PDF bytes, or the path of a spooled upload that workers memory-map themselves
+PdfSource = Union[bytes, str]
+
+# Form XObjects nested deeper than this are not searched for fonts
+MAX_FORM_DEPTH = 3
+
+
+def _open_stream(source: PdfSource):
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            # The mapping outlives the file handle and is paged in lazily as the parser seeks
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return io.BytesIO(source)
+
+
+class PdfEngine(ABC):
+    """A PDF library that extracts text one page at a time inside an extraction worker.
+
+    ``has_text_layer`` is the cheap probe: it only looks at the fonts a page's resources declare,
+    never at its content stream, so scanned image-only pages can be skipped before the
+    expensive parse. It errs on the side of extracting when in doubt.
+    """
+
+    name: str
+    package: str
+    requirement: str
+
+    def available(self) -> bool:
+        return importlib.util.find_spec(self.package) is not None
+
+    @abstractmethod
+    def open(self, source: PdfSource) -> Any:
+        """Parse the document structure; returns an engine-specific handle."""
+
+    @abstractmethod
+    def page_count(self, document: Any) -> int:
+        pass
+
+    @abstractmethod
+    def has_text_layer(self, document: Any, index: int) -> bool:
+        pass
+
+    @abstractmethod
+    def extract_page(self, document: Any, index: int) -> str:
+        pass
+
+
+class PyPDFEngine(PdfEngine):
+    """PyPDF2 and its maintained successor pypdf, which share the reader API."""
+
+    def __init__(self, name: str, package: str):
+        self.name = name
+        self.package = package
+        self.requirement = package
+
+    def open(self, source: PdfSource) -> Any:
+        return importlib.import_module(self.package).PdfReader(_open_stream(source))
+
+    def page_count(self, document: Any) -> int:
+        return len(document.pages)
+
+    def has_text_layer(self, document: Any, index: int) -> bool:
+        resources = document.pages[index].get("/Resources")
+        # Resources are inherited from the page tree when flattened; none at all is malformed
+        return resources is None or self._declares_fonts(resources.get_object(), 0)
+
+    def _declares_fonts(self, resources: Any, depth: int) -> bool:
+        fonts = resources.get("/Font")
+        if fonts is not None and len(fonts.get_object()) > 0:
+            return True
+        xobjects = resources.get("/XObject")
+        if xobjects is None or depth >= MAX_FORM_DEPTH:
+            return False
+        for reference in xobjects.get_object().values():
+            xobject = reference.get_object()
+            form_resources = xobject.get("/Resources")
+            if xobject.get("/Subtype") == "/Form" and form_resources is not None:
+                if self._declares_fonts(form_resources.get_object(), depth + 1):
+                    return True
+        return False
+
+    def extract_page(self, document: Any, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+
+class _PdfminerDocument:
+    def __init__(self, pages: List[Any], resource_manager: Any):
+        self.pages = pages
+        self.resource_manager = resource_manager
+
+
+class PdfminerEngine(PdfEngine):
+    """pdfminer.six without layout analysis: characters are joined into lines by position only.
+
+    Skipping pdfminer's text-box and paragraph grouping keeps it far cheaper than its default
+    mode while still producing one line of text per baseline.
+    """
+
+    name = "pdfminer"
+    package = "pdfminer"
+    requirement = "pdfminer.six"
+
+    def open(self, source: PdfSource) -> Any:
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        document = PDFDocument(PDFParser(_open_stream(source)))
+        return _PdfminerDocument(list(PDFPage.create_pages(document)), PDFResourceManager(caching=True))
+
+    def page_count(self, document: Any) -> int:
+        return len(document.pages)
+
+    def has_text_layer(self, document: Any, index: int) -> bool:
+        resources = document.pages[index].resources
+        return not resources or self._declares_fonts(resources, 0)
+
+    def _declares_fonts(self, resources: Any, depth: int) -> bool:
+        from pdfminer.pdftypes import resolve1
+        from pdfminer.psparser import LIT
+
+        resources = resolve1(resources) or {}
+        if resolve1(resources.get("Font")):
+            return True
+        if depth >= MAX_FORM_DEPTH:
+            return False
+        for reference in (resolve1(resources.get("XObject")) or {}).values():
+            xobject = resolve1(reference)
+            attrs = getattr(xobject, "attrs", {})
+            if attrs.get("Subtype") is LIT("Form") and self._declares_fonts(attrs.get("Resources"), depth + 1):
+                return True
+        return False
+
+    def extract_page(self, document: Any, index: int) -> str:
+        from pdfminer.converter import PDFPageAggregator
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        device = PDFPageAggregator(document.resource_manager, laparams=None)
+        PDFPageInterpreter(document.resource_manager, device).process_page(document.pages[index])
+        lines = self._lines(self._chars(device.get_result()))
+        device.close()
+        return "\n".join(lines)
+
+    @classmethod
+    def _chars(cls, container: Iterable[Any]) -> Iterable[Any]:
+        from pdfminer.layout import LTChar, LTContainer
+
+        for item in container:
+            if isinstance(item, LTChar):
+                yield item
+            elif isinstance(item, LTContainer):
+                yield from cls._chars(item)
+
+    @staticmethod
+    def _lines(chars: Iterable[Any]) -> List[str]:
+        lines: List[str] = []
+        current: List[str] = []
+        previous = None
+        for char in chars:
+            if previous is not None:
+                if abs(char.y0 - previous.y0) > previous.height / 2:
+                    lines.append("".join(current).strip())
+                    current = []
+                elif char.x0 - previous.x1 > previous.width * 0.3:
+                    # Word spacing done with positioning rather than space characters
+                    current.append(" ")
+            current.append(char.get_text())
+            previous = char
+        if current:
+            lines.append("".join(current).strip())
+        return lines
+
+
+ENGINES: Dict[str, PdfEngine] = {
+    "pypdf2": PyPDFEngine("pypdf2", "PyPDF2"),
+    "pypdf": PyPDFEngine("pypdf", "pypdf"),
+    "pdfminer": PdfminerEngine(),
+}
+
+
+def get_engine(name: str) -> PdfEngine:
+    """Look up an extraction engine by name, checking that its library is installed."""
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"Unknown PDF extraction engine {name!r}; choose from {', '.join(ENGINES)}")
+    if not engine.available():
+        raise ImportError(f"The {name} PDF extraction engine needs {engine.requirement} installed")
+    return engine
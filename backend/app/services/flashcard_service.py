@@ -1,144 +1,374 @@
-import PyPDF2
-import io
-import json
-import groq
+import hashlib
 from fastapi import HTTPException
-from typing import List, Optional
-from functools import lru_cache
+from functools import cached_property
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Awaitable, Callable, List, Optional
 import logging
-import aiohttp
 import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, RetryError
+import time
+from contextlib import asynccontextmanager
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 from ..core.config import get_settings
-from ..models.flashcard import Flashcard, FlashcardCreate
-from fastapi_cache.decorator import cache
-from fastapi_limiter.depends import RateLimiter
-from openai import AsyncOpenAI
-from PyPDF2 import PdfReader
+from ..core.metrics import (
+    CARDS_PER_DOCUMENT,
+    CHUNK_CARDS,
+    LLM,
+    LLM_ERRORS,
+    PARSE,
+    PROMPT_BUILD,
+    UPSTREAM_QUEUE,
+    record_stage,
+    record_usage,
+    stage,
+)
+from .cache import FlashcardCache, make_cache_key_from_digest
+from .circuit_breaker import CircuitBreaker, is_upstream_failure
+from .chunking import TextChunk, chunk_fingerprint, chunk_pages, chunk_text, estimate_tokens
+from .compaction import PageCompactor, compact_text
+from .deadline import remaining, wait_within_deadline
+from .hedging import LatencyTracker, hedged
+from .json_stream import JSONArrayStreamParser, parse_flashcards, validate_cards
+from .pdf_extraction import PageRecord, PdfSource, extract_text, iter_pages
+from .scheduler import Admission, UpstreamScheduler
+
+if TYPE_CHECKING:
+    # The SDKs and httpx are imported on first use so workers start serving sooner
+    import groq
+    import httpx
+    from openai import AsyncOpenAI
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-class NetworkError(Exception):
-    """Custom exception for network-related errors"""
-    pass
+# Bump whenever the generation prompt changes so cached decks are not reused
+PROMPT_VERSION = "1"
+
+# Marks the end of a per-chunk card stream
+_STREAM_DONE = object()
+
+def _total_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    return total if isinstance(total, int) else None
+
+def _retry_after(error: Exception, default: float = 1.0) -> float:
+    """Seconds to back off after a 429, from the provider's Retry-After header when present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", default))
+    except (TypeError, ValueError):
+        return default
+
+# A retry that cannot finish before the deadline is not worth starting
+MIN_ATTEMPT_SECONDS = 1.0
+
+def _deadline_reached(retry_state) -> bool:
+    """Tenacity stop condition: the backoff plus one more attempt would overrun the deadline."""
+    left = remaining()
+    return left is not None and left - (getattr(retry_state, "upcoming_sleep", 0.0) or 0.0) < MIN_ATTEMPT_SECONDS
+
+def _is_rate_limited(error: BaseException) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+def _is_retryable(error: BaseException) -> bool:
+    """Unhealthy-provider errors and 429s; a rate-limited attempt is retried once the throttle lifts."""
+    return is_upstream_failure(error) or _is_rate_limited(error)
+
+_backoff = wait_exponential(multiplier=1, min=4, max=10)
+
+def _retry_wait(retry_state) -> float:
+    """Exponential backoff, except after a 429, whose Retry-After is already waited out in the scheduler."""
+    return 0.0 if _is_rate_limited(retry_state.outcome.exception()) else _backoff(retry_state)
+
+def create_http_client() -> "httpx.AsyncClient":
+    """Connection-pooled HTTP client with keep-alive for the upstream LLM APIs."""
+    import httpx
+
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
 
 class FlashcardService:
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional["httpx.AsyncClient"] = None,
+        chunk_cache: Optional[FlashcardCache] = None,
+    ):
         self.model = "gpt-3.5-turbo"
         self.max_tokens = 1500
         self.temperature = 0.7
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.chunk_token_budget = settings.CHUNK_TOKEN_BUDGET
+        # Shared across requests so total upstream concurrency stays bounded
+        self._llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        # Clients are built on first use; construction stays cheap so startup does not wait on it
+        self._owns_http_client = http_client is None
+        self._http_client = http_client
+        self.openai_breaker = CircuitBreaker("openai")
+        self.groq_breaker = CircuitBreaker("groq")
+        self.scheduler = UpstreamScheduler.from_settings()
+        # Recent call latencies, from which the hedging delay is derived
+        self.latency = {"openai": LatencyTracker(), "groq": LatencyTracker()}
+        # Cards per chunk fingerprint, so a revised document only sends its changed chunks upstream
+        self.chunk_cache = chunk_cache if settings.INCREMENTAL_REGENERATION else None
+    
+    @property
+    def http_client(self) -> "httpx.AsyncClient":
+        """One keep-alive connection pool shared by both SDK clients."""
+        if self._http_client is None:
+            self._http_client = create_http_client()
+        return self._http_client
+
+    @cached_property
+    def client(self) -> "AsyncOpenAI":
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=self.http_client,
+            max_retries=0,  # Retries are handled once, by tenacity in _complete_openai
+        )
+
+    @cached_property
+    def groq_client(self) -> "groq.AsyncGroq":
+        import groq
+
         # Configure Groq client with timeout and retry settings
-        self.groq_client = groq.Groq(
+        return groq.AsyncGroq(
             api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_BASE_URL,
+            http_client=self.http_client,
             timeout=30.0,  # 30 seconds timeout
-            max_retries=3  # Maximum number of retries
+            max_retries=0  # Retries are handled once, by tenacity in _make_groq_request
         )
-        self.session: Optional[aiohttp.ClientSession] = None
-    
+
     async def __aenter__(self):
-        # Configure aiohttp session with proper timeout and retry settings
-        timeout = aiohttp.ClientTimeout(
-            total=60,  # Total timeout for the whole request
-            connect=10,  # Connection timeout
-            sock_read=30  # Socket read timeout
-        )
-        self.session = aiohttp.ClientSession(
-            timeout=timeout,
-            connector=aiohttp.TCPConnector(
-                limit=100,  # Maximum number of concurrent connections
-                ttl_dns_cache=300,  # DNS cache TTL in seconds
-                force_close=False,  # Keep connections alive
-                enable_cleanup_closed=True,  # Clean up closed connections
-                ssl=False  # Disable SSL verification for testing
-            )
-        )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled upstream connections."""
+        if self._owns_http_client and self._http_client is not None:
+            await self._http_client.aclose()
+
+    def upstream_health(self) -> dict:
+        return {"openai": self.openai_breaker.snapshot(), "groq": self.groq_breaker.snapshot()}
     
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        """Extract text content from PDF bytes."""
+    def cache_key(self, pdf_content: bytes) -> str:
+        """Cache key for a PDF under this service's model, prompt and generation parameters."""
+        return self.cache_key_for_digest(hashlib.sha256(pdf_content).hexdigest())
+
+    def cache_key_for_digest(self, digest: str) -> str:
+        """Cache key for a PDF whose SHA-256 digest was computed while it was uploaded."""
+        return make_cache_key_from_digest(
+            digest,
+            self.model,
+            PROMPT_VERSION,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            chunk_token_budget=self.chunk_token_budget,
+            compaction=settings.PROMPT_COMPACTION,
+            extraction_engine=settings.PDF_EXTRACTION_ENGINE,
+            text_layer_probe=settings.PDF_TEXT_LAYER_PROBE,
+            dedup=settings.DEDUP_CARDS,
+            dedup_threshold=settings.DEDUP_THRESHOLD,
+            dedup_num_perm=settings.DEDUP_NUM_PERM,
+            dedup_bands=settings.DEDUP_BANDS,
+        )
+
+    def chunk_cache_key(self, chunk: TextChunk) -> str:
+        """Cache key for the cards of one chunk, independent of the document it came from."""
+        return make_cache_key_from_digest(
+            chunk_fingerprint(chunk.text),
+            self.model,
+            PROMPT_VERSION,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+        )
+
+    def _compact(self, pages: AsyncIterable[PageRecord]) -> AsyncIterable[PageRecord]:
+        """Drop boilerplate and duplicate text before it is chunked into prompts."""
+        if not settings.PROMPT_COMPACTION:
+            return pages
+        return PageCompactor().compact(pages)
+
+    def extract_pages(self, pdf_content: PdfSource) -> AsyncIterator[PageRecord]:
+        """Stream page records out of the extraction worker pool in document order."""
+        return iter_pages(pdf_content)
+
+    async def extract_text_from_pdf(self, pdf_content: PdfSource) -> str:
+        """Extract text content from PDF bytes in the extraction worker pool."""
         try:
-            pdf_file = io.BytesIO(pdf_content)
-            reader = PdfReader(pdf_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            return await extract_text(pdf_content)
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise
 
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds after which a slow call is hedged, or None when hedging is off or unwarranted."""
+        if not settings.HEDGE_REQUESTS:
+            return None
+        latency = self.latency[provider].percentile(settings.HEDGE_PERCENTILE)
+        return None if latency is None else max(settings.HEDGE_MIN_DELAY, latency)
+
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError, NetworkError)),
+        stop=stop_after_attempt(3) | _deadline_reached,
+        wait=_retry_wait,
+        retry=retry_if_exception(_is_retryable),
         reraise=True
     )
     async def _make_groq_request(self, prompt: str) -> str:
-        try:
-            logger.info("Making request to Groq API")
-            
-            # Test network connectivity first
-            if not await self._test_network_connectivity():
-                raise NetworkError("Network connectivity test failed")
-            
-            completion = await self.groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates educational flashcards. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=32768
-            )
-            return completion.choices[0].message.content
-        except aiohttp.ClientError as e:
-            logger.error(f"Network error while calling Groq API: {str(e)}")
-            raise HTTPException(
-                status_code=503,
-                detail="Service temporarily unavailable. Please try again later."
-            )
-        except asyncio.TimeoutError as e:
-            logger.error(f"Timeout while calling Groq API: {str(e)}")
-            raise HTTPException(
-                status_code=504,
-                detail="Request timed out. Please try again later."
-            )
-        except RetryError as e:
-            logger.error(f"Maximum retries exceeded: {str(e)}")
-            raise HTTPException(
-                status_code=503,
-                detail="Service temporarily unavailable after multiple retries. Please try again later."
-            )
-        except Exception as e:
-            logger.error(f"Error calling Groq API: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail="Error processing request. Please try again later."
-            )
+        logger.info("Making request to Groq API")
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant that creates educational flashcards. Always respond with valid JSON."},
+            {"role": "user", "content": prompt}
+        ]
+        async with self._upstream_slot("groq", messages, 32768) as admission:
+            # Fails fast while Groq is known to be down instead of probing it on every request
+            started = time.perf_counter()
+            with stage(LLM):
+                completion = await wait_within_deadline(
+                    self.groq_breaker.call(
+                        self.groq_client.chat.completions.create,
+                        model="llama-3.3-70b-versatile",
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=32768
+                    ),
+                    what="groq",
+                )
+            self.latency["groq"].observe(time.perf_counter() - started)
+            admission.settle(_total_tokens(completion))
+            record_usage("groq", getattr(completion, "usage", None))
+        return completion.choices[0].message.content
 
-    async def _test_network_connectivity(self) -> bool:
-        """Test network connectivity before making API calls"""
-        try:
-            if not self.session:
-                return False
-            
-            # Test connection to Groq API
-            async with self.session.get("https://api.groq.com/health") as response:
-                return response.status == 200
-        except Exception as e:
-            logger.error(f"Network connectivity test failed: {str(e)}")
-            return False
+    async def generate_flashcards_from_pdf(
+        self,
+        pdf_content: PdfSource,
+        on_page: Optional[Callable[[PageRecord], Awaitable[None]]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[dict]:
+        """Run the full extract -> chunk -> generate pipeline for one PDF.
+
+        ``on_page`` is awaited with each page as it is extracted, before the page is chunked.
+        """
+        extracted_chars = 0
+
+        async def pages():
+            nonlocal extracted_chars
+            async for page in self.extract_pages(pdf_content):
+                extracted_chars += len(page.text.strip())
+                if on_page:
+                    await on_page(page)
+                yield page
+
+        # Chunks are sent to the LLM while later pages are still being extracted
+        flashcards_data = await self.generate_flashcards_from_pages(pages(), on_progress=on_progress)
+
+        if not extracted_chars:
+            raise HTTPException(status_code=400, detail="No text could be extracted from the PDF")
+
+        CARDS_PER_DOCUMENT.observe(len(flashcards_data))
+        return flashcards_data
 
     async def generate_flashcards(self, text: str) -> List[dict]:
-        """Generate flashcards from text using OpenAI API."""
+        """Generate flashcards from text, one concurrent LLM call per chunk."""
+        if settings.PROMPT_COMPACTION:
+            text = compact_text(text)
+        chunks = chunk_text(text, self.chunk_token_budget)
+        return await self.generate_flashcards_for_chunks(chunks)
+
+    async def generate_flashcards_for_chunks(self, chunks: List[TextChunk]) -> List[dict]:
+        """Map chunks onto bounded concurrent LLM calls and merge the cards in document order."""
+        results = await asyncio.gather(*(self._generate_chunk_flashcards(chunk) for chunk in chunks))
+        return self.deduplicate([card for cards in results for card in cards])
+
+    async def generate_flashcards_from_pages(
+        self,
+        pages: AsyncIterable[PageRecord],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[dict]:
+        """Generate flashcards while pages are still being extracted.
+
+        Each chunk is dispatched as soon as the chunker emits it, so LLM calls overlap extraction.
+        ``on_progress`` is called with ``(chunks_completed, chunks_total)`` as chunks start and finish.
+        """
+        tasks: List[asyncio.Task] = []
+        completed = 0
+
+        def chunk_done(_):
+            nonlocal completed
+            completed += 1
+            if on_progress:
+                on_progress(completed, len(tasks))
+
         try:
-            prompt = f"""
+            async for chunk in chunk_pages(self._compact(pages), self.chunk_token_budget):
+                task = asyncio.create_task(self._generate_chunk_flashcards(chunk))
+                task.add_done_callback(chunk_done)
+                tasks.append(task)
+                if on_progress:
+                    on_progress(completed, len(tasks))
+            logger.info(f"Dispatched {len(tasks)} chunks for flashcard generation")
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return self.deduplicate([card for cards in results for card in cards])
+
+    def deduplicate(self, cards: List[dict]) -> List[dict]:
+        """Collapse the paraphrased cards that neighbouring chunks tend to produce."""
+        if not settings.DEDUP_CARDS:
+            return cards
+        # Imported here so numpy is only loaded once a deck is generated
+        from .dedup import deduplicate_cards
+
+        return deduplicate_cards(cards)
+
+    async def _generate_chunk_flashcards(self, chunk: TextChunk) -> List[dict]:
+        """Generate flashcards for a single chunk using OpenAI API, reusing earlier cards for it."""
+        if self.chunk_cache is None:
+            return await self._generate_text_flashcards(chunk.text)
+        generated = False
+
+        async def generate():
+            nonlocal generated
+            generated = True
+            return await self._generate_text_flashcards(chunk.text)
+
+        cards = await self.chunk_cache.get_or_compute(self.chunk_cache_key(chunk), generate)
+        CHUNK_CARDS.labels("generated" if generated else "reused").inc()
+        return cards
+
+    @asynccontextmanager
+    async def _upstream_slot(self, provider: str, messages: List[dict], max_tokens: int) -> AsyncIterator[Admission]:
+        """Wait for a fair share of the provider's rate budget, then for a free concurrency slot."""
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        queued_at = time.perf_counter()
+        async with self.scheduler.admit(provider, prompt_tokens, max_tokens) as admission:
+            await wait_within_deadline(self._llm_semaphore.acquire(), what="an upstream slot")
+            try:
+                record_stage(UPSTREAM_QUEUE, time.perf_counter() - queued_at)
+                try:
+                    yield admission
+                except Exception as e:
+                    LLM_ERRORS.labels(provider=provider).inc()
+                    if _is_rate_limited(e):
+                        self.scheduler.throttle(provider, _retry_after(e))
+                    raise
+            finally:
+                self._llm_semaphore.release()
+
+    def _build_messages(self, text: str) -> List[dict]:
+        prompt = f"""
             Create a list of flashcards from the following text. Each flashcard should have a clear question and a concise answer.
             Format each flashcard as a JSON object with 'question' and 'answer' fields.
             Return only the JSON array of flashcards, nothing else.
@@ -146,31 +376,159 @@ class FlashcardService:
             Text:
             {text}
             """
+        return [
+            {"role": "system", "content": "You are a helpful assistant that creates educational flashcards."},
+            {"role": "user", "content": prompt}
+        ]
 
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates educational flashcards."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+    async def _generate_text_flashcards(self, text: str) -> List[dict]:
+        """Generate flashcards from text using OpenAI API."""
+        try:
+            with stage(PROMPT_BUILD):
+                messages = self._build_messages(text)
+            response = await hedged(
+                lambda sent: self._complete_openai(messages, sent), self.hedge_delay("openai"), "openai"
             )
 
             # Extract the flashcards from the response
-            content = response.choices[0].message.content
-            # Clean up the response to ensure it's valid JSON
-            content = content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-
-            import json
-            flashcards = json.loads(content)
-            return flashcards
+            choice = response.choices[0]
+            if getattr(choice, "finish_reason", None) == "length":
+                logger.warning(f"Completion hit max_tokens ({self.max_tokens}); keeping the complete cards")
+
+            # Salvage complete cards from truncated or slightly malformed JSON instead of failing the chunk
+            with stage(PARSE):
+                result = parse_flashcards(choice.message.content)
+            return result.cards
 
         except Exception as e:
             logger.error(f"Error generating flashcards: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3) | _deadline_reached,
+        wait=_retry_wait,
+        retry=retry_if_exception(_is_retryable),
+        reraise=True
+    )
+    async def _complete_openai(self, messages: List[dict], sent: asyncio.Event):
+        """One non-streaming completion; ``sent`` is set once the request leaves our queues.
+
+        Each attempt queues for its own upstream slot, so retries respect the scheduler and a 429's
+        Retry-After.
+        """
+        async with self._upstream_slot("openai", messages, self.max_tokens) as admission:
+            sent.set()
+            started = time.perf_counter()
+            with stage(LLM):
+                response = await wait_within_deadline(
+                    self.openai_breaker.call(
+                        self.client.chat.completions.create,
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature
+                    ),
+                    what="openai",
+                )
+            self.latency["openai"].observe(time.perf_counter() - started)
+            admission.settle(_total_tokens(response))
+            record_usage("openai", getattr(response, "usage", None))
+        return response
+
+    async def stream_flashcards_from_pages(self, pages: AsyncIterable[PageRecord]) -> AsyncIterator[dict]:
+        """Stream flashcards in document order as soon as the LLM finishes each one.
+
+        Chunks are generated concurrently; cards from a later chunk are buffered until every
+        earlier chunk has been fully streamed. Cards are not deduplicated, since a later card may
+        replace an earlier one; pass the finished deck through ``deduplicate`` before keeping it.
+        """
+        chunk_queues: asyncio.Queue = asyncio.Queue()
+        tasks: List[asyncio.Task] = []
+
+        async def produce_chunks():
+            try:
+                async for chunk in chunk_pages(self._compact(pages), self.chunk_token_budget):
+                    queue: asyncio.Queue = asyncio.Queue()
+                    tasks.append(asyncio.create_task(self._stream_chunk_into(chunk, queue)))
+                    await chunk_queues.put(queue)
+            except Exception as e:
+                await chunk_queues.put(e)
+            await chunk_queues.put(_STREAM_DONE)
+
+        producer = asyncio.create_task(produce_chunks())
+        try:
+            while True:
+                queue = await chunk_queues.get()
+                if queue is _STREAM_DONE:
+                    break
+                if isinstance(queue, Exception):
+                    raise queue
+                while True:
+                    item = await queue.get()
+                    if item is _STREAM_DONE:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+
+    async def _stream_chunk_into(self, chunk: TextChunk, queue: asyncio.Queue) -> None:
+        try:
+            cached = await self.chunk_cache.get(self.chunk_cache_key(chunk)) if self.chunk_cache else None
+            if cached is not None:
+                CHUNK_CARDS.labels("reused").inc()
+                for card in cached:
+                    await queue.put(card)
+            else:
+                cards = []
+                async for card in self._stream_text_flashcards(chunk.text):
+                    cards.append(card)
+                    await queue.put(card)
+                if self.chunk_cache is not None:
+                    CHUNK_CARDS.labels("generated").inc()
+                    # /generate replays this entry, so it keeps only the cards its parser would have accepted
+                    cards = validate_cards(cards).cards
+                    if cards:
+                        await self.chunk_cache.set(self.chunk_cache_key(chunk), cards)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_STREAM_DONE)
+
+    async def _stream_text_flashcards(self, text: str) -> AsyncIterator[dict]:
+        """Stream flashcards for one chunk using the OpenAI streaming API."""
+        parser = JSONArrayStreamParser()
+        with stage(PROMPT_BUILD):
+            messages = self._build_messages(text)
+        async with self._upstream_slot("openai", messages, self.max_tokens):
+            # Covers the whole stream, from request to last token
+            started = time.perf_counter()
+            stream = await wait_within_deadline(
+                self.openai_breaker.call(
+                    self.client.chat.completions.create,
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                    stream=True
+                ),
+                what="openai",
+            )
+            events = stream.__aiter__()
+            try:
+                while True:
+                    try:
+                        # Every read is bounded, so a stalled stream cannot outlive the request
+                        event = await wait_within_deadline(events.__anext__(), what="openai")
+                    except StopAsyncIteration:
+                        break
+                    if not event.choices:
+                        continue
+                    delta = event.choices[0].delta.content
+                    if delta:
+                        for card in parser.feed(delta):
+                            yield card
+            finally:
+                record_stage(LLM, time.perf_counter() - started)
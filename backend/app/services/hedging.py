@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+from ..core.config import get_settings
+from ..core.metrics import HEDGED_REQUESTS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful upstream calls for one provider."""
+
+    def __init__(self, window: int = settings.HEDGE_LATENCY_WINDOW, min_samples: int = settings.HEDGE_MIN_SAMPLES):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile, or None until enough calls have been seen."""
+        if len(self.samples) < max(1, self.min_samples):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+
+async def hedged(
+    attempt: Callable[[asyncio.Event], Awaitable[T]],
+    delay: Optional[float],
+    provider: str,
+) -> T:
+    """Run ``attempt``; if it is still in flight ``delay`` seconds after it was sent, start a
+    second one and return whichever succeeds first, cancelling the other.
+
+    ``attempt`` sets the event it is given once its request has actually gone upstream, so time
+    spent queueing for our own rate limits never triggers a hedge. A ``delay`` of None disables
+    hedging.
+    """
+    first_sent = asyncio.Event()
+    first = asyncio.ensure_future(attempt(first_sent))
+    if delay is None:
+        return await first
+
+    tasks = {first}
+    sent = asyncio.ensure_future(first_sent.wait())
+    try:
+        await asyncio.wait({first, sent}, return_when=asyncio.FIRST_COMPLETED)
+        if not first.done():
+            await asyncio.wait({first}, timeout=delay)
+        if first.done():
+            return first.result()
+
+        HEDGED_REQUESTS.labels(provider=provider, outcome="sent").inc()
+        logger.info(f"{provider} call still running after {delay:.2f}s; sending a hedged request")
+        second = asyncio.ensure_future(attempt(asyncio.Event()))
+        tasks.add(second)
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        HEDGED_REQUESTS.labels(provider=provider, outcome="won").inc()
+                    return task.result()
+                # The first failure is reported if both attempts fail
+                error = error or task.exception()
+        raise error
+    finally:
+        sent.cancel()
+        for task in tasks:
+            task.cancel()
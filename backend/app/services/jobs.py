@@ -0,0 +1,382 @@
+import asyncio
+import itertools
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from pydantic import ValidationError
+
+from ..core.config import get_settings
+from ..models.flashcard import Flashcard
+from ..models.job import Job, JobProgress, JobStatus
+from .deadline import set_deadline
+from .scheduler import current_user_id
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class JobQueue(ABC):
+    """Storage and priority queue backend for generation jobs.
+
+    Higher ``priority`` values are popped first; jobs of equal priority run in submission order.
+    """
+
+    @abstractmethod
+    async def push(self, job_id: str, priority: int) -> None:
+        ...
+
+    @abstractmethod
+    async def pop(self) -> str:
+        """Block until a job is available and return its id."""
+        ...
+
+    @abstractmethod
+    async def remove(self, job_id: str) -> bool:
+        """Remove a job that has not started yet; returns False if it was not queued."""
+        ...
+
+    @abstractmethod
+    async def save(self, job: Job) -> None:
+        ...
+
+    @abstractmethod
+    async def load(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def save_progress(self, job: Job) -> None:
+        """Store ``job.progress`` only, keeping a status another worker wrote meanwhile (a cancel)."""
+        ...
+
+    @abstractmethod
+    async def save_unless_cancelled(self, job: Job) -> bool:
+        """Store ``job`` unless it has been cancelled meanwhile; returns whether it was stored."""
+        ...
+
+    @abstractmethod
+    async def save_payload(self, job_id: str, payload: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def pop_payload(self, job_id: str) -> Optional[bytes]:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryJobQueue(JobQueue):
+    """Process-local queue backend; the default when no Redis is configured."""
+
+    def __init__(self):
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._queued: Set[str] = set()
+        self._counter = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        self._payloads: Dict[str, bytes] = {}
+
+    async def push(self, job_id: str, priority: int) -> None:
+        self._queued.add(job_id)
+        await self._queue.put((-priority, next(self._counter), job_id))
+
+    async def pop(self) -> str:
+        while True:
+            _, _, job_id = await self._queue.get()
+            # Entries removed by cancellation are dropped lazily
+            if job_id in self._queued:
+                self._queued.discard(job_id)
+                return job_id
+
+    async def remove(self, job_id: str) -> bool:
+        if job_id not in self._queued:
+            return False
+        self._queued.discard(job_id)
+        return True
+
+    async def save(self, job: Job) -> None:
+        self._jobs[str(job.id)] = job.model_copy(deep=True)
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        return job.model_copy(deep=True) if job is not None else None
+
+    async def save_progress(self, job: Job) -> None:
+        stored = self._jobs.get(str(job.id))
+        if stored is not None:
+            stored.progress = job.progress.model_copy()
+
+    async def save_unless_cancelled(self, job: Job) -> bool:
+        stored = self._jobs.get(str(job.id))
+        if stored is not None and stored.status == JobStatus.CANCELLED:
+            return False
+        await self.save(job)
+        return True
+
+    async def save_payload(self, job_id: str, payload: bytes) -> None:
+        self._payloads[job_id] = payload
+
+    async def pop_payload(self, job_id: str) -> Optional[bytes]:
+        return self._payloads.pop(job_id, None)
+
+
+class RedisJobQueue(JobQueue):
+    """Redis-backed queue so several API workers can share one job pool."""
+
+    def __init__(self, redis, prefix: str = "flashcards:jobs", result_ttl: int = settings.JOB_RESULT_TTL):
+        self.redis = redis
+        self.prefix = prefix
+        self.result_ttl = result_ttl
+        self._queue_key = f"{prefix}:queue"
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def _payload_key(self, job_id: str) -> str:
+        return f"{self.prefix}:payload:{job_id}"
+
+    async def push(self, job_id: str, priority: int) -> None:
+        # Lower scores pop first: priority dominates, submission time breaks ties
+        score = -priority * 1e10 + time.time()
+        await self.redis.zadd(self._queue_key, {job_id: score})
+
+    async def pop(self) -> str:
+        while True:
+            item = await self.redis.bzpopmin(self._queue_key, timeout=1)
+            if item:
+                job_id = item[1]
+                return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+    async def remove(self, job_id: str) -> bool:
+        return bool(await self.redis.zrem(self._queue_key, job_id))
+
+    async def save(self, job: Job) -> None:
+        await self.redis.set(self._job_key(str(job.id)), job.model_dump_json(), ex=self.result_ttl)
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        raw = await self.redis.get(self._job_key(job_id))
+        return Job.model_validate_json(raw) if raw else None
+
+    async def _update(self, job_id: str, update: Callable[[Optional[Job]], Optional[Job]]) -> bool:
+        """Optimistic read-modify-write of a job record, retried if it changes before it is written.
+
+        ``update`` returns the record to store, or None to leave it as it is.
+        """
+        from redis.exceptions import WatchError
+
+        key = self._job_key(job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    job = update(Job.model_validate_json(raw) if raw else None)
+                    if job is None:
+                        await pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.set(key, job.model_dump_json(), ex=self.result_ttl)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+
+    async def save_progress(self, job: Job) -> None:
+        def update(stored: Optional[Job]) -> Optional[Job]:
+            if stored is None:
+                return None
+            stored.progress = job.progress
+            return stored
+
+        await self._update(str(job.id), update)
+
+    async def save_unless_cancelled(self, job: Job) -> bool:
+        return await self._update(
+            str(job.id), lambda stored: None if stored is not None and stored.status == JobStatus.CANCELLED else job
+        )
+
+    async def save_payload(self, job_id: str, payload: bytes) -> None:
+        await self.redis.set(self._payload_key(job_id), payload, ex=self.result_ttl)
+
+    async def pop_payload(self, job_id: str) -> Optional[bytes]:
+        key = self._payload_key(job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.get(key)
+            pipe.delete(key)
+            payload, _ = await pipe.execute()
+        return payload
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_job_queue() -> JobQueue:
+    """Build the queue backend selected by ``JOB_QUEUE_BACKEND``."""
+    if settings.JOB_QUEUE_BACKEND == "redis":
+        from redis import asyncio as aioredis
+
+        return RedisJobQueue(aioredis.from_url(settings.REDIS_URL))
+    return InMemoryJobQueue()
+
+
+class JobProgressReporter:
+    """Handed to the generation runner so it can report progress on a job."""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def page_extracted(self) -> None:
+        self.job.progress.pages_extracted += 1
+
+    def chunks_changed(self, completed: int, total: int) -> None:
+        self.job.progress.chunks_completed = completed
+        self.job.progress.chunks_total = total
+
+
+JobRunner = Callable[[bytes, JobProgressReporter], Awaitable[List[dict]]]
+
+
+class JobManager:
+    """Runs queued generation jobs on a bounded pool of background workers."""
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        queue: Optional[JobQueue] = None,
+        workers: int = settings.JOB_WORKERS,
+        progress_interval: float = 0.5,
+    ):
+        self.runner = runner
+        self.queue = queue or InMemoryJobQueue()
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def start(self) -> None:
+        if self._worker_tasks:
+            return
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(max(1, self.workers))]
+        logger.info(f"Started {len(self._worker_tasks)} generation job workers")
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        await self.queue.close()
+
+    async def submit(
+        self, pdf_content: bytes, priority: int = 0, filename: Optional[str] = None, digest: Optional[str] = None
+    ) -> Job:
+        job = Job(priority=priority, filename=filename, digest=digest, user_id=current_user_id.get())
+        job_id = str(job.id)
+        await self.queue.save_payload(job_id, pdf_content)
+        await self.queue.save(job)
+        await self.queue.push(job_id, priority)
+        logger.info(f"Queued generation job {job_id} with priority {priority}")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.queue.load(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        job = await self.queue.load(job_id)
+        if job is None or job.is_finished:
+            return job
+        if await self.queue.remove(job_id):
+            await self.queue.pop_payload(job_id)
+        job.status = JobStatus.CANCELLED
+        job.finished_at = datetime.utcnow()
+        await self.queue.save(job)
+        # Running jobs owned by this process stop now; others notice on their next progress check
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self.queue.pop()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error in job worker for {job_id}: {str(e)}")
+
+    async def _run_job(self, job_id: str) -> None:
+        job = await self.queue.load(job_id)
+        payload = await self.queue.pop_payload(job_id)
+        if job is None or job.status != JobStatus.QUEUED or payload is None:
+            return
+
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        # A cancel can land between the pop and here, possibly from another process
+        if not await self.queue.save_unless_cancelled(job):
+            return
+
+        task = asyncio.create_task(self._run_as(job, payload))
+        self._running[job_id] = task
+        monitor = asyncio.create_task(self._monitor(job, task))
+        try:
+            # asyncio.wait keeps a cancelled job distinct from this worker being cancelled
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            # The worker is stopping: hand the job back instead of leaving it RUNNING forever
+            await self._requeue(job, payload)
+            raise
+        finally:
+            monitor.cancel()
+            task.cancel()
+            self._running.pop(job_id, None)
+
+        if task.cancelled():
+            job.status = JobStatus.CANCELLED
+        elif task.exception() is not None:
+            e = task.exception()
+            logger.error(f"Generation job {job_id} failed: {str(e)}")
+            job.status = JobStatus.FAILED
+            job.error = getattr(e, "detail", None) or str(e)
+        else:
+            try:
+                job.flashcards = [Flashcard(**card) for card in task.result()]
+                job.status = JobStatus.COMPLETED
+            except ValidationError as e:
+                logger.error(f"Generation job {job_id} returned invalid flashcards: {str(e)}")
+                job.status = JobStatus.FAILED
+                job.error = "Generated flashcards failed validation"
+
+        job.finished_at = datetime.utcnow()
+        if not await self.queue.save_unless_cancelled(job):
+            logger.info(f"Generation job {job_id} was cancelled while it ran; its result is discarded")
+
+    async def _requeue(self, job: Job, payload: bytes) -> None:
+        job.status = JobStatus.QUEUED
+        job.started_at = None
+        job.progress = JobProgress()
+        if await self.queue.save_unless_cancelled(job):
+            await self.queue.save_payload(str(job.id), payload)
+            await self.queue.push(str(job.id), job.priority)
+            logger.info(f"Requeued generation job {job.id} as its worker stopped")
+
+    async def _run_as(self, job: Job, payload: bytes) -> List[dict]:
+        # The task has its own context, so upstream scheduling is attributed to the submitter
+        current_user_id.set(job.user_id or current_user_id.get())
+        # Jobs outlive their submitting request, so they get their own, longer budget
+        set_deadline(settings.JOB_TIMEOUT)
+        return await self.runner(payload, JobProgressReporter(job))
+
+    async def _monitor(self, job: Job, task: asyncio.Task) -> None:
+        """Periodically persist progress and pick up cancellations from other processes."""
+        while not task.done():
+            await asyncio.sleep(self.progress_interval)
+            stored = await self.queue.load(str(job.id))
+            if stored is not None and stored.status == JobStatus.CANCELLED:
+                task.cancel()
+                return
+            # Only progress is written, so a cancel saved since the check above is not overwritten
+            await self.queue.save_progress(job)
@@ -0,0 +1,142 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+import jiter
+from pydantic import TypeAdapter, ValidationError
+
+from ..core.metrics import PARSED_CARDS
+from ..models.flashcard import FlashcardBase
+
+logger = logging.getLogger(__name__)
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_CARDS = TypeAdapter(List[FlashcardBase])
+# The opening of a {"flashcards": [...]} wrapper, up to its array
+_WRAPPER = re.compile(r'\{\s*"flashcards"\s*:\s*')
+
+
+def _loads(raw: str):
+    try:
+        return jiter.from_json(raw.encode("utf-8"))
+    except ValueError:
+        # Models often leave a trailing comma before a closing brace
+        return jiter.from_json(_TRAILING_COMMA.sub(r"\1", raw).encode("utf-8"))
+
+
+class JSONArrayStreamParser:
+    """Incrementally extracts complete objects from a streamed JSON array.
+
+    Text is fed as it arrives from the LLM; each call returns the objects whose closing brace
+    has been seen so far. Markdown code fences and any text around the array are ignored, and a
+    ``{"flashcards": [...]}`` wrapper is unwrapped as ``parse_flashcards`` does.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.skipped = 0
+
+    @property
+    def pending(self) -> bool:
+        """Whether an object was started but not closed, e.g. output cut off at max_tokens."""
+        return self._depth > 0
+
+    def feed(self, text: str) -> List[dict]:
+        objects = []
+        for char in text:
+            if self._depth == 0:
+                # Outside any object: skip fences, brackets, commas and whitespace
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "[" and self._depth == 1 and _WRAPPER.fullmatch("".join(self._buffer[:-1])):
+                # Drop the wrapper so the cards inside are emitted one by one; its closing brace
+                # is skipped like any text outside an object
+                self._depth = 0
+                self._buffer = []
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    raw = "".join(self._buffer)
+                    self._buffer = []
+                    try:
+                        value = _loads(raw)
+                    except ValueError as e:
+                        logger.warning(f"Skipping malformed streamed object: {str(e)}")
+                        self.skipped += 1
+                        continue
+                    if isinstance(value, dict):
+                        objects.append(value)
+        return objects
+
+
+@dataclass
+class FlashcardParseResult:
+    """Cards recovered from one completion"""
+    cards: List[dict] = field(default_factory=list)
+    salvaged: int = 0  # Valid cards recovered from output that was not valid JSON
+    dropped: int = 0  # Malformed, truncated or invalid cards
+
+    @property
+    def recovered(self) -> bool:
+        return self.salvaged > 0 or self.dropped > 0
+
+
+def validate_cards(candidates: List) -> FlashcardParseResult:
+    """Validate candidate cards in one pass, dropping only the invalid ones."""
+    try:
+        _CARDS.validate_python(candidates)
+        return FlashcardParseResult(cards=list(candidates))
+    except ValidationError as e:
+        invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+    cards = [card for index, card in enumerate(candidates) if index not in invalid]
+    return FlashcardParseResult(cards=cards, dropped=len(candidates) - len(cards))
+
+
+def parse_flashcards(text: str) -> FlashcardParseResult:
+    """Parse an LLM completion into flashcards, salvaging what it can from malformed output.
+
+    Well-formed output is parsed in one call. Otherwise (truncated at max_tokens, trailing
+    commas, stray prose) every complete object is recovered individually.
+    """
+    body = _FENCE.sub("", text or "")
+    try:
+        value = jiter.from_json(body.encode("utf-8"))
+        if isinstance(value, dict):
+            value = value.get("flashcards", [value])
+        if not isinstance(value, list):
+            raise ValueError(f"expected a JSON array, got {type(value).__name__}")
+        result = validate_cards(value)
+        PARSED_CARDS.labels(outcome="valid").inc(len(result.cards))
+    except ValueError as e:
+        parser = JSONArrayStreamParser()
+        candidates = parser.feed(body)
+        result = validate_cards(candidates)
+        result.salvaged = len(result.cards)
+        result.dropped += parser.skipped + int(parser.pending)
+        logger.warning(
+            f"Recovered {result.salvaged} flashcards from malformed output ({str(e)}); dropped {result.dropped}"
+        )
+        PARSED_CARDS.labels(outcome="salvaged").inc(result.salvaged)
+
+    PARSED_CARDS.labels(outcome="dropped").inc(result.dropped)
+    return result
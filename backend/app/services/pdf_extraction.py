@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, List, Optional, Tuple
+
+from ..core.config import get_settings
+from ..core.metrics import DOCUMENT_CHARACTERS, DOCUMENT_PAGES, EXTRACTION, PAGES_WITHOUT_TEXT, record_stage
+from .deadline import wait_within_deadline
+from .extractors import PdfSource, get_engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PageRecord:
+    """Text extracted from a single PDF page (1-based page number)"""
+    page_number: int
+    text: str
+    char_count: int
+
+
+class PageTimeoutError(Exception):
+    """Raised inside a worker when a single page takes too long to extract"""
+    pass
+
+
+def get_extraction_executor() -> Optional[Executor]:
+    """Return the shared extraction process pool, or None to use the default thread pool."""
+    global _executor
+    if settings.PDF_EXTRACTION_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.PDF_EXTRACTION_WORKERS)
+        return _executor
+
+
+def shutdown_extraction_executor() -> None:
+    """Shut down the shared process pool; it is recreated lazily on next use."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+@contextmanager
+def _page_timeout(seconds: float):
+    """Interrupt the enclosed block after ``seconds`` using SIGALRM where available."""
+    if (
+        not seconds
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def _on_timeout(signum, frame):
+        raise PageTimeoutError(f"Page extraction exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _count_pages(source: PdfSource, engine_name: str) -> int:
+    engine = get_engine(engine_name)
+    return engine.page_count(engine.open(source))
+
+
+def _extract_page_range(
+    source: PdfSource,
+    start: int,
+    end: int,
+    page_timeout: float,
+    engine_name: str,
+    probe: bool,
+) -> List[Optional[str]]:
+    """Extract pages ``[start, end)``; runs in a worker process.
+
+    Pages the probe finds without a text layer come back as None without being parsed.
+    """
+    engine = get_engine(engine_name)
+    document = engine.open(source)
+    texts: List[Optional[str]] = []
+    for page_number in range(start, end):
+        if probe and not engine.has_text_layer(document, page_number):
+            texts.append(None)
+            continue
+        try:
+            with _page_timeout(page_timeout):
+                texts.append(engine.extract_page(document, page_number))
+        except PageTimeoutError:
+            logger.warning(f"Skipping page {page_number + 1}: extraction timed out after {page_timeout}s")
+            texts.append("")
+    return texts
+
+
+def _page_ranges(page_count: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    pages_per_task = max(1, pages_per_task)
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+async def iter_pages(
+    pdf_content: PdfSource,
+    engine: Optional[str] = None,
+    probe: Optional[bool] = None,
+) -> AsyncIterator[PageRecord]:
+    """Yield page records in document order while later page ranges are still being extracted.
+
+    At most ``PDF_MAX_INFLIGHT_RANGES`` page ranges are submitted or buffered at once, so peak
+    memory is bounded by that window rather than by the size of the document. ``engine`` and
+    ``probe`` default to ``PDF_EXTRACTION_ENGINE`` and ``PDF_TEXT_LAYER_PROBE``.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_extraction_executor()
+    page_timeout = settings.PDF_PAGE_TIMEOUT
+    engine = engine or settings.PDF_EXTRACTION_ENGINE
+    probe = settings.PDF_TEXT_LAYER_PROBE if probe is None else probe
+    # Fail here, not in a worker, on a misconfigured engine
+    get_engine(engine)
+
+    started = time.perf_counter()
+    page_count = await wait_within_deadline(
+        loop.run_in_executor(executor, _count_pages, pdf_content, engine), what="PDF extraction"
+    )
+    ranges = deque(_page_ranges(page_count, settings.PDF_PAGES_PER_TASK))
+    logger.info(f"Extracting {page_count} pages in {len(ranges)} page ranges")
+
+    window: Deque[Tuple[int, int, asyncio.Future]] = deque()
+
+    def submit_next() -> None:
+        start, end = ranges.popleft()
+        future = loop.run_in_executor(
+            executor, _extract_page_range, pdf_content, start, end, page_timeout, engine, probe
+        )
+        window.append((start, end, future))
+
+    # Only time spent waiting on workers counts; time the consumer holds a page does not
+    waited = time.perf_counter() - started
+    characters = 0
+    try:
+        while ranges and len(window) < max(1, settings.PDF_MAX_INFLIGHT_RANGES):
+            submit_next()
+        while window:
+            start, end, future = window.popleft()
+            # Safety net in case the worker cannot interrupt itself (e.g. thread fallback)
+            timeout = page_timeout * (end - start) if page_timeout else None
+            wait_started = time.perf_counter()
+            texts = await wait_within_deadline(future, timeout, what="PDF extraction")
+            waited += time.perf_counter() - wait_started
+            if ranges:
+                submit_next()
+            for offset, text in enumerate(texts):
+                if text is None:
+                    PAGES_WITHOUT_TEXT.inc()
+                    text = ""
+                characters += len(text)
+                yield PageRecord(page_number=start + offset + 1, text=text, char_count=len(text))
+        DOCUMENT_PAGES.observe(page_count)
+        DOCUMENT_CHARACTERS.observe(characters)
+    finally:
+        record_stage(EXTRACTION, waited)
+        for _, _, future in window:
+            future.cancel()
+
+
+async def extract_text(pdf_content: PdfSource, engine: Optional[str] = None) -> str:
+    """Extract the full text of a PDF, joining pages with newlines."""
+    texts = [page.text async for page in iter_pages(pdf_content, engine=engine)]
+    return "\n".join(texts).strip()
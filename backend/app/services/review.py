@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from ..models.review import ReviewState
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# Grades below this are lapses: the card starts over with a one-day interval
+PASSING_GRADE = 3
+
+
+def initial_ease(difficulty: Optional[int]) -> float:
+    """Starting ease for a new card; harder cards (difficulty 5) come back sooner than easy ones (1)."""
+    if difficulty is None:
+        return DEFAULT_EASE
+    return DEFAULT_EASE - 0.15 * (difficulty - 3)
+
+
+def as_utc(moment: datetime) -> datetime:
+    """Naive UTC, the form every timestamp in the library is stored in."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def schedule(state: ReviewState, grade: int, reviewed_at: datetime) -> ReviewState:
+    """Apply one SM-2 review with recall quality ``grade`` (0-5) and return the new state."""
+    reviewed_at = as_utc(reviewed_at)
+    ease = max(MIN_EASE, state.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    if grade < PASSING_GRADE:
+        repetitions, lapses, interval = 0, state.lapses + 1, 1.0
+    else:
+        repetitions, lapses = state.repetitions + 1, state.lapses
+        if repetitions == 1:
+            interval = 1.0
+        elif repetitions == 2:
+            interval = 6.0
+        else:
+            interval = float(round(state.interval_days * state.ease))
+    return ReviewState(
+        ease=round(ease, 4),
+        interval_days=interval,
+        repetitions=repetitions,
+        lapses=lapses,
+        due_at=reviewed_at + timedelta(days=interval),
+        last_reviewed_at=reviewed_at,
+    )
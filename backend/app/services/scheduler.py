@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from ..core.config import get_settings
+from .deadline import DeadlineExceededError, bounded_timeout
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Identity used for fair queuing; set by the endpoint handling the request
+current_user_id: ContextVar[str] = ContextVar("current_user_id", default="anonymous")
+
+
+class SchedulerTimeoutError(Exception):
+    """Raised when a request waited longer than the configured queue limit"""
+    pass
+
+
+class TokenBucket:
+    """Continuously refilling budget of ``capacity`` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        self.refill()
+        missing = amount - self.available
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+
+@dataclass(eq=False)
+class _Waiter:
+    tokens: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class Admission:
+    """A granted slot; ``settle`` corrects the token reservation with actual usage."""
+
+    def __init__(self, budget: "ProviderBudget", reserved: int, waited: float):
+        self.budget = budget
+        self.reserved = reserved
+        self.waited = waited
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        if actual_tokens is None:
+            return
+        self.budget.tokens.refill()
+        # Refund over-estimates and charge under-estimates against the shared budget
+        self.budget.tokens.available = min(
+            self.budget.tokens.capacity,
+            self.budget.tokens.available + self.reserved - actual_tokens,
+        )
+        self.reserved = actual_tokens
+
+
+class ProviderBudget:
+    """Requests/tokens-per-minute budget for one provider with per-user round-robin queues."""
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.paused_until = 0.0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def enqueue(self, user_id: str, tokens: int) -> _Waiter:
+        # A request bigger than the whole budget would never fit; cap it at one full bucket
+        waiter = _Waiter(min(tokens, int(self.tokens.capacity)), asyncio.get_running_loop().create_future())
+        self.queues.setdefault(user_id, deque()).append(waiter)
+        self.dispatch()
+        return waiter
+
+    def discard(self, user_id: str, waiter: _Waiter) -> None:
+        queue = self.queues.get(user_id)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self.queues[user_id]
+        self.dispatch()
+
+    def pause(self, seconds: float) -> None:
+        """Stop admitting work, e.g. after the provider answered 429."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self._schedule(seconds)
+
+    def dispatch(self) -> None:
+        """Grant queued requests in round-robin user order while the budget allows."""
+        while self.queues:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                self._schedule(pause)
+                return
+            user_id, queue = next(iter(self.queues.items()))
+            waiter = queue[0]
+            if waiter.future.done():
+                queue.popleft()
+            else:
+                delay = max(self.requests.seconds_until(1), self.tokens.seconds_until(waiter.tokens))
+                if delay > 0:
+                    self._schedule(delay)
+                    return
+                queue.popleft()
+                self.requests.available -= 1
+                self.tokens.available -= waiter.tokens
+                waited = time.monotonic() - waiter.enqueued_at
+                self.admitted += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+                waiter.future.set_result(waited)
+            # Move this user to the back so every user gets a turn
+            self.queues.move_to_end(user_id)
+            if not queue:
+                del self.queues[user_id]
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self.dispatch)
+
+    def stats(self) -> dict:
+        self.requests.refill()
+        self.tokens.refill()
+        return {
+            "queue_depth": self.queue_depth,
+            "queued_users": len(self.queues),
+            "admitted": self.admitted,
+            "avg_wait_seconds": self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_wait_seconds": self.max_wait,
+            "requests_available": round(self.requests.available, 2),
+            "tokens_available": round(self.tokens.available),
+        }
+
+
+class UpstreamScheduler:
+    """Admission control against per-provider request and token budgets."""
+
+    def __init__(self, budgets: Dict[str, ProviderBudget], max_wait: float = settings.SCHEDULER_MAX_QUEUE_WAIT):
+        self.budgets = budgets
+        self.max_wait = max_wait
+
+    @classmethod
+    def from_settings(cls) -> "UpstreamScheduler":
+        return cls({
+            "openai": ProviderBudget("openai", settings.OPENAI_REQUESTS_PER_MINUTE, settings.OPENAI_TOKENS_PER_MINUTE),
+            "groq": ProviderBudget("groq", settings.GROQ_REQUESTS_PER_MINUTE, settings.GROQ_TOKENS_PER_MINUTE),
+        })
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        provider: str,
+        prompt_tokens: int,
+        max_completion_tokens: int,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Admission]:
+        """Wait for a fair turn within the provider budget, then hold the reservation."""
+        budget = self.budgets[provider]
+        user_id = user_id or current_user_id.get()
+        # Flashcards are shorter than their source text, so expect at most the prompt size back
+        tokens = prompt_tokens + min(max_completion_tokens, prompt_tokens)
+        # Give up when the request's own deadline comes before the queue limit
+        timeout = bounded_timeout(self.max_wait, f"{provider} capacity")
+        waiter = budget.enqueue(user_id, tokens)
+        try:
+            waited = await asyncio.wait_for(asyncio.shield(waiter.future), timeout=timeout)
+        except asyncio.TimeoutError:
+            budget.discard(user_id, waiter)
+            if timeout < self.max_wait:
+                raise DeadlineExceededError(f"{provider} capacity")
+            raise SchedulerTimeoutError(f"Waited more than {self.max_wait}s for {provider} capacity")
+        except asyncio.CancelledError:
+            budget.discard(user_id, waiter)
+            raise
+        if waited > 1:
+            logger.info(f"Request for {user_id} waited {waited:.1f}s for {provider} capacity")
+        yield Admission(budget, waiter.tokens, waited)
+
+    def throttle(self, provider: str, seconds: float) -> None:
+        self.budgets[provider].pause(seconds)
+
+    def stats(self) -> dict:
+        return {name: budget.stats() for name, budget in self.budgets.items()}
@@ -0,0 +1,658 @@
+import base64
+import binascii
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.config import get_settings
+from ..models.flashcard import Flashcard
+from ..models.review import ReviewState
+from .review import as_utc, initial_ease, schedule
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_COLUMNS = "seq, id, user_id, source_document, topic, question, answer, difficulty, tags, created_at, updated_at"
+
+# Column weights for bm25(): a match in the question counts for more than one in the answer
+_CARD_WEIGHTS = (2.0, 1.0, 0.5)
+
+_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE flashcards_fts USING fts5(
+    question, answer, topic,
+    content='flashcards', content_rowid='seq', tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER flashcards_fts_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO flashcards_fts (rowid, question, answer, topic) VALUES (new.seq, new.question, new.answer, new.topic);
+END;
+CREATE TRIGGER flashcards_fts_delete AFTER DELETE ON flashcards BEGIN
+    INSERT INTO flashcards_fts (flashcards_fts, rowid, question, answer, topic)
+    VALUES ('delete', old.seq, old.question, old.answer, old.topic);
+END;
+CREATE TRIGGER flashcards_fts_update AFTER UPDATE OF question, answer, topic ON flashcards BEGIN
+    INSERT INTO flashcards_fts (flashcards_fts, rowid, question, answer, topic)
+    VALUES ('delete', old.seq, old.question, old.answer, old.topic);
+    INSERT INTO flashcards_fts (rowid, question, answer, topic) VALUES (new.seq, new.question, new.answer, new.topic);
+END;
+CREATE TABLE documents (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE documents_fts USING fts5(
+    text, content='documents', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER documents_fts_insert AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER documents_fts_delete AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+INSERT INTO flashcards_fts (flashcards_fts) VALUES ('rebuild');
+"""
+
+# SQLite's default limit on bound parameters is 999
+_MAX_PARAMS = 500
+
+_REVIEW_COLUMNS = "r.ease, r.interval_days, r.repetitions, r.lapses, r.due_at, r.last_reviewed_at"
+
+# One review row per card, created with the card; a NULL due_at marks a card never reviewed
+_REVIEW_SCHEMA = """
+CREATE TABLE reviews (
+    seq INTEGER PRIMARY KEY REFERENCES flashcards (seq) ON DELETE CASCADE,
+    user_id TEXT NOT NULL,
+    ease REAL,
+    interval_days REAL NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    lapses INTEGER NOT NULL DEFAULT 0,
+    due_at TEXT,
+    last_reviewed_at TEXT
+);
+CREATE INDEX idx_reviews_due ON reviews (user_id, due_at, seq);
+CREATE TRIGGER reviews_insert AFTER INSERT ON flashcards BEGIN
+    INSERT INTO reviews (seq, user_id) VALUES (new.seq, new.user_id);
+END;
+INSERT INTO reviews (seq, user_id) SELECT seq, user_id FROM flashcards;
+"""
+
+# LSH bucket keys of each card's MinHash signature, for finding near-duplicates in a library, and
+# the library cards that stand in for the near-duplicates a saved deck did not store
+_DEDUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS card_lsh (
+    user_id TEXT NOT NULL,
+    band_key INTEGER NOT NULL,
+    seq INTEGER NOT NULL REFERENCES flashcards (seq) ON DELETE CASCADE,
+    PRIMARY KEY (user_id, band_key, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_card_lsh_seq ON card_lsh (seq);
+CREATE TABLE IF NOT EXISTS deck_duplicates (
+    user_id TEXT NOT NULL,
+    document_digest TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    seq INTEGER NOT NULL REFERENCES flashcards (seq) ON DELETE CASCADE,
+    PRIMARY KEY (user_id, document_digest, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_deck_duplicates_seq ON deck_duplicates (seq);
+"""
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a pagination cursor that was not issued by this store"""
+    pass
+
+
+class CardNotFoundError(LookupError):
+    """Raised when a review refers to cards the user does not have"""
+
+    def __init__(self, card_ids: Sequence[str]):
+        super().__init__(f"Flashcards not found: {', '.join(card_ids)}")
+        self.card_ids = list(card_ids)
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(str(seq).encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+
+
+def _lsh_rows(owners: Sequence[Tuple[str, object]], hasher, signatures) -> List[tuple]:
+    """``(user_id, band_key, card)`` rows for every ``(user_id, card)`` owner whose card has content words."""
+    from .dedup import has_words
+
+    keys = hasher.band_keys(signatures).tolist()
+    return [
+        (user_id, key, card)
+        for (user_id, card), card_keys, words in zip(owners, keys, has_words(signatures).tolist())
+        if words
+        for key in card_keys
+    ]
+
+
+def match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query that matches documents containing every word.
+
+    Each word is quoted so user input can never be parsed as FTS5 syntax; a trailing ``*``
+    keeps prefix search (``eigen*``).
+    """
+    terms = []
+    for word, prefix in re.findall(r"(\w+)(\*?)", query):
+        terms.append(f'"{word}"{prefix}')
+    return " ".join(terms) or None
+
+
+class FlashcardStore:
+    """SQLite-backed library of generated flashcards.
+
+    Cards are listed newest first with keyset pagination on an autoincrement ``seq`` column, so
+    fetching page N costs the same as fetching page 1 however large a user's library grows.
+    Every filter has a ``(user_id, <filter>, seq)`` index that serves both the lookup and the order.
+
+    Card text and the extracted text of each source document are also kept in FTS5 indexes,
+    maintained by triggers in the same transaction as the insert, for BM25-ranked search.
+    Document text is stored once per digest and is searchable by every user who owns a deck
+    generated from it.
+
+    The MinHash LSH bucket keys of every card are indexed too, so a new deck can be checked
+    against a large library for near-duplicates by looking up only the cards it shares a bucket with.
+
+    Each card also has a spaced-repetition review row, created by trigger with the card and
+    indexed by due time so the next cards to study are read straight off the index.
+    """
+
+    def __init__(self, path: str = settings.FLASHCARD_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS flashcards (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                user_id TEXT NOT NULL,
+                document_digest TEXT,
+                source_document TEXT,
+                topic TEXT,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                difficulty INTEGER,
+                tags TEXT NOT NULL DEFAULT '[]',
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_flashcards_user ON flashcards (user_id, seq);
+            CREATE INDEX IF NOT EXISTS idx_flashcards_document ON flashcards (user_id, source_document, seq);
+            CREATE INDEX IF NOT EXISTS idx_flashcards_topic ON flashcards (user_id, topic, seq);
+            CREATE INDEX IF NOT EXISTS idx_flashcards_digest ON flashcards (user_id, document_digest);
+            CREATE TABLE IF NOT EXISTS flashcard_tags (
+                user_id TEXT NOT NULL,
+                tag TEXT NOT NULL,
+                seq INTEGER NOT NULL REFERENCES flashcards (seq) ON DELETE CASCADE,
+                PRIMARY KEY (user_id, tag, seq)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_flashcard_tags_seq ON flashcard_tags (seq);
+            CREATE TABLE IF NOT EXISTS document_pages (
+                digest TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (digest, page)
+            ) WITHOUT ROWID;
+            """
+        )
+        has_search = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flashcards_fts'"
+        ).fetchone()
+        if not has_search:
+            # Also indexes cards saved before search existed
+            self._conn.executescript(_SEARCH_SCHEMA)
+        has_lsh = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_lsh'"
+        ).fetchone()
+        self._conn.executescript(_DEDUP_SCHEMA)
+        if not has_lsh:
+            self._index_existing_cards()
+        has_reviews = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reviews'"
+        ).fetchone()
+        if not has_reviews:
+            # Cards saved before reviews existed start out as new cards
+            self._conn.executescript(_REVIEW_SCHEMA)
+        self._conn.commit()
+
+    def _index_existing_cards(self, batch_size: int = 5000) -> None:
+        """Add cards saved before near-duplicate detection existed to the LSH index."""
+        if self._conn.execute("SELECT 1 FROM flashcards LIMIT 1").fetchone() is None:
+            return
+        from .dedup import card_text, default_hasher
+
+        hasher = default_hasher()
+        rows = self._conn.execute("SELECT seq, user_id, question, answer FROM flashcards ORDER BY seq")
+        while True:
+            batch = rows.fetchmany(batch_size)
+            if not batch:
+                break
+            signatures = hasher.signatures([card_text(question, answer) for _, _, question, answer in batch])
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO card_lsh (user_id, band_key, seq) VALUES (?, ?, ?)",
+                _lsh_rows([(user_id, seq) for seq, user_id, _, _ in batch], hasher, signatures),
+            )
+
+    def _library_duplicates(self, user_id: str, hasher, signatures, threshold: float) -> List[Optional[int]]:
+        """For each signature, the seq of the most similar near-duplicate already in the user's library.
+
+        Only library cards sharing an LSH bucket with a new card are fetched and compared.
+        """
+        from .dedup import card_text, has_words, similarity
+
+        eligible = has_words(signatures).tolist()
+        keys = hasher.band_keys(signatures).tolist()
+        wanted = sorted({key for card_keys, words in zip(keys, eligible) if words for key in card_keys})
+        buckets: Dict[int, List[int]] = {}
+        for start in range(0, len(wanted), _MAX_PARAMS):
+            batch = wanted[start:start + _MAX_PARAMS]
+            for key, seq in self._conn.execute(
+                f"SELECT band_key, seq FROM card_lsh WHERE user_id = ? AND band_key IN ({', '.join('?' * len(batch))})",
+                [user_id, *batch],
+            ):
+                buckets.setdefault(key, []).append(seq)
+        if not buckets:
+            return [None] * len(keys)
+
+        candidates = sorted({seq for seqs in buckets.values() for seq in seqs})
+        texts: Dict[int, str] = {}
+        for start in range(0, len(candidates), _MAX_PARAMS):
+            batch = candidates[start:start + _MAX_PARAMS]
+            for seq, question, answer in self._conn.execute(
+                f"SELECT seq, question, answer FROM flashcards WHERE seq IN ({', '.join('?' * len(batch))})", batch
+            ):
+                texts[seq] = card_text(question, answer)
+        seqs = list(texts)
+        position = {seq: index for index, seq in enumerate(seqs)}
+        library = hasher.signatures(list(texts.values()))
+
+        matches: List[Optional[int]] = []
+        for index, card_keys in enumerate(keys):
+            rows = sorted({position[seq] for key in card_keys for seq in buckets.get(key, ())}) if eligible[index] else []
+            scores = similarity(library[rows], signatures[index]) if rows else None
+            best = int(scores.argmax()) if rows else 0
+            matches.append(seqs[rows[best]] if rows and scores[best] >= threshold else None)
+        return matches
+
+    def _cards_by_seq(self, seqs: Iterable[int]) -> Dict[int, Flashcard]:
+        seqs = sorted(set(seqs))
+        cards = {}
+        for start in range(0, len(seqs), _MAX_PARAMS):
+            batch = seqs[start:start + _MAX_PARAMS]
+            for row in self._conn.execute(
+                f"SELECT {_COLUMNS} FROM flashcards WHERE seq IN ({', '.join('?' * len(batch))})", batch
+            ):
+                cards[row[0]] = self._to_card(row)
+        return cards
+
+    def _stored_deck(self, user_id: str, document_digest: str) -> List[Flashcard]:
+        """The deck saved for a document, with library cards back in place of its near-duplicates."""
+        deck = [
+            self._to_card(row)
+            for row in self._conn.execute(
+                f"SELECT {_COLUMNS} FROM flashcards WHERE user_id = ? AND document_digest = ? ORDER BY seq",
+                (user_id, document_digest),
+            )
+        ]
+        columns = ", ".join(f"f.{column.strip()}" for column in _COLUMNS.split(","))
+        for position, *row in self._conn.execute(
+            f"""
+            SELECT d.position, {columns} FROM deck_duplicates d JOIN flashcards f ON f.seq = d.seq
+            WHERE d.user_id = ? AND d.document_digest = ? ORDER BY d.position
+            """,
+            (user_id, document_digest),
+        ):
+            deck.insert(position, self._to_card(row))
+        return deck
+
+    def add_document_page(self, document_digest: str, page_number: int, text: str) -> None:
+        """Stage one extracted page for the search index while the rest of the document is processed.
+
+        Staged pages become the document's searchable text when a deck from it is saved, so the
+        text never has to be held in memory by the request that extracts it.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR IGNORE INTO document_pages (digest, page, text)
+                SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM documents WHERE digest = ?)
+                """,
+                (document_digest, page_number, text, document_digest),
+            )
+
+    def _index_staged_pages(self, document_digest: str) -> None:
+        self._conn.execute(
+            """
+            INSERT OR IGNORE INTO documents (digest, text)
+            SELECT ?, text FROM (
+                SELECT group_concat(text, char(10) || char(10)) AS text
+                FROM (SELECT text FROM document_pages WHERE digest = ? ORDER BY page)
+            ) WHERE text IS NOT NULL
+            """,
+            (document_digest, document_digest),
+        )
+        self._conn.execute("DELETE FROM document_pages WHERE digest = ?", (document_digest,))
+
+    def save_deck(
+        self,
+        user_id: str,
+        cards: Sequence[Flashcard],
+        document_digest: Optional[str] = None,
+        source_document: Optional[str] = None,
+        document_text: Optional[str] = None,
+        duplicate_threshold: Optional[float] = None,
+    ) -> List[Flashcard]:
+        """Persist the cards generated from one document in a single transaction.
+
+        Saving the same document (by digest) again for the same user returns the stored deck
+        instead of duplicating it. Pages staged with ``add_document_page`` (or ``document_text``)
+        are added to the search index.
+        With ``duplicate_threshold``, new cards that are near-duplicates of a card already in the
+        user's library are not stored again; the returned deck has the library card in their place.
+        """
+        with self._lock:
+            if document_digest is not None:
+                with self._conn:
+                    if document_text:
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO documents (digest, text) VALUES (?, ?)",
+                            (document_digest, document_text),
+                        )
+                    self._index_staged_pages(document_digest)
+            if document_digest is not None:
+                existing = self._stored_deck(user_id, document_digest)
+                if existing:
+                    return existing
+
+            cards = [
+                card.model_copy(update={"user_id": user_id, "source_document": card.source_document or source_document})
+                for card in cards
+            ]
+            # Imported here so numpy is only loaded once cards are saved
+            from .dedup import card_text, default_hasher
+
+            hasher = default_hasher()
+            signatures = hasher.signatures([card_text(card.question, card.answer) for card in cards])
+            matches: List[Optional[int]] = [None] * len(cards)
+            if duplicate_threshold is not None and cards:
+                matches = self._library_duplicates(user_id, hasher, signatures, duplicate_threshold)
+            new_cards = [card for card, match in zip(cards, matches) if match is None]
+            if len(new_cards) < len(cards):
+                logger.info(f"Reusing {len(cards) - len(new_cards)} flashcards already in the library of {user_id}")
+                signatures = signatures[[match is None for match in matches]]
+            with self._conn:
+                self._conn.executemany(
+                    """
+                    INSERT INTO flashcards (
+                        id, user_id, document_digest, source_document, topic, question, answer,
+                        difficulty, tags, created_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (
+                            str(card.id), user_id, document_digest, card.source_document, card.topic,
+                            card.question, card.answer, card.difficulty, json.dumps(card.tags or []),
+                            card.created_at.isoformat(), card.updated_at.isoformat(),
+                        )
+                        for card in new_cards
+                    ],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO flashcard_tags (user_id, tag, seq) SELECT ?, ?, seq FROM flashcards WHERE id = ?",
+                    [(user_id, tag, str(card.id)) for card in new_cards for tag in card.tags or []],
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO card_lsh (user_id, band_key, seq) SELECT ?, ?, seq FROM flashcards WHERE id = ?",
+                    _lsh_rows([(user_id, str(card.id)) for card in new_cards], hasher, signatures),
+                )
+                if document_digest is not None:
+                    # Remembered so saving the same document again returns the whole deck
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO deck_duplicates (user_id, document_digest, position, seq) VALUES (?, ?, ?, ?)",
+                        [
+                            (user_id, document_digest, position, match)
+                            for position, match in enumerate(matches)
+                            if match is not None
+                        ],
+                    )
+            library = self._cards_by_seq(match for match in matches if match is not None)
+        # Near-duplicates are answered with the library card they duplicate, so the deck keeps its size
+        return [card if match is None else library[match] for card, match in zip(cards, matches)]
+
+    def list_cards(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        source_document: Optional[str] = None,
+        topic: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> Tuple[List[Flashcard], Optional[str]]:
+        """Return one page of a user's cards, newest first, and the cursor for the next page."""
+        columns = ", ".join(f"f.{column.strip()}" for column in _COLUMNS.split(","))
+        if tag is not None:
+            query = f"SELECT {columns} FROM flashcard_tags t JOIN flashcards f ON f.seq = t.seq WHERE t.user_id = ? AND t.tag = ?"
+            params: list = [user_id, tag]
+            seq_column = "t.seq"
+        else:
+            query = f"SELECT {columns} FROM flashcards f WHERE f.user_id = ?"
+            params = [user_id]
+            seq_column = "f.seq"
+        if source_document is not None:
+            query += " AND f.source_document = ?"
+            params.append(source_document)
+        if topic is not None:
+            query += " AND f.topic = ?"
+            params.append(topic)
+        if cursor is not None:
+            query += f" AND {seq_column} < ?"
+            params.append(decode_cursor(cursor))
+        # One extra row tells us whether there is a next page
+        query += f" ORDER BY {seq_column} DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+        return [self._to_card(row) for row in rows[:limit]], next_cursor
+
+    def search_cards(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+        source_document: Optional[str] = None,
+        topic: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[Tuple[Flashcard, float]]:
+        """The user's best matching cards with their BM25 score (higher is better)."""
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        columns = ", ".join(f"f.{column.strip()}" for column in _COLUMNS.split(","))
+        sql = (
+            f"SELECT {columns}, bm25(flashcards_fts, {', '.join(map(str, _CARD_WEIGHTS))}) AS rank "
+            "FROM flashcards_fts JOIN flashcards f ON f.seq = flashcards_fts.rowid "
+            "WHERE flashcards_fts MATCH ? AND f.user_id = ?"
+        )
+        params: list = [expression, user_id]
+        if source_document is not None:
+            sql += " AND f.source_document = ?"
+            params.append(source_document)
+        if topic is not None:
+            sql += " AND f.topic = ?"
+            params.append(topic)
+        if tag is not None:
+            sql += " AND EXISTS (SELECT 1 FROM flashcard_tags t WHERE t.user_id = f.user_id AND t.tag = ? AND t.seq = f.seq)"
+            params.append(tag)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        # bm25() is negative, lower meaning more relevant
+        return [(self._to_card(row[:-1]), -row[-1]) for row in rows]
+
+    def search_documents(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+    ) -> List[Tuple[str, Optional[str], str, float]]:
+        """Documents in the user's library whose text matches, as (digest, file name, snippet, score)."""
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT d.digest,
+                       (SELECT f.source_document FROM flashcards f
+                        WHERE f.user_id = ? AND f.document_digest = d.digest LIMIT 1),
+                       snippet(documents_fts, 0, '[', ']', '...', 16),
+                       bm25(documents_fts) AS rank
+                FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+                WHERE documents_fts MATCH ?
+                  AND EXISTS (SELECT 1 FROM flashcards f WHERE f.user_id = ? AND f.document_digest = d.digest)
+                ORDER BY rank LIMIT ?
+                """,
+                (user_id, expression, user_id, limit),
+            ).fetchall()
+        return [(digest, name, snippet, -rank) for digest, name, snippet, rank in rows]
+
+    def due_cards(
+        self, user_id: str, now: datetime, limit: int = 20, new_limit: int = 10
+    ) -> List[Tuple[Flashcard, ReviewState]]:
+        """The next cards to study: reviews that are due, most overdue first, then unseen cards.
+
+        Both parts are range scans of the ``(user_id, due_at, seq)`` index that stop after
+        ``limit`` rows, so the cost does not grow with the size of the library.
+        """
+        columns = ", ".join(f"f.{column.strip()}" for column in _COLUMNS.split(","))
+        query = f"SELECT {columns}, {_REVIEW_COLUMNS} FROM reviews r JOIN flashcards f ON f.seq = r.seq"
+        with self._lock:
+            rows = self._conn.execute(
+                f"{query} WHERE r.user_id = ? AND r.due_at <= ? ORDER BY r.due_at, r.seq LIMIT ?",
+                (user_id, as_utc(now).isoformat(), limit),
+            ).fetchall()
+            new_limit = min(new_limit, limit - len(rows))
+            if new_limit > 0:
+                rows += self._conn.execute(
+                    f"{query} WHERE r.user_id = ? AND r.due_at IS NULL ORDER BY r.seq LIMIT ?", (user_id, new_limit)
+                ).fetchall()
+        return [(self._to_card(row[:11]), self._to_review(row[11:], row[7])) for row in rows]
+
+    def record_reviews(
+        self, user_id: str, grades: Sequence[Tuple[str, int, datetime]]
+    ) -> List[Tuple[str, ReviewState]]:
+        """Apply a study session's ``(card_id, grade, reviewed_at)`` grades in one transaction.
+
+        Grades are applied in order, so a card graded twice in a session is scheduled from its
+        second review. Nothing is written if any card is not the user's.
+        """
+        card_ids = list(dict.fromkeys(card_id for card_id, _, _ in grades))
+        states: Dict[str, Tuple[int, ReviewState]] = {}
+        with self._lock:
+            for start in range(0, len(card_ids), _MAX_PARAMS):
+                batch = card_ids[start:start + _MAX_PARAMS]
+                rows = self._conn.execute(
+                    f"""
+                    SELECT f.id, f.seq, f.difficulty, {_REVIEW_COLUMNS}
+                    FROM flashcards f JOIN reviews r ON r.seq = f.seq
+                    WHERE f.user_id = ? AND f.id IN ({", ".join("?" * len(batch))})
+                    """,
+                    [user_id, *batch],
+                ).fetchall()
+                for card_id, seq, difficulty, *review in rows:
+                    states[card_id] = (seq, self._to_review(review, difficulty))
+            missing = [card_id for card_id in card_ids if card_id not in states]
+            if missing:
+                raise CardNotFoundError(missing)
+
+            results = []
+            for card_id, grade, reviewed_at in grades:
+                seq, state = states[card_id]
+                state = schedule(state, grade, reviewed_at)
+                states[card_id] = (seq, state)
+                results.append((card_id, state))
+            with self._conn:
+                self._conn.executemany(
+                    """
+                    UPDATE reviews SET ease = ?, interval_days = ?, repetitions = ?, lapses = ?,
+                        due_at = ?, last_reviewed_at = ?
+                    WHERE seq = ?
+                    """,
+                    [
+                        (
+                            state.ease, state.interval_days, state.repetitions, state.lapses,
+                            state.due_at.isoformat(), state.last_reviewed_at.isoformat(), seq,
+                        )
+                        for seq, state in states.values()
+                    ],
+                )
+        return results
+
+    def get_card(self, user_id: str, card_id: str) -> Optional[Flashcard]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM flashcards WHERE id = ? AND user_id = ?", (card_id, user_id)
+            ).fetchone()
+        return self._to_card(row) if row else None
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM flashcards WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def explain(self, query: str, params: Iterable = ()) -> List[str]:
+        """Query plan details, used to check that list queries hit an index."""
+        with self._lock:
+            return [row[-1] for row in self._conn.execute(f"EXPLAIN QUERY PLAN {query}", tuple(params))]
+
+    @staticmethod
+    def _to_card(row: tuple) -> Flashcard:
+        _, card_id, user_id, source_document, topic, question, answer, difficulty, tags, created_at, updated_at = row
+        return Flashcard(
+            id=card_id,
+            user_id=user_id,
+            source_document=source_document,
+            topic=topic,
+            question=question,
+            answer=answer,
+            difficulty=difficulty,
+            tags=json.loads(tags),
+            created_at=created_at,
+            updated_at=updated_at,
+        )
+
+    @staticmethod
+    def _to_review(row: Sequence, difficulty: Optional[int]) -> ReviewState:
+        ease, interval_days, repetitions, lapses, due_at, last_reviewed_at = row
+        return ReviewState(
+            ease=initial_ease(difficulty) if ease is None else ease,
+            interval_days=interval_days,
+            repetitions=repetitions,
+            lapses=lapses,
+            due_at=due_at,
+            last_reviewed_at=last_reviewed_at,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Optional, Tuple, Union
+
+from fastapi import HTTPException, UploadFile
+
+from ..core.config import get_settings
+from ..core.metrics import UPLOAD, stage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# PDF readers accept a header anywhere in the first kilobyte
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_SEARCH_BYTES = 1024
+
+
+class SpooledUpload:
+    """A validated PDF upload, kept in memory when small and in a temp file otherwise.
+
+    ``source`` is what extraction workers receive: the bytes themselves, or a file path so each
+    worker memory-maps the file instead of being sent a pickled copy. Where possible the path is
+    ``/proc/<pid>/fd/<fd>`` of a descriptor (``fd``) on Starlette's own spool file, so large
+    uploads are never copied a second time.
+    """
+
+    def __init__(self, filename: Optional[str], size: int, digest: str,
+                 content: Optional[bytes] = None, path: Optional[str] = None, fd: Optional[int] = None):
+        self.filename = filename
+        self.size = size
+        self.digest = digest
+        self.content = content
+        self.path = path
+        self.fd = fd
+
+    @property
+    def source(self) -> Union[bytes, str]:
+        return self.content if self.content is not None else self.path
+
+    def read_bytes(self) -> bytes:
+        if self.content is not None:
+            return self.content
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        if self.fd is not None:
+            # The spool file itself belongs to Starlette, which deletes it with the request
+            os.close(self.fd)
+            self.fd = None
+            self.path = None
+        elif self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the maximum size of {settings.MAX_FILE_SIZE // (1024 * 1024)}MB",
+    )
+
+
+async def spool_upload(
+    file: UploadFile,
+    max_size: int = settings.MAX_FILE_SIZE,
+    max_memory: int = settings.UPLOAD_SPOOL_MAX_MEMORY,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+) -> SpooledUpload:
+    """Read an upload chunk by chunk, rejecting it as soon as it is too large or not a PDF.
+
+    The SHA-256 digest used for cache keys is computed on the way through, so the content is
+    never hashed a second time, and large uploads are handed to extraction in Starlette's own
+    spool file rather than copied.
+    """
+    if file.content_type not in settings.ALLOWED_FILE_TYPES:
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    with stage(UPLOAD):
+        return await _spool(file, max_size, max_memory, chunk_size)
+
+
+def _share_spooled_file(file: UploadFile) -> Optional[Tuple[int, str]]:
+    """A descriptor on Starlette's spool file and a path other processes can open it by.
+
+    None when the upload is not backed by a ``SpooledTemporaryFile`` or the platform has no
+    ``/proc/<pid>/fd``. The duplicated descriptor keeps the (already unlinked) file alive after
+    Starlette closes the upload, e.g. while a streaming response is still extracting it.
+    """
+    spooled = file.file
+    proc_fds = f"/proc/{os.getpid()}/fd"
+    if not hasattr(spooled, "rollover") or not os.path.isdir(proc_fds):
+        return None
+    # A no-op once Starlette has rolled the upload over to disk
+    spooled.rollover()
+    spooled.flush()
+    fd = os.dup(spooled.fileno())
+    return fd, f"{proc_fds}/{fd}"
+
+
+async def _copy_to_temp_file(file: UploadFile, chunk_size: int) -> str:
+    """Copy an upload that cannot be shared in place into a named temp file."""
+    await file.seek(0)
+    spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False)
+    try:
+        with spool:
+            while chunk := await file.read(chunk_size):
+                spool.write(chunk)
+    except BaseException:
+        os.unlink(spool.name)
+        raise
+    return spool.name
+
+
+async def _spool(file: UploadFile, max_size: int, max_memory: int, chunk_size: int) -> SpooledUpload:
+    """Hash and validate the upload in place, keeping a copy only of uploads small enough for memory."""
+    digest = hashlib.sha256()
+    head = b""
+    buffer: Optional[bytearray] = bytearray()
+    size = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size:
+            raise _too_large()
+        if len(head) < PDF_MAGIC_SEARCH_BYTES:
+            head += chunk[:PDF_MAGIC_SEARCH_BYTES - len(head)]
+            if len(head) >= PDF_MAGIC_SEARCH_BYTES and PDF_MAGIC not in head:
+                raise HTTPException(status_code=400, detail="File is not a valid PDF")
+        digest.update(chunk)
+        if buffer is not None:
+            if len(buffer) + len(chunk) <= max_memory:
+                buffer += chunk
+            else:
+                buffer = None
+
+    if PDF_MAGIC not in head:
+        raise HTTPException(status_code=400, detail="File is not a valid PDF")
+
+    if buffer is not None:
+        return SpooledUpload(file.filename, size, digest.hexdigest(), content=bytes(buffer))
+    shared = _share_spooled_file(file)
+    if shared is not None:
+        fd, path = shared
+        logger.info(f"Sharing {size} byte upload with extraction workers as {path}")
+        return SpooledUpload(file.filename, size, digest.hexdigest(), path=path, fd=fd)
+    path = await _copy_to_temp_file(file, chunk_size)
+    logger.info(f"Spooled {size} byte upload to {path}")
+    return SpooledUpload(file.filename, size, digest.hexdigest(), path=path)
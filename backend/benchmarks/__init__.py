@@ -0,0 +1,3 @@
+"""
+Performance benchmarks; run with ``python -m benchmarks.run`` from the backend directory
+"""
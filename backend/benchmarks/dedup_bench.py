@@ -0,0 +1,103 @@
+"""
+Benchmark for near-duplicate flashcard detection.
+
+Generates a synthetic deck in which a share of the cards are paraphrases of earlier ones ("What
+is X?" / "Define X."), then times the MinHash/LSH pass over the whole deck against exact pairwise
+Jaccard comparison on a sample, and scores the clusters against the known duplicates:
+
+    python -m benchmarks.dedup_bench --cards 20000 --duplicate-rate 0.2 --output dedup.json
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+from typing import List, Set, Tuple
+
+from app.services.dedup import MinHasher, card_text, near_duplicate_clusters, shingles
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+QUESTIONS = ["What is {}?", "Define {}.", "Explain {}.", "What does {} mean?", "Describe {}."]
+
+
+def build_deck(cards: int, duplicate_rate: float, seed: int) -> Tuple[List[str], List[int]]:
+    """Card texts and, for each card, the index of the original it paraphrases (itself if none)."""
+    rng = random.Random(seed)
+    texts: List[str] = []
+    originals: List[int] = []
+    concepts: List[Tuple[int, str, List[str]]] = []
+    for index in range(cards):
+        if concepts and rng.random() < duplicate_rate:
+            original, term, answer = rng.choice(concepts)
+            # Reword the question and swap one answer word for another
+            answer = list(answer)
+            answer[rng.randrange(len(answer))] = rng.choice(VOCABULARY)
+        else:
+            original, term, answer = index, f"concept{index}", rng.sample(VOCABULARY, 12)
+            concepts.append((original, term, answer))
+        originals.append(original)
+        texts.append(card_text(rng.choice(QUESTIONS).format(term), " ".join(answer)))
+    return texts, originals
+
+
+def pair_set(labels: List[int]) -> Set[Tuple[int, int]]:
+    groups = {}
+    for index, label in enumerate(labels):
+        groups.setdefault(label, []).append(index)
+    return {pair for members in groups.values() for pair in itertools.combinations(members, 2)}
+
+
+def pairwise_seconds(texts: List[str], threshold: float) -> float:
+    """Exact Jaccard over every pair, the quadratic baseline."""
+    word_sets = [set(shingles(text)) for text in texts]
+    started = time.perf_counter()
+    sum(
+        1
+        for left, right in itertools.combinations(word_sets, 2)
+        if left and right and len(left & right) / len(left | right) >= threshold
+    )
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=20000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--num-perm", type=int, default=64)
+    parser.add_argument("--bands", type=int, default=16)
+    parser.add_argument("--pairwise-sample", type=int, default=2000, help="Cards compared pairwise for the baseline")
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    texts, truth = build_deck(args.cards, args.duplicate_rate, args.seed)
+    hasher = MinHasher(args.num_perm, args.bands)
+    started = time.perf_counter()
+    labels = near_duplicate_clusters(texts, args.threshold, hasher)
+    lsh_seconds = time.perf_counter() - started
+
+    expected, found = pair_set(truth), pair_set(labels)
+    sample = min(args.pairwise_sample, args.cards)
+    sample_seconds = pairwise_seconds(texts[:sample], args.threshold)
+    report = {
+        "cards": args.cards,
+        "duplicates": args.cards - len(set(truth)),
+        "clusters": len(set(labels)),
+        "lsh_seconds": round(lsh_seconds, 3),
+        "lsh_cards_per_second": round(args.cards / lsh_seconds),
+        "pairwise_sample_cards": sample,
+        "pairwise_sample_seconds": round(sample_seconds, 3),
+        # Pairwise work grows with the square of the deck
+        "pairwise_projected_seconds": round(sample_seconds * (args.cards / sample) ** 2, 1),
+        "pair_precision": round(len(expected & found) / len(found), 4) if found else None,
+        "pair_recall": round(len(expected & found) / len(expected), 4) if expected else None,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark for the PDF extraction engines.
+
+Builds a synthetic corpus in which some pages are image-only scans, then runs every installed
+engine in-process with and without the text-layer probe, reporting speed and fidelity (word
+overlap with the text each page was drawn with):
+
+    python -m benchmarks.extraction --pages 60 --scanned-every 4 --output extraction.json
+"""
+import argparse
+import json
+import re
+import time
+from collections import Counter
+from typing import List
+
+from app.services.extractors import ENGINES, PdfEngine
+
+from .run import percentile
+from .synthetic_pdf import SyntheticDocument, build_synthetic_document
+
+_WORD = re.compile(r"\w+")
+
+
+def word_f1(expected: str, actual: str) -> float:
+    """F1 of the word multisets of two texts; 1.0 when both are empty."""
+    expected_words = Counter(word.lower() for word in _WORD.findall(expected))
+    actual_words = Counter(word.lower() for word in _WORD.findall(actual))
+    if not expected_words and not actual_words:
+        return 1.0
+    overlap = sum((expected_words & actual_words).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(actual_words.values())
+    recall = overlap / sum(expected_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def extract(engine: PdfEngine, pdf: bytes, probe: bool) -> List[str]:
+    document = engine.open(pdf)
+    texts = []
+    for index in range(engine.page_count(document)):
+        if probe and not engine.has_text_layer(document, index):
+            texts.append("")
+        else:
+            texts.append(engine.extract_page(document, index))
+    return texts
+
+
+def bench_engine(engine: PdfEngine, corpus: SyntheticDocument, probe: bool, repeat: int) -> dict:
+    timings = []
+    texts: List[str] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        texts = extract(engine, corpus.pdf, probe)
+        timings.append(time.perf_counter() - started)
+    scores = [word_f1(expected, actual) for expected, actual in zip(corpus.page_texts, texts)]
+    text_pages = [score for score, expected in zip(scores, corpus.page_texts) if expected]
+    best = min(timings)
+    return {
+        "best_seconds": round(best, 4),
+        "median_seconds": round(percentile(timings, 50), 4),
+        "pages_per_second": round(len(texts) / best, 1) if best else None,
+        "mean_word_f1": round(sum(text_pages) / len(text_pages), 4) if text_pages else None,
+        "min_word_f1": round(min(text_pages), 4) if text_pages else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES))
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--scanned-every", type=int, default=4, help="Every n-th page is image-only; 0 for none")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    corpus = build_synthetic_document(args.pages, args.words_per_page, args.seed, scanned_every=args.scanned_every)
+    report: dict = {
+        "pages": args.pages,
+        "scanned_pages": sum(1 for text in corpus.page_texts if not text),
+        "bytes": len(corpus.pdf),
+        "engines": {},
+    }
+    for name in args.engines:
+        engine = ENGINES[name]
+        if not engine.available():
+            report["engines"][name] = {"skipped": f"{engine.requirement} is not installed"}
+            print(f"{name}: skipped, {engine.requirement} is not installed")
+            continue
+        report["engines"][name] = {
+            mode: bench_engine(engine, corpus, probe, args.repeat)
+            for mode, probe in (("probe", True), ("no_probe", False))
+        }
+        print(f"{name}: {json.dumps(report['engines'][name])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the OpenAI and Groq chat completion APIs.
+
+Latency, generation speed and error rates are injectable so benchmarks measure our pipeline
+rather than a remote provider:
+
+    python -m benchmarks.mock_llm --port 9100 --latency-ms 300 --tokens-per-second 400 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.chunking import estimate_tokens
+
+_SENTENCE = re.compile(r"[A-Z][^.!?]{20,200}[.!?]")
+_STREAM_PIECE_CHARS = 24
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 200.0  # Time to first token
+    tokens_per_second: float = 500.0  # Completion generation speed
+    error_rate: float = 0.0  # Fraction of requests answered with a 500
+    rate_limit_rate: float = 0.0  # Fraction of requests answered with a 429
+    cards_per_request: int = 5
+    seed: int = 0
+
+
+def _flashcards(prompt: str, count: int) -> str:
+    sentences = _SENTENCE.findall(prompt) or ["The document contains text."]
+    cards = [
+        {"question": f"What does the text say about {sentence.split()[1].lower()}?", "answer": sentence}
+        for sentence in sentences[:count]
+    ]
+    return json.dumps(cards)
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock LLM")
+    rng = random.Random(config.seed)
+    app.state.requests = 0
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        roll = rng.random()
+        if roll < config.error_rate:
+            return JSONResponse(status_code=500, content={"error": {"message": "injected failure", "type": "server_error"}})
+        if roll < config.error_rate + config.rate_limit_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "injected rate limit", "type": "rate_limit_exceeded"}},
+                headers={"retry-after": "1"},
+            )
+
+        messages = body.get("messages") or [{}]
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        content = _flashcards(str(messages[-1].get("content", "")), config.cards_per_request)
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+            "total_tokens": estimate_tokens(prompt) + estimate_tokens(content),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock")
+        seconds_per_char = 1 / (config.tokens_per_second * 4) if config.tokens_per_second else 0.0
+        await asyncio.sleep(config.latency_ms / 1000)
+
+        if body.get("stream"):
+            async def events() -> AsyncIterator[str]:
+                for start in range(0, len(content), _STREAM_PIECE_CHARS):
+                    piece = content[start:start + _STREAM_PIECE_CHARS]
+                    await asyncio.sleep(len(piece) * seconds_per_char)
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(len(content) * seconds_per_char)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    # OpenAI clients call /v1/...; Groq clients call /openai/v1/...
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests}
+
+    return app
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=MockConfig.latency_ms)
+    parser.add_argument("--tokens-per-second", type=float, default=MockConfig.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=MockConfig.rate_limit_rate)
+    parser.add_argument("--cards-per-request", type=int, default=MockConfig.cards_per_request)
+    parser.add_argument("--seed", type=int, default=MockConfig.seed)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        cards_per_request=args.cards_per_request,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+End-to-end benchmark for the flashcard backends.
+
+Starts the mock LLM server and each backend under uvicorn, uploads synthetic PDFs with bounded
+concurrency, and writes a JSON report (latency percentiles, throughput, peak RSS, extraction
+speed) tagged with the current commit:
+
+    python -m benchmarks.run --pages 40 --requests 30 --concurrency 6 --output bench.json
+    python -m benchmarks.run --baseline bench.json  # exit 1 on regressions
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from .synthetic_pdf import build_synthetic_pdf
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# uvicorn target, upload path and multipart field name for each backend
+TARGETS = {
+    "app": ("app.main:app", "/api/v1/flashcards/generate", "file"),
+    "legacy": ("main:app", "/api/generate-flashcards", "pdf_file"),
+}
+
+# Metrics where a higher value is worse, used by --baseline
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+HIGHER_IS_BETTER = ("requests_per_second",)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start(args: List[str], env: Dict[str, str], ready_url: str, quiet: bool, timeout: float = 30.0) -> subprocess.Popen:
+    output = subprocess.DEVNULL if quiet else None
+    process = subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(args)} exited with code {process.returncode}")
+        try:
+            httpx.get(ready_url, timeout=1.0)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{' '.join(args)} did not start within {timeout}s")
+
+
+def _stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def _peak_rss_mb(pid: int) -> Optional[float]:
+    """High-water RSS of a process from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile; ``q`` in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _server_timing(header: str) -> Dict[str, float]:
+    timings = {}
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, _, duration = entry.partition(";dur=")
+        try:
+            timings[name] = float(duration)
+        except ValueError:
+            continue
+    return timings
+
+
+async def _load(url: str, field: str, pdfs: List[bytes], concurrency: int, timeout: float) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    stage_totals: Dict[str, float] = {}
+
+    async def upload(client: httpx.AsyncClient, index: int, pdf: bytes) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, files={field: (f"bench-{index}.pdf", pdf, "application/pdf")})
+                status = str(response.status_code)
+                for name, duration in _server_timing(response.headers.get("Server-Timing", "")).items():
+                    stage_totals[name] = stage_totals.get(name, 0.0) + duration
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "200":
+                latencies.append(elapsed)
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(upload(client, index, pdf) for index, pdf in enumerate(pdfs)))
+        wall = time.perf_counter() - started
+
+    return {
+        "requests": len(pdfs),
+        "succeeded": len(latencies),
+        "statuses": statuses,
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 3) if wall else None,
+        # Mean Server-Timing per request; concurrent chunks are summed, so stages can exceed latency
+        "mean_stage_ms": {name: round(total / len(pdfs), 1) for name, total in stage_totals.items()},
+        **{
+            f"p{q}_ms": round(value * 1000, 1) if value is not None else None
+            for q, value in ((50, percentile(latencies, 50)), (95, percentile(latencies, 95)), (99, percentile(latencies, 99)))
+        },
+    }
+
+
+def bench_target(name: str, pdfs: List[bytes], env: Dict[str, str], concurrency: int, timeout: float, quiet: bool) -> dict:
+    app_path, upload_path, field = TARGETS[name]
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = _start(
+        ["-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning"],
+        env,
+        f"{base}/docs",
+        quiet,
+    )
+    try:
+        result = asyncio.run(_load(base + upload_path, field, pdfs, concurrency, timeout))
+        result["peak_rss_mb"] = _peak_rss_mb(server.pid)
+        worker_rss = [_peak_rss_mb(pid) for pid in _child_pids(server.pid)]
+        result["worker_peak_rss_mb"] = round(sum(rss for rss in worker_rss if rss), 1) or None
+    finally:
+        _stop(server)
+    return result
+
+
+def bench_extraction(pdf: bytes, repeats: int) -> dict:
+    """Time in-process page extraction through the shared worker pool."""
+    from app.services.pdf_extraction import iter_pages, shutdown_extraction_executor
+
+    async def extract() -> int:
+        return sum([1 async for _ in iter_pages(pdf)])
+
+    timings = []
+    pages = 0
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            pages = asyncio.run(extract())
+            timings.append(time.perf_counter() - started)
+    finally:
+        shutdown_extraction_executor()
+    best = min(timings)
+    return {
+        "pages": pages,
+        "bytes": len(pdf),
+        "best_seconds": round(best, 4),
+        "median_seconds": round(percentile(timings, 50), 4),
+        "pages_per_second": round(pages / best, 1) if best else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> List[str]:
+    """Return a description of every metric that got worse than ``baseline`` by more than ``max_regression``."""
+    regressions = []
+    for name, result in report["targets"].items():
+        previous = baseline.get("targets", {}).get(name)
+        if not previous:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old if metric in LOWER_IS_BETTER else (old - new) / old
+            if change > max_regression:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=sorted(TARGETS))
+    parser.add_argument("--pages", type=int, default=20, help="pages per synthetic PDF")
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--requests", type=int, default=20, help="uploads per target (each a distinct PDF)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--extraction-pages", type=int, default=200)
+    parser.add_argument("--extraction-repeats", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    parser.add_argument("--verbose", action="store_true", help="show server logs")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": vars(args),
+        "extraction": bench_extraction(
+            build_synthetic_pdf(args.extraction_pages, args.words_per_page, seed=-1), args.extraction_repeats
+        ),
+        "targets": {},
+    }
+    print(f"extraction: {report['extraction']}")
+
+    mock_port = _free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "benchmark",
+            "GROQ_API_KEY": "benchmark",
+            "OPENAI_BASE_URL": f"{mock_url}/v1",
+            "GROQ_BASE_URL": mock_url,
+            "CACHE_DB_PATH": os.path.join(data_dir, "cache.sqlite3"),
+            "CHUNK_CACHE_DB_PATH": os.path.join(data_dir, "chunk_cache.sqlite3"),
+            "FLASHCARD_DB_PATH": os.path.join(data_dir, "flashcards.sqlite3"),
+            # Measure the pipeline, not our own upstream budget
+            "OPENAI_REQUESTS_PER_MINUTE": "1000000",
+            "OPENAI_TOKENS_PER_MINUTE": "1000000000",
+            "GROQ_REQUESTS_PER_MINUTE": "1000000",
+            "GROQ_TOKENS_PER_MINUTE": "1000000000",
+        }
+        mock = _start(
+            [
+                "-m", "benchmarks.mock_llm",
+                "--port", str(mock_port),
+                "--latency-ms", str(args.latency_ms),
+                "--tokens-per-second", str(args.tokens_per_second),
+                "--error-rate", str(args.error_rate),
+                "--rate-limit-rate", str(args.rate_limit_rate),
+            ],
+            env,
+            f"{mock_url}/stats",
+            not args.verbose,
+        )
+        try:
+            for offset, name in enumerate(args.targets):
+                # Distinct documents per target so no run is served from another's cache
+                pdfs = [
+                    build_synthetic_pdf(args.pages, args.words_per_page, seed=offset * args.requests + i)
+                    for i in range(args.requests)
+                ]
+                report["targets"][name] = bench_target(name, pdfs, env, args.concurrency, args.timeout, not args.verbose)
+                print(f"{name}: {report['targets'][name]}")
+            report["mock_llm_requests"] = httpx.get(f"{mock_url}/stats").json()["requests"]
+        finally:
+            _stop(mock)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
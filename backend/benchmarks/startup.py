@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark for the API workers.
+
+Imports each backend in fresh interpreters under ``python -X importtime`` and reports the median
+import time, the slowest modules and any heavy SDK that was loaded eagerly; then starts each
+backend under uvicorn and times how long it takes to answer its health check:
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+    python -m benchmarks.startup --max-import-ms 900  # exit 1 if a backend imports slower
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from .run import BACKEND_DIR, _free_port, _start, _stop
+
+# uvicorn target and health check path for each backend
+TARGETS = {
+    "app": ("app.main:app", "/health"),
+    "legacy": ("main:app", "/api/health"),
+}
+
+# Loaded on first use; seeing one of these at import time is a regression
+DEFERRED_MODULES = ("openai", "groq", "httpx", "PyPDF2", "numpy")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """Self and cumulative microseconds per module from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return modules
+
+
+def measure_import(module: str, env: Dict[str, str]) -> Dict[str, Dict[str, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def bench_import(module: str, env: Dict[str, str], repeat: int, top: int) -> dict:
+    runs = [measure_import(module, env) for _ in range(repeat)]
+    totals = [run[module]["cumulative_us"] / 1000 for run in runs]
+    # Slowest modules of the median run, by self time
+    median_run = sorted(runs, key=lambda run: run[module]["cumulative_us"])[len(runs) // 2]
+    slowest = sorted(median_run.items(), key=lambda item: item[1]["self_us"], reverse=True)[:top]
+    return {
+        "import_ms": round(statistics.median(totals), 1),
+        "import_ms_min": round(min(totals), 1),
+        "eager_heavy_modules": sorted(name for name in DEFERRED_MODULES if name in median_run),
+        "slowest_modules": {name: round(times["self_us"] / 1000, 1) for name, times in slowest},
+    }
+
+
+def bench_ready(target: str, health_path: str, env: Dict[str, str], repeat: int) -> Optional[float]:
+    """Median seconds from spawning uvicorn until the health check answers."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        port = _free_port()
+        started = time.perf_counter()
+        process = _start(
+            ["-m", "uvicorn", target, "--port", str(port), "--log-level", "warning"],
+            env,
+            f"http://127.0.0.1:{port}{health_path}",
+            quiet=True,
+        )
+        samples.append(time.perf_counter() - started)
+        _stop(process)
+    return round(statistics.median(samples) * 1000, 1) if samples else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=sorted(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument("--skip-ready", action="store_true", help="Only measure imports")
+    parser.add_argument("--max-import-ms", type=float, help="Exit 1 if any backend's median import is slower")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report: dict = {"python": sys.version.split()[0], "targets": {}}
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "benchmark",
+            "GROQ_API_KEY": "benchmark",
+            "CACHE_DB_PATH": os.path.join(data_dir, "cache.sqlite3"),
+            "CHUNK_CACHE_DB_PATH": os.path.join(data_dir, "chunk_cache.sqlite3"),
+            "FLASHCARD_DB_PATH": os.path.join(data_dir, "flashcards.sqlite3"),
+        }
+        for name in args.targets:
+            target, health_path = TARGETS[name]
+            result = bench_import(target.split(":")[0], env, args.repeat, args.top)
+            if not args.skip_ready:
+                result["ready_ms"] = bench_ready(target, health_path, env, args.repeat)
+            report["targets"][name] = result
+            print(f"{name}: {json.dumps(result)}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = [
+        f"{name}: {', '.join(result['eager_heavy_modules'])} loaded at import"
+        for name, result in report["targets"].items()
+        if result["eager_heavy_modules"]
+    ]
+    if args.max_import_ms is not None:
+        failures += [
+            f"{name}: import took {result['import_ms']}ms (limit {args.max_import_ms}ms)"
+            for name, result in report["targets"].items()
+            if result["import_ms"] > args.max_import_ms
+        ]
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark for the flashcard library queries.
+
+Fills a temporary store with synthetic decks and times first-page and deep-page listings, with
+and without filters, comparing keyset pagination with the equivalent OFFSET query, and full-text
+search for common and rare words:
+
+    python -m benchmarks.store_bench --cards 50000 --output store-bench.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from app.models.flashcard import Flashcard
+from app.services.store import FlashcardStore, encode_cursor
+
+from .run import percentile
+
+TOPICS = ["cells", "genetics", "atoms", "bonds", "optics", "forces", "markets", "empires"]
+TAGS = ["exam", "review", "hard", "definitions", "formulas"]
+USER = "bench-user"
+# Rare words appear in about one card in a thousand
+RARE_WORDS = [f"term{i}" for i in range(1000)]
+
+
+def fill(store: FlashcardStore, cards: int, deck_size: int, seed: int) -> float:
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for deck in range(0, cards, deck_size):
+        topic = rng.choice(TOPICS)
+        store.save_deck(
+            USER,
+            [
+                Flashcard(
+                    question=f"Question {deck + i} about {topic}?",
+                    answer=f"Answer {deck + i} mentions {rng.choice(RARE_WORDS)}",
+                    topic=topic,
+                    tags=rng.sample(TAGS, 2),
+                )
+                for i in range(min(deck_size, cards - deck))
+            ],
+            document_digest=f"digest-{deck}",
+            source_document=f"document-{deck // deck_size}.pdf",
+        )
+    return time.perf_counter() - started
+
+
+def timed(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {"p50_ms": round(percentile(samples, 50), 3), "p95_ms": round(percentile(samples, 95), 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=50000)
+    parser.add_argument("--deck-size", type=int, default=40)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = FlashcardStore(os.path.join(directory, "bench.sqlite3"))
+        insert_seconds = fill(store, args.cards, args.deck_size, args.seed)
+        # Cursor pointing roughly 90% of the way into the library
+        deep_offset = int(args.cards * 0.9)
+        deep_cursor = encode_cursor(args.cards - deep_offset)
+        limit = args.page_size
+
+        def offset_page():
+            with store._lock:
+                store._conn.execute(
+                    "SELECT * FROM flashcards WHERE user_id = ? ORDER BY seq DESC LIMIT ? OFFSET ?",
+                    (USER, limit, deep_offset),
+                ).fetchall()
+
+        report = {
+            "cards": args.cards,
+            "page_size": limit,
+            "insert_cards_per_second": round(args.cards / insert_seconds),
+            "queries": {
+                "first_page": timed(lambda: store.list_cards(USER, limit=limit), args.repeat),
+                "deep_page_keyset": timed(lambda: store.list_cards(USER, limit=limit, cursor=deep_cursor), args.repeat),
+                "deep_page_offset": timed(offset_page, args.repeat),
+                "topic_first_page": timed(lambda: store.list_cards(USER, limit=limit, topic="atoms"), args.repeat),
+                "topic_deep_page": timed(
+                    lambda: store.list_cards(USER, limit=limit, topic="atoms", cursor=deep_cursor), args.repeat
+                ),
+                "tag_first_page": timed(lambda: store.list_cards(USER, limit=limit, tag="exam"), args.repeat),
+                "document_page": timed(
+                    lambda: store.list_cards(USER, limit=limit, source_document="document-3.pdf"), args.repeat
+                ),
+                "search_common_word": timed(lambda: store.search_cards(USER, "atoms", limit=20), args.repeat),
+                "search_rare_word": timed(lambda: store.search_cards(USER, "term42", limit=20), args.repeat),
+                "search_with_tag": timed(lambda: store.search_cards(USER, "term42", limit=20, tag="exam"), args.repeat),
+            },
+        }
+        store.close()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Deterministic synthetic PDFs for benchmarks
+"""
+import random
+from dataclasses import dataclass
+from typing import List
+
+_VOCABULARY = (
+    "cell membrane protein enzyme energy molecule reaction gradient transport signal receptor "
+    "structure function process system pathway regulation synthesis binding transfer balance "
+    "theory model equation variable measure result evidence method analysis sample pattern "
+    "history economy market policy culture language network memory storage pressure"
+).split()
+
+LINES_PER_PAGE = 48
+WORDS_PER_LINE = 12
+# Vector strokes drawn over each scanned page, standing in for the content a real scan carries
+SCAN_STROKES = 4000
+SCAN_IMAGE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class SyntheticDocument:
+    pdf: bytes
+    # Text each page was drawn with; empty for scanned (image-only) pages
+    page_texts: List[str]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _paragraphs(rng: random.Random, words: int) -> List[str]:
+    lines: List[str] = []
+    while words > 0:
+        sentence_words = [rng.choice(_VOCABULARY) for _ in range(min(words, rng.randint(8, 20)))]
+        words -= len(sentence_words)
+        sentence = " ".join(sentence_words).capitalize() + "."
+        # Hard-wrap like a real text layer does
+        tokens = sentence.split()
+        for start in range(0, len(tokens), WORDS_PER_LINE):
+            lines.append(" ".join(tokens[start:start + WORDS_PER_LINE]))
+        if rng.random() < 0.25:
+            lines.append("")
+    return lines
+
+
+def build_synthetic_pdf(pages: int, words_per_page: int = 350, seed: int = 0, title: str = "Benchmark Course") -> bytes:
+    """Build a PDF of ``pages`` pages with random prose, a running header and a page-number footer."""
+    return build_synthetic_document(pages, words_per_page, seed, title).pdf
+
+
+def _scanned_page_stream(rng: random.Random) -> bytes:
+    strokes = " ".join(
+        f"{rng.randint(0, 612)} {rng.randint(0, 792)} m {rng.randint(0, 612)} {rng.randint(0, 792)} l S"
+        for _ in range(SCAN_STROKES)
+    )
+    return f"q 612 0 0 792 0 0 cm /Im1 Do Q 0.2 w {strokes}".encode("latin-1")
+
+
+def build_synthetic_document(
+    pages: int,
+    words_per_page: int = 350,
+    seed: int = 0,
+    title: str = "Benchmark Course",
+    scanned_every: int = 0,
+) -> SyntheticDocument:
+    """Like ``build_synthetic_pdf``, also returning each page's text.
+
+    With ``scanned_every=n`` every n-th page is an image-only "scan" with no text layer.
+    """
+    rng = random.Random(seed)
+    scan_rng = random.Random(f"scan-{seed}")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages object, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    image_id = None
+    page_ids = []
+    page_texts = []
+    for page_number in range(1, pages + 1):
+        if scanned_every and page_number % scanned_every == 0:
+            if image_id is None:
+                pixels = bytes(scan_rng.randrange(256) for _ in range(SCAN_IMAGE_SIZE * SCAN_IMAGE_SIZE))
+                objects.append(
+                    b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                    b"/BitsPerComponent 8 /Length %d >>\nstream\n%s\nendstream"
+                    % (SCAN_IMAGE_SIZE, SCAN_IMAGE_SIZE, len(pixels), pixels)
+                )
+                image_id = len(objects)
+            stream = _scanned_page_stream(scan_rng)
+            resources = b"<< /XObject << /Im1 %d 0 R >> >>" % image_id
+            page_texts.append("")
+        else:
+            lines = [title, ""] + _paragraphs(rng, words_per_page)[:LINES_PER_PAGE] + ["", f"Page {page_number} of {pages}"]
+            body = " ".join(f"({_escape(line)}) Tj T*" for line in lines)
+            stream = ("BT /F1 9 Tf 12 TL 54 760 Td " + body + " ET").encode("latin-1")
+            resources = b"<< /Font << /F1 3 0 R >> >>"
+            page_texts.append("\n".join(line for line in lines if line))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources %s /Contents %d 0 R >>" % (resources, content_id)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return SyntheticDocument(bytes(output), page_texts)
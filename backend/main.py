@@ -1,14 +1,26 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
-import PyPDF2
-import groq
+from functools import lru_cache
+from typing import TYPE_CHECKING, List
 import os
 from dotenv import load_dotenv
-import io
-import json
 import logging
+import asyncio
+import time
+from app.core.config import get_settings
+from app.core.metrics import LLM, LLM_ERRORS, PARSE, UPSTREAM_QUEUE, VALIDATION, record_stage, record_usage, render_metrics, stage
+from app.core.middleware import MULTIPART_OVERHEAD, MaxBodySizeMiddleware, ServerTimingMiddleware
+from app.services.cache import FlashcardCache, make_cache_key_from_digest
+from app.services.chunking import TextChunk, chunk_text
+from app.services.compaction import PageCompactor
+from app.services.json_stream import parse_flashcards
+from app.services.pdf_extraction import PdfSource, iter_pages, shutdown_extraction_executor
+from app.services.uploads import spool_upload
+
+if TYPE_CHECKING:
+    import groq
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,9 +28,14 @@ logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
+settings = get_settings()
 
 app = FastAPI()
 
+# Refuse oversized uploads before they are spooled or parsed
+app.add_middleware(MaxBodySizeMiddleware, max_body_size=settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+app.add_middleware(ServerTimingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -26,48 +43,70 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-# Initialize Groq client
+# The Groq client (and SDK) is created on first use so workers become ready quickly
 groq_api_key = os.getenv("GROQ_API_KEY")
 if not groq_api_key:
     logger.error("GROQ_API_KEY not found in environment variables")
-    raise ValueError("GROQ_API_KEY not found in environment variables")
-client = groq.Groq(api_key=groq_api_key)
+
+@lru_cache(maxsize=None)
+def get_client() -> "groq.AsyncGroq":
+    if not groq_api_key:
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+    import groq
+
+    return groq.AsyncGroq(api_key=groq_api_key)
+
+GROQ_MODEL = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.7
+MAX_TOKENS = 32768  # Maximum completion tokens for this model
+# Bump whenever the generation prompt changes so cached decks are not reused
+PROMPT_VERSION = "1"
+CHUNK_TOKEN_BUDGET = 6000  # Estimated prompt tokens of document text per Groq call
+
+# Bounds concurrent Groq calls across all requests on this worker
+llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+
+flashcard_cache = FlashcardCache()
 
 class Flashcard(BaseModel):
     question: str
     answer: str
 
-def extract_text_from_pdf(file_content: bytes) -> str:
+async def extract_text_from_pdf(file_content: PdfSource) -> str:
     try:
         logger.info("Starting PDF text extraction")
-        # Create a BytesIO object from the file content
-        pdf_file = io.BytesIO(file_content)
+        # Consume pages as the extraction worker pool produces them
+        page_texts = []
+        page_count = 0
+        pages = iter_pages(file_content)
+        if settings.PROMPT_COMPACTION:
+            # Repeated headers/footers and duplicate paragraphs never reach the prompt
+            pages = PageCompactor().compact(pages)
+        async for page in pages:
+            page_count += 1
+            if page.char_count:
+                page_texts.append(page.text)
+        text = "\n".join(page_texts)
         
-        # Read the PDF file
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        # Extract text from all pages
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        logger.info(f"Successfully extracted {len(text)} characters from PDF")
+        logger.info(f"Successfully extracted {len(text)} characters from {page_count} PDF pages")
         return text
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Error processing PDF: {str(e)}")
 
-def generate_flashcards(text: str) -> List[Flashcard]:
-    try:
-        logger.info("Starting flashcard generation")
+async def generate_chunk_flashcards(chunk: TextChunk) -> List[Flashcard]:
+    queued_at = time.perf_counter()
+    async with llm_semaphore:
+        record_stage(UPSTREAM_QUEUE, time.perf_counter() - queued_at)
         # Create a prompt for the AI
         prompt = f"""Create flashcards from the following text. Format each flashcard as JSON with 'question' and 'answer' fields. 
         Create concise, clear questions and answers that capture the key concepts.
         
         Text:
-        {text}
+        {chunk.text}
         
         Format the response as a JSON array of objects, each with 'question' and 'answer' fields.
         Example format:
@@ -78,34 +117,46 @@ def generate_flashcards(text: str) -> List[Flashcard]:
         """
         
         # Generate flashcards using Groq
-        logger.info("Sending request to Groq API")
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that creates educational flashcards. Always respond with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=32768  # Maximum completion tokens for this model
-        )
+        logger.info(f"Sending chunk {chunk.index} to Groq API")
+        try:
+            with stage(LLM):
+                completion = await get_client().chat.completions.create(
+                    model=GROQ_MODEL,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that creates educational flashcards. Always respond with valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=TEMPERATURE,
+                    max_tokens=MAX_TOKENS
+                )
+        except Exception:
+            LLM_ERRORS.labels(provider="groq").inc()
+            raise
+        record_usage("groq", completion.usage)
         
         # Parse the response and create Flashcard objects
         response_text = completion.choices[0].message.content
         logger.info(f"Received response from Groq API: {response_text[:100]}...")
         
-        # Clean the response text to ensure it's valid JSON
-        response_text = response_text.strip()
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        
-        # Parse the JSON response
+        # Parse the JSON response, keeping every complete card even if the output is truncated
         logger.info("Parsing JSON response")
-        flashcards_data = json.loads(response_text)
+        with stage(PARSE):
+            result = parse_flashcards(response_text)
         
         # Convert to Flashcard objects
-        flashcards = [Flashcard(**card) for card in flashcards_data]
+        with stage(VALIDATION):
+            return [Flashcard(**card) for card in result.cards]
+
+async def generate_flashcards(text: str) -> List[Flashcard]:
+    try:
+        logger.info("Starting flashcard generation")
+        # Split the document so each Groq call stays within the context window
+        chunks = chunk_text(text, CHUNK_TOKEN_BUDGET)
+        logger.info(f"Generating flashcards for {len(chunks)} chunks concurrently")
+        results = await asyncio.gather(*(generate_chunk_flashcards(chunk) for chunk in chunks))
+
+        # Merge per-chunk cards in document order
+        flashcards = [card for cards in results for card in cards]
         logger.info(f"Successfully generated {len(flashcards)} flashcards")
         return flashcards
         
@@ -115,22 +166,53 @@ def generate_flashcards(text: str) -> List[Flashcard]:
 
 @app.post("/api/generate-flashcards", response_model=List[Flashcard])
 async def create_flashcards(pdf_file: UploadFile = File(...)):
+    upload = None
     try:
         logger.info(f"Received PDF file: {pdf_file.filename}")
-        # Read the file content
-        file_content = await pdf_file.read()
-        logger.info(f"Read {len(file_content)} bytes from PDF")
+        # Copy the upload in chunks, rejecting oversized or non-PDF files early
+        upload = await spool_upload(pdf_file)
+        logger.info(f"Read {upload.size} bytes from PDF")
         
-        # Extract text from PDF
-        text = extract_text_from_pdf(file_content)
-        
-        # Generate flashcards
-        flashcards = generate_flashcards(text)
-        
-        return flashcards
+        async def generate():
+            # Extract text from PDF
+            text = await extract_text_from_pdf(upload.source)
+
+            # Generate flashcards
+            return [card.model_dump() for card in await generate_flashcards(text)]
+
+        # Identical uploads share one cached (or in-flight) generation
+        cache_key = make_cache_key_from_digest(
+            upload.digest,
+            GROQ_MODEL,
+            PROMPT_VERSION,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            chunk_token_budget=CHUNK_TOKEN_BUDGET,
+            compaction=settings.PROMPT_COMPACTION,
+            extraction_engine=settings.PDF_EXTRACTION_ENGINE,
+            text_layer_probe=settings.PDF_TEXT_LAYER_PROBE,
+        )
+        flashcards_data = await flashcard_cache.get_or_compute(cache_key, generate)
+
+        return [Flashcard(**card) for card in flashcards_data]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in create_flashcards endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if upload is not None:
+            upload.close()
+
+@app.on_event("shutdown")
+async def close_resources():
+    flashcard_cache.close()
+    shutdown_extraction_executor()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, media_type = render_metrics()
+    return Response(content=body, media_type=media_type)
 
 @app.get("/api/health")
 async def health_check():
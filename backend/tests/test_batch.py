@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_flashcard_cache, get_flashcard_service, get_flashcard_store
+from app.main import app
+from app.services.cache import FlashcardCache
+from app.services.store import FlashcardStore
+from tests.pdf_utils import build_pdf
+
+
+class FakeService:
+    """Generates one card per document, with a pause so documents overlap"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    def cache_key_for_digest(self, digest):
+        return digest
+
+    async def generate_flashcards_from_pdf(self, source, on_page=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        if b"broken" in source:
+            raise ValueError("extraction failed")
+        return [{"question": f"Q{len(source)}", "answer": "A"}]
+
+
+def test_batch_reports_partial_success():
+    """Test that bad documents fail individually while the rest of the batch completes"""
+    service = FakeService()
+    app.dependency_overrides[get_flashcard_service] = lambda: service
+    app.dependency_overrides[get_flashcard_cache] = lambda: FlashcardCache(db_path=None)
+    store = FlashcardStore(":memory:")
+    app.dependency_overrides[get_flashcard_store] = lambda: store
+    try:
+        files = [
+            ("files", ("one.pdf", build_pdf(["First lecture"]), "application/pdf")),
+            ("files", ("two.pdf", build_pdf(["Second lecture"]), "application/pdf")),
+            ("files", ("notes.txt", b"plain text", "text/plain")),
+            ("files", ("broken.pdf", b"%PDF-1.4 broken", "application/pdf")),
+        ]
+        response = TestClient(app).post("/api/v1/flashcards/generate/batch", files=files)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+    results = {result["filename"]: result for result in body["results"]}
+    assert results["one.pdf"]["flashcards"][0]["source_document"] == "one.pdf"
+    assert results["notes.txt"]["error"] == "Only PDF files are allowed"
+    assert "extraction failed" in results["broken.pdf"]["error"]
+    assert service.peak > 1
+    saved, _ = store.list_cards("testclient")
+    assert {card.source_document for card in saved} == {"one.pdf", "two.pdf"}
+
+
+class UnreachableService(FakeService):
+    async def generate_flashcards_from_pdf(self, source, on_page=None):
+        raise httpx.ConnectError("Connection refused")
+
+
+def test_unreachable_upstream_is_reported_as_unavailable():
+    """Test that upstream connection failures become a retryable 503, not a 500"""
+    app.dependency_overrides[get_flashcard_service] = lambda: UnreachableService()
+    app.dependency_overrides[get_flashcard_cache] = lambda: FlashcardCache(db_path=None)
+    app.dependency_overrides[get_flashcard_store] = lambda: FlashcardStore(":memory:")
+    try:
+        file = ("one.pdf", build_pdf(["First lecture"]), "application/pdf")
+        client = TestClient(app)
+        response = client.post("/api/v1/flashcards/generate", files={"file": file})
+        batch = client.post("/api/v1/flashcards/generate/batch", files=[("files", file)])
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert batch.json()["results"][0]["error"].startswith("Service temporarily unavailable")
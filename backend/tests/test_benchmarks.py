@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+
+from app.services.pdf_extraction import _count_pages
+from benchmarks.mock_llm import MockConfig, create_app
+from benchmarks.run import compare, percentile
+from benchmarks.synthetic_pdf import build_synthetic_pdf
+
+
+def test_synthetic_pdf_is_deterministic_and_parseable():
+    """Test that the same seed always builds the same readable document"""
+    pdf = build_synthetic_pdf(3, words_per_page=100, seed=7)
+    assert pdf == build_synthetic_pdf(3, words_per_page=100, seed=7)
+    assert _count_pages(pdf, "pypdf2") == 3
+
+
+def test_mock_llm_answers_openai_and_groq_paths():
+    """Test completions, streaming and injected failures on the mock server"""
+    client = TestClient(create_app(MockConfig(latency_ms=0, tokens_per_second=0)))
+    body = {"model": "m", "messages": [{"role": "user", "content": "Mitochondria produce most of the energy in cells."}]}
+
+    response = client.post("/v1/chat/completions", json=body)
+    assert response.json()["choices"][0]["message"]["content"].startswith("[{")
+    assert response.json()["usage"]["total_tokens"] > 0
+
+    streamed = client.post("/openai/v1/chat/completions", json={**body, "stream": True}).text
+    assert streamed.rstrip().endswith("data: [DONE]")
+
+    failing = TestClient(create_app(MockConfig(latency_ms=0, error_rate=1.0)))
+    assert failing.post("/v1/chat/completions", json=body).status_code == 500
+
+
+def test_percentiles_and_regression_check():
+    """Test report statistics and baseline comparison"""
+    values = [float(v) for v in range(1, 101)]
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50.0, 95.0, 99.0)
+
+    baseline = {"targets": {"app": {"p95_ms": 100.0, "requests_per_second": 10.0}}}
+    report = {"targets": {"app": {"p95_ms": 130.0, "requests_per_second": 9.5}}}
+    assert compare(report, baseline, max_regression=0.15) == ["app.p95_ms: 100.0 -> 130.0 (+30%)"]
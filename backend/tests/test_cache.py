@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache import FlashcardCache, MemoryLRUCache, SQLiteCacheStore, make_cache_key
+from app.services.deadline import DeadlineExceededError, deadline_after, wait_within_deadline
+
+
+def test_cache_key_depends_on_content_and_parameters():
+    """Test that the key changes with the PDF bytes, model, prompt version and parameters"""
+    base = make_cache_key(b"%PDF-1.4 a", "model", "1", temperature=0.7)
+    assert base == make_cache_key(b"%PDF-1.4 a", "model", "1", temperature=0.7)
+    assert base != make_cache_key(b"%PDF-1.4 b", "model", "1", temperature=0.7)
+    assert base != make_cache_key(b"%PDF-1.4 a", "other", "1", temperature=0.7)
+    assert base != make_cache_key(b"%PDF-1.4 a", "model", "2", temperature=0.7)
+    assert base != make_cache_key(b"%PDF-1.4 a", "model", "1", temperature=0.2)
+
+
+def test_memory_lru_evicts_least_recently_used():
+    """Test LRU eviction order of the memory tier"""
+    cache = MemoryLRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_memory_lru_expires_entries():
+    """Test TTL expiry of the memory tier"""
+    cache = MemoryLRUCache(max_entries=2, ttl=60)
+    cache.set("a", 1, expires_at=time.time() - 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_store_size_eviction(tmp_path):
+    """Test the disk tier evicts old entries once over its size limit"""
+    store = SQLiteCacheStore(str(tmp_path / "cache.sqlite3"), ttl=60, max_bytes=200)
+    store.set("old", ["x" * 80])
+    time.sleep(0.01)
+    store.set("new", ["y" * 80])
+    time.sleep(0.01)
+    store.set("newest", ["z" * 80])
+    assert store.get("old") is None
+    assert store.get("newest")[1] == ["z" * 80]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(tmp_path):
+    """Test values written by one cache instance are served by the next"""
+    db_path = str(tmp_path / "cache.sqlite3")
+    first = FlashcardCache(ttl=60, max_memory_entries=4, db_path=db_path, max_disk_bytes=10_000)
+    await first.set("key", [{"question": "Q", "answer": "A"}])
+    first.close()
+
+    second = FlashcardCache(ttl=60, max_memory_entries=4, db_path=db_path, max_disk_bytes=10_000)
+    assert await second.get("key") == [{"question": "Q", "answer": "A"}]
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced():
+    """Test that a burst of identical requests triggers a single computation"""
+    cache = FlashcardCache(ttl=60, max_memory_entries=4, db_path=None)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [{"question": "Q", "answer": "A"}]
+
+    results = await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(10)))
+    assert calls == 1
+    assert all(result == [{"question": "Q", "answer": "A"}] for result in results)
+
+    await cache.get_or_compute("key", compute)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_computation_is_not_cached():
+    """Test that errors propagate to every waiter and are not cached"""
+    cache = FlashcardCache(ttl=60, max_memory_entries=4, db_path=None)
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("key", compute) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_hands_over_to_a_waiter():
+    """Test that cancelling the computing caller makes a waiting caller compute instead of failing"""
+    cache = FlashcardCache(ttl=60, max_memory_entries=4, db_path=None)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return [{"question": "Q", "answer": "A"}]
+
+    leader = asyncio.create_task(cache.get_or_compute("key", compute))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(cache.get_or_compute("key", compute))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == [{"question": "Q", "answer": "A"}]
+    assert leader.cancelled()
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_leader_deadline_does_not_fail_waiters():
+    """Test that a caller with a short budget does not pass its DeadlineExceededError to others"""
+    cache = FlashcardCache(ttl=60, max_memory_entries=4, db_path=None)
+
+    async def compute():
+        await wait_within_deadline(asyncio.sleep(0.05), what="the LLM")
+        return [{"question": "Q", "answer": "A"}]
+
+    async def call(budget):
+        with deadline_after(budget):
+            return await cache.get_or_compute("key", compute)
+
+    results = await asyncio.gather(call(0.01), call(100), return_exceptions=True)
+    assert isinstance(results[0], DeadlineExceededError)
+    assert results[1] == [{"question": "Q", "answer": "A"}]
+
+
+@pytest.mark.asyncio
+async def test_streamed_generation_is_joined_by_concurrent_callers():
+    """Test that a caller leading a generation by hand (as the stream does) is joined, not repeated"""
+    cache = FlashcardCache(ttl=60, max_memory_entries=4, db_path=None)
+    deck = [{"question": "Q", "answer": "A"}]
+
+    async def stream():
+        assert await cache.get_or_join("key") is None
+        async with cache.leading("key") as publish:
+            await asyncio.sleep(0.05)
+            await cache.set("key", deck)
+            publish(deck)
+
+    async def compute():
+        raise AssertionError("the streamed generation should have been joined")
+
+    leader = asyncio.create_task(stream())
+    await asyncio.sleep(0.01)
+    assert await asyncio.gather(cache.get_or_compute("key", compute), cache.get_or_join("key")) == [deck, deck]
+    await leader
+
+
+@pytest.mark.asyncio
+async def test_leader_closed_early_hands_over_to_a_waiter():
+    """Test that a stream closed before publishing (a client disconnect) does not strand its waiters"""
+    cache = FlashcardCache(ttl=60, max_memory_entries=4, db_path=None)
+
+    async def events():
+        async with cache.leading("key"):
+            yield "card"
+            await asyncio.sleep(10)
+
+    stream = events()
+    assert await stream.__anext__() == "card"
+    follower = asyncio.create_task(cache.get_or_compute("key", lambda: asyncio.sleep(0, result=["deck"])))
+    await asyncio.sleep(0.01)
+    await stream.aclose()
+    assert await asyncio.wait_for(follower, 1) == ["deck"]
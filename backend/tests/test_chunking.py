@@ -0,0 +1,121 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.cache import FlashcardCache
+from app.services.chunking import chunk_fingerprint, chunk_pages, chunk_text, estimate_tokens
+from app.services.flashcard_service import FlashcardService
+from app.services.pdf_extraction import PageRecord
+
+
+def test_chunks_respect_token_budget():
+    """Test that no chunk exceeds the budget, even for one huge paragraph"""
+    text = "\n\n".join(["Short paragraph about cells."] * 20 + ["A long sentence about proteins. " * 200])
+    chunks = chunk_text(text, max_tokens=100)
+    assert len(chunks) > 1
+    assert all(chunk.token_estimate <= 100 for chunk in chunks)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+
+
+def test_chunks_split_on_paragraph_boundaries():
+    """Test that paragraphs are kept whole when they fit"""
+    paragraphs = [f"Paragraph {i} " + "word " * 30 for i in range(6)]
+    chunks = chunk_text("\n\n".join(paragraphs), max_tokens=100)
+    for chunk in chunks:
+        for block in chunk.text.split("\n\n"):
+            assert block.strip() in [p.strip() for p in paragraphs]
+
+
+def test_chunks_prefer_section_headings():
+    """Test that a heading starts a new chunk once the current one is half full"""
+    text = "INTRODUCTION\n" + "intro " * 70 + "\n\nCHAPTER 2 METHODS\n" + "methods " * 10
+    chunks = chunk_text(text, max_tokens=200)
+    assert len(chunks) == 2
+    assert chunks[1].text.startswith("CHAPTER 2 METHODS")
+
+
+@pytest.mark.asyncio
+async def test_chunk_pages_tracks_page_span():
+    """Test incremental chunking of a page stream"""
+    async def pages():
+        for number in range(1, 5):
+            text = f"Page {number} text " + "filler " * 40
+            yield PageRecord(page_number=number, text=text, char_count=len(text))
+
+    chunks = [chunk async for chunk in chunk_pages(pages(), max_tokens=150)]
+    assert chunks[0].start_page == 1
+    assert chunks[-1].end_page == 4
+    assert sum(estimate_tokens(chunk.text) for chunk in chunks) >= 4 * 70
+
+
+@pytest.mark.asyncio
+async def test_chunks_generated_concurrently_and_merged_in_order(monkeypatch):
+    """Test bounded concurrent generation with results merged in document order"""
+    service = FlashcardService()
+    service._llm_semaphore = asyncio.Semaphore(2)
+    active = 0
+    peak = 0
+
+    async def fake_create(messages, **kwargs):
+        nonlocal active, peak
+        text = messages[-1]["content"].split("Text:", 1)[-1].strip()
+        active += 1
+        peak = max(peak, active)
+        # Later chunks finish first to exercise ordering
+        await asyncio.sleep(0.05 if text.startswith("Paragraph 0") else 0.01)
+        active -= 1
+        content = json.dumps([{"question": text.split()[1], "answer": "A"}])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    monkeypatch.setattr(service.client.chat.completions, "create", fake_create)
+    chunks = chunk_text("\n\n".join(f"Paragraph {i} " + "x" * 400 for i in range(5)), max_tokens=110)
+
+    cards = await service.generate_flashcards_for_chunks(chunks)
+
+    assert [card["question"] for card in cards] == ["0", "1", "2", "3", "4"]
+    assert peak == 2
+
+
+def lecture_pages(edited_page=None):
+    async def pages():
+        for number in range(1, 31):
+            text = f"Slide {number} covers topic {number}. " + f"detail{number} " * (8 + number * 7 % 23)
+            if number == edited_page:
+                text += "A corrected formula was added to this slide."
+            yield PageRecord(page_number=number, text=text, char_count=len(text))
+    return pages()
+
+
+@pytest.mark.asyncio
+async def test_editing_one_page_keeps_other_chunk_fingerprints():
+    """Test that chunk boundaries realign at page breaks after a local edit"""
+    original = [chunk_fingerprint(chunk.text) async for chunk in chunk_pages(lecture_pages(), max_tokens=300)]
+    revised = [chunk_fingerprint(chunk.text) async for chunk in chunk_pages(lecture_pages(3), max_tokens=300)]
+    assert len(original) > 4
+    assert len(set(revised) - set(original)) == 1
+
+
+@pytest.mark.asyncio
+async def test_revised_document_only_regenerates_changed_chunks(monkeypatch):
+    """Test that unchanged chunks reuse their cards instead of calling the LLM"""
+    service = FlashcardService(chunk_cache=FlashcardCache(db_path=None))
+    service.chunk_token_budget = 300
+    prompts = []
+
+    async def fake_create(messages, **kwargs):
+        prompts.append(messages[-1]["content"])
+        content = json.dumps([{"question": f"Q{len(prompts)}", "answer": "A"}])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    monkeypatch.setattr(service.client.chat.completions, "create", fake_create)
+    monkeypatch.setattr("app.services.flashcard_service.settings.PROMPT_COMPACTION", False)
+
+    first = await service.generate_flashcards_from_pages(lecture_pages())
+    calls = len(prompts)
+    second = await service.generate_flashcards_from_pages(lecture_pages(3))
+
+    assert len(prompts) == calls + 1
+    assert "corrected formula" in prompts[-1]
+    assert len(second) == len(first)
@@ -0,0 +1,49 @@
+import pytest
+
+from app.services.compaction import PageCompactor, compact_text, normalize_text
+from app.services.pdf_extraction import PageRecord
+
+
+def make_pages(texts):
+    return [PageRecord(page_number=i + 1, text=text, char_count=len(text)) for i, text in enumerate(texts)]
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+def test_normalize_fixes_ligatures_hyphenation_and_whitespace():
+    """Test character-level cleanup of extracted text"""
+    text = "The ﬁrst efﬁcient   mito-\nchondria\n\n\n\nproduce   ATP"
+    assert normalize_text(text) == "The first efficient mitochondria\n\nproduce ATP"
+
+
+@pytest.mark.asyncio
+async def test_repeated_headers_and_footers_are_removed():
+    """Test that running headers and changing page numbers are dropped from every page"""
+    topics = ["Membranes", "Ribosomes", "Mitosis", "Meiosis", "Enzymes", "Osmosis"]
+    pages = make_pages([
+        f"BIO 101 - Cell Biology\n{topic} are covered here.\n© 2024 University Press\nPage {i + 1} of 6"
+        for i, topic in enumerate(topics)
+    ])
+    compactor = PageCompactor(sample_pages=4)
+
+    compacted = [page async for page in compactor.compact(aiter(pages))]
+
+    assert [page.text for page in compacted] == [f"{topic} are covered here." for topic in topics]
+    assert compactor.stats.boilerplate_lines == 18
+    assert compactor.stats.tokens_after < compactor.stats.tokens_before
+
+
+def test_single_page_keeps_its_lines():
+    """Test that nothing is treated as boilerplate without repetition across pages"""
+    compacted = PageCompactor().compact_pages(make_pages(["Header\nBody text\nFooter"]))
+    assert compacted[0].text == "Header\nBody text\nFooter"
+
+
+def test_near_duplicate_paragraphs_are_dropped():
+    """Test that paragraphs differing only in case, punctuation or spacing are kept once"""
+    paragraph = "Mitochondria are the powerhouse of the cell, producing ATP."
+    text = f"{paragraph}\n\nSomething else entirely.\n\nmitochondria are the powerhouse of the cell producing ATP"
+    assert compact_text(text) == f"{paragraph}\n\nSomething else entirely."
@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from app.services.circuit_breaker import is_upstream_failure
+from app.services.deadline import DeadlineExceededError, deadline_after, remaining, wait_within_deadline
+from app.services.flashcard_service import FlashcardService
+from app.services.hedging import LatencyTracker, hedged
+from app.services.scheduler import ProviderBudget, SchedulerTimeoutError, UpstreamScheduler
+
+
+@pytest.mark.asyncio
+async def test_wait_is_bounded_by_the_deadline():
+    """Test that a slow await fails with DeadlineExceededError once the budget is spent"""
+    with deadline_after(0.05):
+        with pytest.raises(DeadlineExceededError):
+            await wait_within_deadline(asyncio.sleep(5), timeout=10, what="a slow call")
+    assert remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_own_timeout_is_not_reported_as_deadline():
+    """Test that a caller's shorter timeout still raises a plain TimeoutError"""
+    with deadline_after(5):
+        with pytest.raises(asyncio.TimeoutError) as excinfo:
+            await wait_within_deadline(asyncio.sleep(5), timeout=0.02)
+    assert not isinstance(excinfo.value, DeadlineExceededError)
+
+
+def test_nested_deadline_never_extends_outer():
+    with deadline_after(1):
+        with deadline_after(60):
+            assert remaining() <= 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_gives_up_at_the_deadline():
+    """Test that queueing for capacity stops when the request budget runs out, not at max_wait"""
+    scheduler = UpstreamScheduler({"openai": ProviderBudget("openai", 60, 60000)}, max_wait=30)
+    scheduler.budgets["openai"].requests.available = 0
+    with deadline_after(0.05):
+        with pytest.raises(DeadlineExceededError):
+            async with scheduler.admit("openai", 10, 10, user_id="a"):
+                pass
+    # Without a deadline the scheduler's own limit still applies
+    scheduler.max_wait = 0.05
+    with pytest.raises(SchedulerTimeoutError):
+        async with scheduler.admit("openai", 10, 10, user_id="a"):
+            pass
+
+
+def test_deadline_is_not_an_upstream_failure():
+    """Test that running out of budget neither trips the breaker nor triggers retries"""
+    assert not is_upstream_failure(DeadlineExceededError("openai"))
+
+
+@pytest.mark.asyncio
+async def test_groq_retry_stops_when_budget_cannot_cover_backoff():
+    service = FlashcardService()
+    with patch("asyncio.sleep", new=AsyncMock()), \
+            patch.object(service.groq_client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
+        mock_create.side_effect = httpx.ConnectError("Connection failed")
+        # The first backoff is 4s, which a 3s budget cannot cover
+        with deadline_after(3):
+            with pytest.raises(httpx.ConnectError):
+                await service._make_groq_request("test prompt")
+    assert mock_create.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_returns_faster_attempt_and_cancels_slow_one():
+    calls = []
+    cancelled = []
+
+    async def attempt(sent):
+        index = len(calls)
+        calls.append(index)
+        sent.set()
+        try:
+            await asyncio.sleep(5 if index == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return index
+
+    assert await hedged(attempt, 0.02, "openai") == 1
+    await asyncio.sleep(0)
+    assert calls == [0, 1]
+    assert cancelled == [0]
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_while_still_queued():
+    """Test that time spent before the request is sent does not count towards the hedge delay"""
+    calls = []
+
+    async def attempt(sent):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        sent.set()
+        return "ok"
+
+    assert await hedged(attempt, 0.02, "openai") == "ok"
+    assert len(calls) == 1
+
+
+def test_latency_percentile_needs_samples():
+    tracker = LatencyTracker(window=10, min_samples=3)
+    tracker.observe(1.0)
+    assert tracker.percentile(95) is None
+    for seconds in (2.0, 3.0, 4.0):
+        tracker.observe(seconds)
+    assert tracker.percentile(50) == 2.0
+    assert tracker.percentile(95) == 4.0
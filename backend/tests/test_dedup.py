@@ -0,0 +1,105 @@
+import sqlite3
+
+from app.models.flashcard import Flashcard
+from app.services.dedup import (
+    MinHasher,
+    candidate_pairs,
+    card_text,
+    deduplicate_cards,
+    has_words,
+    near_duplicate_clusters,
+    shingles,
+    similarity,
+)
+from app.services.flashcard_service import FlashcardService
+from app.services.store import FlashcardStore
+
+PHOTOSYNTHESIS = [
+    {"question": "What is photosynthesis?", "answer": "The process by which plants convert light into chemical energy."},
+    {
+        "question": "Define photosynthesis.",
+        "answer": "Photosynthesis is the process plants use to convert light energy into chemical energy stored in glucose.",
+        "topic": "Biology",
+    },
+]
+OTHERS = [
+    {"question": "What is the function of chlorophyll?", "answer": "Chlorophyll absorbs light for photosynthesis."},
+    {"question": "What do mitochondria produce?", "answer": "ATP, through cellular respiration."},
+]
+
+
+def test_paraphrases_collapse_to_the_fullest_card():
+    """Test that 'What is X?' / 'Define X.' cards merge and the more complete one is kept in place"""
+    cards = [PHOTOSYNTHESIS[0], OTHERS[0], PHOTOSYNTHESIS[1], OTHERS[1]]
+    assert deduplicate_cards(cards) == [PHOTOSYNTHESIS[1], OTHERS[0], OTHERS[1]]
+
+
+def test_threshold_controls_what_counts_as_duplicate():
+    assert len(deduplicate_cards(PHOTOSYNTHESIS, threshold=0.5)) == 1
+    assert len(deduplicate_cards(PHOTOSYNTHESIS, threshold=0.95)) == 2
+
+
+def test_minhash_estimates_jaccard_similarity():
+    left, right = "alpha beta gamma delta epsilon zeta", "alpha beta gamma delta eta theta"
+    hasher = MinHasher(num_perm=256, bands=32)
+    estimate = similarity(*hasher.signatures([left, right]))
+    assert abs(estimate - 4 / 8) < 0.1
+    assert shingles("What is the cell?") == shingles("Define cell")
+
+
+def test_cards_without_content_words_are_never_merged():
+    texts = ["What is this?", "Define it.", "What is the cell membrane?"]
+    assert near_duplicate_clusters(texts) == [0, 1, 2]
+
+
+def test_lsh_only_pairs_cards_that_share_a_bucket():
+    """Test that distinct cards produce almost no candidate pairs, so work stays near-linear"""
+    texts = [card_text(f"What is term{i}?", f"Term{i} relates to concept{i * 7} and idea{i * 13}") for i in range(2000)]
+    hasher = MinHasher()
+    signatures = hasher.signatures(texts)
+    pairs = candidate_pairs(hasher.band_keys(signatures), has_words(signatures))
+    assert len(pairs) < 20
+    assert near_duplicate_clusters(texts) == list(range(2000))
+
+
+def test_dedup_settings_change_the_document_cache_key(monkeypatch):
+    """Test that decks cached under one dedup policy are not served under another"""
+    service = FlashcardService()
+    base = service.cache_key_for_digest("digest")
+    monkeypatch.setattr("app.services.flashcard_service.settings.DEDUP_THRESHOLD", 0.8)
+    assert service.cache_key_for_digest("digest") != base
+    monkeypatch.setattr("app.services.flashcard_service.settings.DEDUP_THRESHOLD", 0.5)
+    monkeypatch.setattr("app.services.flashcard_service.settings.DEDUP_CARDS", False)
+    assert service.cache_key_for_digest("digest") != base
+
+
+def test_store_reuses_cards_already_in_the_library(tmp_path):
+    """Test that near-duplicates are not stored again but the whole deck is still returned"""
+    path = str(tmp_path / "flashcards.sqlite3")
+    store = FlashcardStore(path)
+    [original] = store.save_deck("alice", [Flashcard(**PHOTOSYNTHESIS[0])], document_digest="d1")
+
+    def new_deck():
+        return [Flashcard(**PHOTOSYNTHESIS[1]), Flashcard(**OTHERS[1])]
+
+    deck = new_deck()
+    saved = store.save_deck("alice", deck, document_digest="d2", duplicate_threshold=0.5)
+    assert [card.id for card in saved] == [original.id, deck[1].id]
+    assert store.count("alice") == 2
+    # Saving the document again returns the same deck, library card included
+    assert [card.id for card in store.save_deck("alice", new_deck(), document_digest="d2")] == [original.id, deck[1].id]
+    # Other users' libraries do not count, and the check is opt-in
+    assert len(store.save_deck("bob", new_deck(), document_digest="d2", duplicate_threshold=0.5)) == 2
+    assert len(store.save_deck("alice", new_deck(), document_digest="d3")) == 2
+    store.close()
+
+    # Libraries saved before the index existed are indexed when the store is opened
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TABLE card_lsh")
+    store = FlashcardStore(path)
+    saved = store.save_deck("bob", [Flashcard(**PHOTOSYNTHESIS[0])], document_digest="d4", duplicate_threshold=0.5)
+    assert [card.question for card in saved] == [PHOTOSYNTHESIS[1]["question"]]
+    assert [card.id for card in store.save_deck("bob", [Flashcard(**PHOTOSYNTHESIS[0])], document_digest="d4")] == [
+        saved[0].id
+    ]
+    store.close()
@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from app.models.flashcard import Flashcard
+from app.services.export import ANKI_HEADER, CSV_COLUMNS, export_cards
+from app.services.store import FlashcardStore
+
+
+@pytest.fixture
+def store():
+    store = FlashcardStore(":memory:")
+    store.save_deck(
+        "alice",
+        [Flashcard(question=f"Q{i}, \"quoted\"", answer=f"A{i}\nline two", topic="cell biology", tags=["exam"]) for i in range(25)],
+        document_digest="d1",
+        source_document="bio.pdf",
+    )
+    store.save_deck("bob", [Flashcard(question="Other", answer="User")], document_digest="d1")
+    yield store
+    store.close()
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_csv_export_pages_through_the_whole_library(store):
+    """Test that a multi-page export contains every card once, with CSV quoting intact"""
+    chunks = await collect(export_cards(store, "alice", "csv", page_size=10))
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == CSV_COLUMNS
+    assert [row[1] for row in rows[1:]] == [f"Q{i}, \"quoted\"" for i in reversed(range(25))]
+    assert rows[1][2] == "A24\nline two"
+    assert rows[1][5] == "exam"
+
+
+@pytest.mark.asyncio
+async def test_gzip_export_decompresses_to_the_plain_export(store):
+    plain = b"".join(await collect(export_cards(store, "alice", "jsonl", page_size=7)))
+    compressed = b"".join(await collect(export_cards(store, "alice", "jsonl", compress=True, page_size=7)))
+    assert gzip.decompress(compressed) == plain
+    cards = [Flashcard(**json.loads(line)) for line in plain.decode().splitlines()]
+    assert len(cards) == 25 and all(card.user_id == "alice" for card in cards)
+
+
+@pytest.mark.asyncio
+async def test_anki_export_has_import_header_and_tags(store):
+    text = b"".join(await collect(export_cards(store, "bob", "anki"))).decode()
+    assert text.startswith(ANKI_HEADER)
+    assert text[len(ANKI_HEADER):] == "Other\tUser\t\n"
+
+    text = b"".join(await collect(export_cards(store, "alice", "anki", topic="cell biology"))).decode()
+    note = next(csv.reader(io.StringIO(text[len(ANKI_HEADER):]), delimiter="\t"))
+    assert note[2] == "exam cell_biology"
+
+
+@pytest.mark.asyncio
+async def test_empty_library_exports_only_the_header(store):
+    chunks = await collect(export_cards(store, "carol", "csv"))
+    assert b"".join(chunks).decode().splitlines() == [",".join(CSV_COLUMNS)]
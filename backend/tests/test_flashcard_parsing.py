@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.flashcard_service import FlashcardService
+from app.services.json_stream import parse_flashcards
+
+CARD = '{"question": "What is ATP?", "answer": "The energy currency of the cell"}'
+
+
+def test_well_formed_output_with_fences():
+    """Test the fast path, including markdown fences"""
+    result = parse_flashcards(f"```json\n[{CARD}, {CARD}]\n```")
+    assert len(result.cards) == 2
+    assert (result.salvaged, result.dropped) == (0, 0)
+
+
+@pytest.mark.parametrize("output,salvaged,dropped", [
+    (f'[{CARD}, {CARD}, {{"question": "Cut off", "answer": "mid-sent', 2, 1),  # truncated at max_tokens
+    (f"[{CARD}, {CARD},]", 2, 0),  # trailing comma in the array
+    (f'[{CARD}, {{"question": "Q", "answer": "A",}}]', 2, 0),  # trailing comma in an object
+    (f"Here are your flashcards:\n[{CARD}]\nLet me know!", 1, 0),  # prose around the array
+])
+def test_malformed_output_is_salvaged(output, salvaged, dropped):
+    """Test that every complete card survives malformed or truncated output"""
+    result = parse_flashcards(output)
+    assert (result.salvaged, result.dropped) == (salvaged, dropped)
+    assert len(result.cards) == salvaged
+
+
+def test_invalid_cards_are_dropped_individually():
+    """Test bulk validation keeps the valid cards"""
+    result = parse_flashcards(f'[{CARD}, {{"question": "", "answer": "x"}}, {{"answer": "no question"}}, {CARD}]')
+    assert len(result.cards) == 2
+    assert result.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_truncated_completion_does_not_fail_chunk(monkeypatch):
+    """Test that a completion cut off at max_tokens still yields its complete cards"""
+    service = FlashcardService()
+
+    async def fake_create(**kwargs):
+        content = f"[{CARD}, {{\"question\": \"Q2\", \"ans"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="length")],
+            usage=None,
+        )
+
+    monkeypatch.setattr(service.client.chat.completions, "create", fake_create)
+    cards = await service._generate_text_flashcards("Some text about ATP.")
+    assert cards == [{"question": "What is ATP?", "answer": "The energy currency of the cell"}]
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from app.models.job import Job, JobStatus
+from app.services.jobs import InMemoryJobQueue, JobManager, RedisJobQueue
+
+
+async def wait_for_status(manager, job_id, statuses, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await manager.get(job_id)
+        if job.status in statuses:
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job stuck in {job.status}"
+        await asyncio.sleep(0.01)
+
+
+async def fake_runner(pdf_content, progress):
+    for _ in range(3):
+        progress.page_extracted()
+    progress.chunks_changed(0, 1)
+    await asyncio.sleep(0.01)
+    progress.chunks_changed(1, 1)
+    return [{"question": pdf_content.decode(), "answer": "A"}]
+
+
+def make_queues():
+    queues = [InMemoryJobQueue()]
+    fakeredis = pytest.importorskip("fakeredis")
+    queues.append(RedisJobQueue(fakeredis.FakeAsyncRedis()))
+    return queues
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+async def test_job_completes_with_progress(backend):
+    """Test submit/poll lifecycle on both queue backends"""
+    queue = make_queues()[0 if backend == "memory" else 1]
+    manager = JobManager(fake_runner, queue=queue, workers=1, progress_interval=0.01)
+    manager.start()
+    try:
+        job = await manager.submit(b"doc", filename="doc.pdf")
+        assert job.status == JobStatus.QUEUED
+
+        job = await wait_for_status(manager, str(job.id), {JobStatus.COMPLETED})
+        assert job.progress.pages_extracted == 3
+        assert job.progress.chunks_completed == job.progress.chunks_total == 1
+        assert [card.question for card in job.flashcards] == ["doc"]
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+async def test_higher_priority_jobs_run_first(backend):
+    """Test that queued jobs are popped by priority, then submission order"""
+    queue = make_queues()[0 if backend == "memory" else 1]
+    await queue.push("low", 0)
+    await queue.push("high", 5)
+    await queue.push("low-2", 0)
+    assert [await queue.pop() for _ in range(3)] == ["high", "low", "low-2"]
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued_and_running_jobs():
+    """Test cancellation before and during execution"""
+    started = asyncio.Event()
+
+    async def slow_runner(pdf_content, progress):
+        started.set()
+        await asyncio.sleep(10)
+        return []
+
+    manager = JobManager(slow_runner, queue=InMemoryJobQueue(), workers=1, progress_interval=0.01)
+    manager.start()
+    try:
+        running = await manager.submit(b"running")
+        queued = await manager.submit(b"queued")
+        await asyncio.wait_for(started.wait(), 1)
+
+        assert (await manager.cancel(str(queued.id))).status == JobStatus.CANCELLED
+        await manager.cancel(str(running.id))
+        job = await wait_for_status(manager, str(running.id), {JobStatus.CANCELLED})
+        assert job.finished_at is not None
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+async def test_progress_updates_keep_a_concurrent_cancel(backend):
+    """Test that a worker persisting progress does not overwrite another worker's cancel"""
+    queue = make_queues()[0 if backend == "memory" else 1]
+    running = Job(status=JobStatus.RUNNING)
+    await queue.save(running)
+    cancelled = running.model_copy(update={"status": JobStatus.CANCELLED})
+    await queue.save(cancelled)
+
+    running.progress.pages_extracted = 4
+    await queue.save_progress(running)
+    # Status changes are dropped too, so a finishing worker cannot resurrect the job
+    assert not await queue.save_unless_cancelled(running.model_copy(update={"status": JobStatus.COMPLETED}))
+    stored = await queue.load(str(running.id))
+    assert stored.status == JobStatus.CANCELLED
+    assert stored.progress.pages_extracted == 4
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_stopping_requeues_running_jobs():
+    """Test that a job interrupted by shutdown goes back to the queue instead of staying RUNNING"""
+    started = asyncio.Event()
+
+    async def slow_runner(pdf_content, progress):
+        started.set()
+        await asyncio.sleep(10)
+        return []
+
+    queue = InMemoryJobQueue()
+    manager = JobManager(slow_runner, queue=queue, workers=1, progress_interval=0.01)
+    manager.start()
+    job = await manager.submit(b"doc", priority=3)
+    await asyncio.wait_for(started.wait(), 1)
+    await manager.stop()
+
+    stored = await queue.load(str(job.id))
+    assert stored.status == JobStatus.QUEUED and stored.started_at is None
+    assert await queue.pop() == str(job.id)
+    assert await queue.pop_payload(str(job.id)) == b"doc"
+
+
+@pytest.mark.asyncio
+async def test_failed_job_reports_error():
+    """Test that runner errors mark the job as failed"""
+    async def failing_runner(pdf_content, progress):
+        raise ValueError("bad pdf")
+
+    manager = JobManager(failing_runner, queue=InMemoryJobQueue(), workers=1)
+    manager.start()
+    try:
+        job = await manager.submit(b"x")
+        job = await wait_for_status(manager, str(job.id), {JobStatus.FAILED})
+        assert job.error == "bad pdf"
+    finally:
+        await manager.stop()
@@ -0,0 +1,52 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import LLM, UPLOAD, record_stage, stage
+from app.core.middleware import ServerTimingMiddleware
+from app.main import app
+
+
+def make_app() -> FastAPI:
+    timed = FastAPI()
+    timed.add_middleware(ServerTimingMiddleware)
+
+    @timed.get("/work")
+    async def work():
+        with stage(UPLOAD):
+            await asyncio.sleep(0.01)
+
+        async def chunk():
+            record_stage(LLM, 0.02)
+
+        # Stages recorded in child tasks count towards the request
+        await asyncio.gather(chunk(), chunk())
+        return {"ok": True}
+
+    return timed
+
+
+def parse_server_timing(header: str) -> dict:
+    entries = (entry.split(";dur=") for entry in header.split(", "))
+    return {name: float(duration) for name, duration in entries}
+
+
+def test_server_timing_header_reports_stages():
+    """Test that stage durations, including concurrent ones, are summed per request"""
+    response = TestClient(make_app()).get("/work")
+
+    timings = parse_server_timing(response.headers["Server-Timing"])
+    assert timings[UPLOAD] >= 10
+    assert timings[LLM] == 40.0
+    assert timings["total"] >= timings[UPLOAD]
+
+
+def test_metrics_endpoint_exports_histograms():
+    """Test the Prometheus scrape endpoint"""
+    client = TestClient(make_app())
+    client.get("/work")
+
+    body = TestClient(app).get("/metrics").text
+    assert 'flashcards_stage_seconds_count{stage="upload"}' in body
+    assert 'flashcards_http_request_seconds_count{method="GET",route="/work",status="200"}' in body
@@ -1,76 +1,130 @@
 import pytest
-import aiohttp
+import httpx
 import asyncio
-from unittest.mock import patch, MagicMock
-from ..app.services.flashcard_service import FlashcardService, NetworkError
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.circuit_breaker import CircuitBreaker, UpstreamUnavailableError
+from app.services.flashcard_service import FlashcardService
 
 @pytest.fixture
-async def flashcard_service():
+def flashcard_service():
     service = FlashcardService()
-    yield service
-    if service.session:
-        await service.session.close()
+    service.groq_breaker = CircuitBreaker("groq", failure_threshold=5, reset_timeout=30)
+    return service
 
-@pytest.mark.asyncio
-async def test_network_connectivity_success(flashcard_service):
-    """Test successful network connectivity"""
-    with patch('aiohttp.ClientSession.get') as mock_get:
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_get.return_value.__aenter__.return_value = mock_response
-        
-        result = await flashcard_service._test_network_connectivity()
-        assert result is True
+@pytest.fixture(autouse=True)
+def no_retry_wait():
+    """Skip tenacity's exponential backoff so retry tests run instantly"""
+    with patch("asyncio.sleep", new=AsyncMock()):
+        yield
 
-@pytest.mark.asyncio
-async def test_network_connectivity_failure(flashcard_service):
-    """Test failed network connectivity"""
-    with patch('aiohttp.ClientSession.get') as mock_get:
-        mock_get.side_effect = aiohttp.ClientError("Connection failed")
-        
-        result = await flashcard_service._test_network_connectivity()
-        assert result is False
+def test_circuit_opens_after_consecutive_failures():
+    """Test that the breaker fails fast once the threshold is reached"""
+    breaker = CircuitBreaker("groq", failure_threshold=2, reset_timeout=30)
+    breaker.before_request()
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.before_request()
+
+def test_circuit_half_open_allows_single_trial():
+    """Test that after the reset timeout exactly one trial request is let through"""
+    breaker = CircuitBreaker("groq", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_failed_trial_reopens_circuit():
+    """Test that a failed half-open trial opens the circuit again"""
+    breaker = CircuitBreaker("groq", failure_threshold=3, reset_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
 
 @pytest.mark.asyncio
 async def test_groq_request_retry(flashcard_service):
     """Test retry mechanism for Groq API requests"""
-    with patch('groq.Groq.chat.completions.create') as mock_create:
+    with patch.object(flashcard_service.groq_client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
         # Simulate two failures followed by success
         mock_create.side_effect = [
-            aiohttp.ClientError("First attempt failed"),
-            aiohttp.ClientError("Second attempt failed"),
+            httpx.ConnectError("First attempt failed"),
+            httpx.ConnectError("Second attempt failed"),
             MagicMock(choices=[MagicMock(message=MagicMock(content="Success"))])
         ]
-        
+
         result = await flashcard_service._make_groq_request("test prompt")
         assert result == "Success"
         assert mock_create.call_count == 3
+        assert flashcard_service.groq_breaker.state == CircuitBreaker.CLOSED
 
 @pytest.mark.asyncio
 async def test_groq_request_max_retries(flashcard_service):
     """Test maximum retries exceeded"""
-    with patch('groq.Groq.chat.completions.create') as mock_create:
+    with patch.object(flashcard_service.groq_client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
         # Simulate continuous failures
-        mock_create.side_effect = aiohttp.ClientError("Connection failed")
-        
-        with pytest.raises(aiohttp.ClientError):
+        mock_create.side_effect = httpx.ConnectError("Connection failed")
+
+        with pytest.raises(httpx.ConnectError):
             await flashcard_service._make_groq_request("test prompt")
         assert mock_create.call_count == 3
 
+@pytest.mark.asyncio
+async def test_openai_request_retried_once_by_the_service(flashcard_service):
+    """Test that OpenAI calls are retried by tenacity alone, with SDK retries disabled"""
+    assert flashcard_service.client.max_retries == 0
+    with patch.object(flashcard_service.client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
+        mock_create.side_effect = httpx.ConnectError("Connection failed")
+
+        with pytest.raises(httpx.ConnectError):
+            await flashcard_service._complete_openai([{"role": "user", "content": "test"}], asyncio.Event())
+        assert mock_create.call_count == 3
+
+@pytest.mark.asyncio
+async def test_rate_limited_request_retried_after_throttle(flashcard_service):
+    """Test that a 429 throttles the provider and the next attempt succeeds instead of failing"""
+    import openai
+
+    rate_limited = openai.RateLimitError(
+        "Rate limit reached",
+        response=httpx.Response(429, headers={"retry-after": "0"}, request=httpx.Request("POST", "https://api.test")),
+        body=None,
+    )
+    success = MagicMock(choices=[MagicMock(message=MagicMock(content="[]"))], usage=None)
+    with patch.object(flashcard_service.client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
+        mock_create.side_effect = [rate_limited, success]
+
+        result = await flashcard_service._complete_openai([{"role": "user", "content": "test"}], asyncio.Event())
+        assert result is success
+        assert mock_create.call_count == 2
+    assert flashcard_service.scheduler.budgets["openai"].paused_until > 0
+    assert flashcard_service.openai_breaker.state == CircuitBreaker.CLOSED
+
 @pytest.mark.asyncio
 async def test_timeout_handling(flashcard_service):
     """Test timeout handling"""
-    with patch('groq.Groq.chat.completions.create') as mock_create:
+    with patch.object(flashcard_service.groq_client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
         mock_create.side_effect = asyncio.TimeoutError("Request timed out")
-        
+
         with pytest.raises(asyncio.TimeoutError):
             await flashcard_service._make_groq_request("test prompt")
 
 @pytest.mark.asyncio
-async def test_network_error_handling(flashcard_service):
-    """Test network error handling"""
-    with patch('aiohttp.ClientSession.get') as mock_get:
-        mock_get.side_effect = aiohttp.ClientError("Network error")
-        
-        result = await flashcard_service._test_network_connectivity()
-        assert result is False 
\ No newline at end of file
+async def test_open_circuit_skips_upstream(flashcard_service):
+    """Test that an open circuit fails fast without calling Groq"""
+    with patch.object(flashcard_service.groq_client.chat.completions, "create", new_callable=AsyncMock) as mock_create:
+        mock_create.side_effect = httpx.ConnectError("Network error")
+        for _ in range(2):
+            with pytest.raises((httpx.ConnectError, UpstreamUnavailableError)):
+                await flashcard_service._make_groq_request("test prompt")
+        calls = mock_create.call_count
+
+        with pytest.raises(UpstreamUnavailableError):
+            await flashcard_service._make_groq_request("test prompt")
+        assert mock_create.call_count == calls
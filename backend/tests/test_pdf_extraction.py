@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from app.core.metrics import PAGES_WITHOUT_TEXT
+from app.services import pdf_extraction
+from app.services.extractors import ENGINES, get_engine
+from app.services.flashcard_service import FlashcardService
+from app.services.pdf_extraction import PageTimeoutError, _page_ranges, _page_timeout, extract_text, iter_pages
+from benchmarks.extraction import word_f1
+from benchmarks.synthetic_pdf import build_synthetic_document
+from tests.pdf_utils import build_pdf
+
+
+@pytest.fixture(autouse=True)
+def shutdown_pool():
+    yield
+    pdf_extraction.shutdown_extraction_executor()
+
+
+def test_page_ranges_cover_document():
+    """Test that page ranges cover every page exactly once, in order"""
+    assert _page_ranges(0, 10) == []
+    assert _page_ranges(7, 3) == [(0, 3), (3, 6), (6, 7)]
+
+
+@pytest.mark.asyncio
+async def test_extract_text_preserves_page_order(monkeypatch):
+    """Test that ranges extracted in parallel are reassembled in document order"""
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_PAGES_PER_TASK", 2)
+    pdf = build_pdf([f"Page number {i}" for i in range(7)])
+
+    text = await extract_text(pdf)
+
+    lines = [line for line in text.splitlines() if line]
+    assert lines == [f"Page number {i}" for i in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_extract_text_in_thread_fallback(monkeypatch):
+    """Test extraction without a process pool"""
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_EXTRACTION_WORKERS", 0)
+    text = await extract_text(build_pdf(["Only page"]))
+    assert text == "Only page"
+
+
+def test_page_timeout_interrupts_slow_page():
+    """Test that a page running past its budget is interrupted"""
+    started = time.monotonic()
+    with pytest.raises(PageTimeoutError):
+        with _page_timeout(0.05):
+            while True:
+                pass
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_yields_records_within_window(monkeypatch):
+    """Test that page records stream in order with a bounded extraction window"""
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_PAGES_PER_TASK", 1)
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_MAX_INFLIGHT_RANGES", 2)
+    pdf = build_pdf(["alpha", "", "gamma"])
+
+    records = [page async for page in iter_pages(pdf)]
+
+    assert [record.page_number for record in records] == [1, 2, 3]
+    assert records[0].text.strip() == "alpha"
+    assert records[0].char_count == len(records[0].text)
+
+
+@pytest.mark.parametrize("name", sorted(ENGINES))
+def test_engines_extract_text_and_probe_scanned_pages(name):
+    """Test every installed engine against a corpus with image-only pages"""
+    engine = ENGINES[name]
+    if not engine.available():
+        pytest.skip(f"{engine.requirement} is not installed")
+    corpus = build_synthetic_document(4, words_per_page=80, seed=3, scanned_every=2)
+    document = engine.open(corpus.pdf)
+
+    assert [engine.has_text_layer(document, i) for i in range(4)] == [True, False, True, False]
+    assert word_f1(corpus.page_texts[0], engine.extract_page(document, 0)) > 0.95
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_skips_pages_without_text_layer(monkeypatch):
+    """Test that probed scans are yielded as empty pages without being parsed"""
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_EXTRACTION_WORKERS", 0)
+    corpus = build_synthetic_document(3, words_per_page=40, seed=5, scanned_every=3)
+    extract_calls = []
+    engine = get_engine("pypdf2")
+    monkeypatch.setattr(engine, "extract_page", lambda document, index: extract_calls.append(index) or "text")
+    skipped = PAGES_WITHOUT_TEXT._value.get()
+
+    records = [page async for page in iter_pages(corpus.pdf, engine="pypdf2", probe=True)]
+
+    assert [record.text for record in records] == ["text", "text", ""]
+    assert extract_calls == [0, 1]
+    assert PAGES_WITHOUT_TEXT._value.get() == skipped + 1
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        get_engine("tesseract")
+
+
+def test_extraction_settings_change_the_document_cache_key(monkeypatch):
+    """Test that decks extracted by one engine are not served for another"""
+    service = FlashcardService()
+    base = service.cache_key_for_digest("digest")
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_EXTRACTION_ENGINE", "pdfminer")
+    engine_key = service.cache_key_for_digest("digest")
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_TEXT_LAYER_PROBE", False)
+    assert len({base, engine_key, service.cache_key_for_digest("digest")}) == 3
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.flashcard import Flashcard
+from app.models.review import ReviewState
+from app.services.review import MIN_EASE, initial_ease, schedule
+from app.services.store import CardNotFoundError, FlashcardStore
+
+NOW = datetime(2026, 3, 1, 9, 0)
+
+
+@pytest.fixture
+def store():
+    store = FlashcardStore(":memory:")
+    yield store
+    store.close()
+
+
+def save_cards(store, count, user_id="alice", digest="d1"):
+    cards = [Flashcard(question=f"Q{i}", answer=f"A{i}", difficulty=3) for i in range(count)]
+    return store.save_deck(user_id, cards, document_digest=digest)
+
+
+def test_sm2_intervals_grow_and_lapses_reset():
+    state = ReviewState(ease=initial_ease(3))
+    intervals = []
+    for _ in range(4):
+        state = schedule(state, 4, NOW)
+        intervals.append(state.interval_days)
+    assert intervals == [1, 6, 15, 38]
+    assert state.due_at == NOW + timedelta(days=38)
+
+    lapsed = schedule(state, 1, NOW)
+    assert (lapsed.repetitions, lapsed.lapses, lapsed.interval_days) == (0, 1, 1)
+    assert lapsed.ease < state.ease
+    for _ in range(10):
+        lapsed = schedule(lapsed, 0, NOW)
+    assert lapsed.ease == MIN_EASE
+
+
+def test_harder_cards_start_with_lower_ease():
+    assert initial_ease(5) < initial_ease(None) < initial_ease(1)
+
+
+def test_due_queue_serves_overdue_reviews_then_new_cards(store):
+    cards = save_cards(store, 6)
+    save_cards(store, 3, user_id="bob")
+    store.record_reviews("alice", [
+        (str(cards[0].id), 4, NOW - timedelta(days=3)),  # due two days ago
+        (str(cards[1].id), 4, NOW - timedelta(days=2)),  # due yesterday
+        (str(cards[2].id), 4, NOW),  # due tomorrow
+    ])
+
+    due = store.due_cards("alice", NOW, limit=4, new_limit=10)
+    assert [card.question for card, _ in due] == ["Q0", "Q1", "Q3", "Q4"]
+    assert due[0][1].repetitions == 1 and due[2][1].due_at is None
+
+    assert [card.question for card, _ in store.due_cards("alice", NOW, limit=10, new_limit=1)] == ["Q0", "Q1", "Q3"]
+    assert len(store.due_cards("bob", NOW, limit=10)) == 3
+
+
+def test_due_queries_read_the_index_in_order(store):
+    for query, params in (
+        ("SELECT seq FROM reviews WHERE user_id = ? AND due_at <= ? ORDER BY due_at, seq LIMIT 20", ("alice", NOW.isoformat())),
+        ("SELECT seq FROM reviews WHERE user_id = ? AND due_at IS NULL ORDER BY seq LIMIT 20", ("alice",)),
+    ):
+        plan = " ".join(store.explain(query, params))
+        assert "idx_reviews_due" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def test_session_is_applied_in_order_and_atomically(store):
+    cards = save_cards(store, 2)
+    card_id = str(cards[0].id)
+    results = store.record_reviews("alice", [(card_id, 5, NOW), (card_id, 5, NOW + timedelta(days=1))])
+    assert [state.repetitions for _, state in results] == [1, 2]
+    assert store.due_cards("alice", NOW + timedelta(days=6), limit=5, new_limit=0) == []
+
+    with pytest.raises(CardNotFoundError):
+        store.record_reviews("bob", [(str(cards[1].id), 5, NOW)])
+    with pytest.raises(CardNotFoundError):
+        store.record_reviews("alice", [(str(cards[1].id), 5, NOW), ("missing", 5, NOW)])
+    assert [card.question for card, _ in store.due_cards("alice", NOW, new_limit=5)] == ["Q1"]
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.services.scheduler import (
+    ProviderBudget,
+    SchedulerTimeoutError,
+    UpstreamScheduler,
+    current_user_id,
+)
+
+
+def make_scheduler(rpm=600, tpm=60000, max_wait=5.0):
+    return UpstreamScheduler({"openai": ProviderBudget("openai", rpm, tpm)}, max_wait=max_wait)
+
+
+@pytest.mark.asyncio
+async def test_users_are_admitted_round_robin():
+    """Test that a user with a large backlog cannot starve a user with one request"""
+    # One request per 0.1s keeps everything queued behind the first admission
+    scheduler = make_scheduler(rpm=600)
+    scheduler.budgets["openai"].requests.available = 1
+    order = []
+
+    async def request(user_id, n):
+        async with scheduler.admit("openai", 10, 10, user_id=user_id):
+            order.append(f"{user_id}{n}")
+
+    tasks = [asyncio.create_task(request("a", n)) for n in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request("b", 0)))
+    await asyncio.wait_for(asyncio.gather(*tasks), 2)
+
+    assert order.index("b0") < order.index("a2")
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_admission():
+    """Test that a request waits until enough tokens have refilled"""
+    scheduler = make_scheduler(tpm=6000)  # 100 tokens per second
+    scheduler.budgets["openai"].tokens.available = 0
+
+    async with scheduler.admit("openai", 10, 10) as admission:
+        pass
+
+    assert admission.reserved == 20
+    assert admission.waited >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_settle_refunds_unused_tokens():
+    """Test that actual usage replaces the reservation"""
+    scheduler = make_scheduler(tpm=60000)
+    budget = scheduler.budgets["openai"]
+
+    async with scheduler.admit("openai", 1000, 1000) as admission:
+        before = budget.tokens.available
+        admission.settle(500)
+
+    assert budget.tokens.available == pytest.approx(before + 1500, abs=5)
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_limit_and_throttle():
+    """Test that a paused provider times out waiting requests and clears its queue"""
+    scheduler = make_scheduler(max_wait=0.05)
+    scheduler.throttle("openai", 10)
+
+    token = current_user_id.set("alice")
+    try:
+        with pytest.raises(SchedulerTimeoutError):
+            async with scheduler.admit("openai", 10, 10):
+                pass
+    finally:
+        current_user_id.reset(token)
+
+    assert scheduler.stats()["openai"]["queue_depth"] == 0
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.startup import DEFERRED_MODULES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", ["app.main", "main"])
+def test_heavy_modules_load_on_first_use(module):
+    """Test that importing a backend does not load the LLM SDKs, httpx, PyPDF2 or numpy"""
+    env = {key: value for key, value in os.environ.items() if key != "GROQ_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(' '.join(sorted(sys.modules)))"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    loaded = set(result.stdout.split())
+    assert [name for name in DEFERRED_MODULES if name in loaded] == []
@@ -0,0 +1,113 @@
+import pytest
+
+from app.models.flashcard import Flashcard
+from app.services.store import FlashcardStore, InvalidCursorError
+
+
+@pytest.fixture
+def store():
+    store = FlashcardStore(":memory:")
+    yield store
+    store.close()
+
+
+def make_cards(count, **fields):
+    return [Flashcard(question=f"Q{i}", answer=f"A{i}", **fields) for i in range(count)]
+
+
+def test_keyset_pagination_walks_every_card_once(store):
+    """Test that following next_cursor returns each card exactly once, newest first"""
+    store.save_deck("alice", make_cards(25), document_digest="d1", source_document="bio.pdf")
+    store.save_deck("bob", make_cards(5), document_digest="d1", source_document="bio.pdf")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.list_cards("alice", limit=10, cursor=cursor)
+        seen.extend(card.question for card in page)
+        if cursor is None:
+            break
+    assert seen == [f"Q{i}" for i in reversed(range(25))]
+
+
+def test_filters_by_document_topic_and_tag(store):
+    """Test indexed filters, alone and combined"""
+    store.save_deck("alice", make_cards(3, topic="cells", tags=["exam"]), document_digest="d1", source_document="bio.pdf")
+    store.save_deck("alice", make_cards(2, topic="atoms"), document_digest="d2", source_document="chem.pdf")
+
+    assert len(store.list_cards("alice", source_document="chem.pdf")[0]) == 2
+    assert len(store.list_cards("alice", topic="cells")[0]) == 3
+    assert len(store.list_cards("alice", tag="exam", source_document="bio.pdf")[0]) == 3
+    assert store.list_cards("alice", tag="exam", topic="atoms")[0] == []
+    assert store.list_cards("bob", tag="exam")[0] == []
+
+
+def test_saving_same_document_twice_returns_stored_deck(store):
+    """Test that regenerating a document does not duplicate the library"""
+    first = store.save_deck("alice", make_cards(3), document_digest="d1")
+    second = store.save_deck("alice", make_cards(3), document_digest="d1")
+    assert [card.id for card in second] == [card.id for card in first]
+    assert store.count("alice") == 3
+    assert store.get_card("alice", str(first[0].id)).question == "Q0"
+    assert store.get_card("bob", str(first[0].id)) is None
+
+
+def test_list_queries_use_indexes(store):
+    """Test that list queries are index lookups rather than table scans"""
+    plan = store.explain(
+        "SELECT seq FROM flashcards WHERE user_id = ? AND topic = ? AND seq < ? ORDER BY seq DESC LIMIT 10",
+        ("alice", "cells", 100),
+    )
+    assert any("idx_flashcards_topic" in detail for detail in plan)
+    assert not any("TEMP B-TREE" in detail for detail in plan)
+
+
+def test_invalid_cursor(store):
+    with pytest.raises(InvalidCursorError):
+        store.list_cards("alice", cursor="not-a-cursor!")
+
+
+def test_search_ranks_cards_with_stemming_and_filters(store):
+    """Test BM25 card search with porter stemming, filters and per-user isolation"""
+    store.save_deck(
+        "alice",
+        [
+            Flashcard(question="What are eigenvalues?", answer="Scalars λ with Av = λv", topic="algebra", tags=["exam"]),
+            Flashcard(question="Define a matrix", answer="A grid of numbers; see eigenvalue problems", topic="algebra"),
+            Flashcard(question="What is a cell?", answer="The unit of life", topic="biology"),
+        ],
+        document_digest="d1",
+    )
+    store.save_deck("bob", [Flashcard(question="Eigenvalue of identity?", answer="1")], document_digest="d1")
+
+    hits = store.search_cards("alice", "eigenvalue")
+    assert [card.question for card, _ in hits] == ["What are eigenvalues?", "Define a matrix"]
+    assert hits[0][1] > hits[1][1]
+    assert [card.question for card, _ in store.search_cards("alice", "eigen*", tag="exam")] == ["What are eigenvalues?"]
+    assert store.search_cards("alice", "eigenvalue", topic="biology") == []
+    assert store.search_cards("alice", 'unit -of: "life') != []
+
+
+def test_staged_pages_are_indexed_when_the_deck_is_saved(store):
+    """Test that pages written one at a time during extraction become one searchable document"""
+    store.add_document_page("d1", 2, "symmetric matrices have real eigenvalues.")
+    store.add_document_page("d1", 1, "Chapter 4. The spectral theorem says")
+    assert store.search_documents("alice", "spectral") == []
+    store.save_deck("alice", make_cards(1), document_digest="d1", source_document="linear.pdf")
+
+    [(digest, _, snippet, _)] = store.search_documents("alice", "spectral eigenvalues")
+    assert digest == "d1" and snippet.index("[spectral]") < snippet.index("[eigenvalues]")
+    # Pages of an already indexed document are not staged again
+    store.add_document_page("d1", 1, "Chapter 4 again")
+    assert store._conn.execute("SELECT count(*) FROM document_pages").fetchone() == (0,)
+
+
+def test_search_documents_owned_by_user(store):
+    """Test that document text is searchable by users with a deck from that document"""
+    text = "Chapter 4. The spectral theorem says symmetric matrices have real eigenvalues."
+    store.save_deck("alice", make_cards(1), document_digest="d1", source_document="linear.pdf", document_text=text)
+    store.save_deck("bob", make_cards(1), document_digest="d2", source_document="other.pdf")
+
+    [(digest, name, snippet, score)] = store.search_documents("alice", "spectral theorem")
+    assert (digest, name) == ("d1", "linear.pdf")
+    assert "[spectral]" in snippet and score > 0
+    assert store.search_documents("bob", "spectral") == []
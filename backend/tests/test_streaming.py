@@ -0,0 +1,90 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.cache import FlashcardCache
+from app.services.chunking import chunk_pages
+from app.services.flashcard_service import FlashcardService
+from app.services.json_stream import JSONArrayStreamParser
+from app.services.pdf_extraction import PageRecord
+
+
+def test_parser_emits_objects_as_they_complete():
+    """Test that objects are emitted as soon as their closing brace arrives"""
+    parser = JSONArrayStreamParser()
+    assert parser.feed('```json\n[{"question": "What is {x}?", ') == []
+    assert parser.feed('"answer": "A \\"quoted\\" brace }"}, {"quest') == [
+        {"question": "What is {x}?", "answer": 'A "quoted" brace }'}
+    ]
+    assert parser.feed('ion": "Q2", "answer": "A2"}]\n```') == [{"question": "Q2", "answer": "A2"}]
+
+
+def test_parser_unwraps_flashcards_object():
+    """Test that cards inside a {"flashcards": [...]} wrapper are emitted one by one"""
+    parser = JSONArrayStreamParser()
+    assert parser.feed('{"flashcards": [{"question": "Q1", "answer": "A1", "tags": ["x"]}, ') == [
+        {"question": "Q1", "answer": "A1", "tags": ["x"]}
+    ]
+    assert parser.feed('{"question": "Q2", "answer": "A2"}]}') == [{"question": "Q2", "answer": "A2"}]
+
+
+def test_parser_skips_malformed_objects():
+    """Test that a malformed object does not stop later objects"""
+    parser = JSONArrayStreamParser()
+    cards = parser.feed('[{"question": "Q1" "answer": "A1"}, {"question": "Q2", "answer": "A2"}]')
+    assert cards == [{"question": "Q2", "answer": "A2"}]
+
+
+class FakeStream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+@pytest.mark.asyncio
+async def test_stream_flashcards_in_document_order(monkeypatch):
+    """Test that streamed cards from concurrent chunks arrive in document order"""
+    service = FlashcardService()
+    service.chunk_token_budget = 30
+
+    async def create(**kwargs):
+        text = kwargs["messages"][1]["content"]
+        label = "first" if "Alpha" in text else "second"
+        card = json.dumps({"question": label, "answer": "A"})
+        return FakeStream(["[", card[:10], card[10:], "]"])
+
+    monkeypatch.setattr(service.client.chat.completions, "create", create)
+
+    async def pages():
+        yield PageRecord(page_number=1, text="Alpha " * 15, char_count=90)
+        yield PageRecord(page_number=2, text="Beta " * 15, char_count=75)
+
+    cards = [card async for card in service.stream_flashcards_from_pages(pages())]
+    assert [card["question"] for card in cards] == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_only_valid_streamed_cards_are_cached_per_chunk(monkeypatch):
+    """Test that invalid cards are streamed out but never cached for /generate to replay"""
+    service = FlashcardService()
+    service.chunk_cache = FlashcardCache(db_path=None)
+
+    async def create(**kwargs):
+        return FakeStream(['{"flashcards": [{"question": "Q", "answer": "A"}, {"question": "no answer"}]}'])
+
+    monkeypatch.setattr(service.client.chat.completions, "create", create)
+
+    async def pages():
+        yield PageRecord(page_number=1, text="Alpha " * 15, char_count=90)
+
+    cards = [card async for card in service.stream_flashcards_from_pages(pages())]
+    assert len(cards) == 2
+    [chunk] = [chunk async for chunk in chunk_pages(pages(), service.chunk_token_budget)]
+    assert await service.chunk_cache.get(service.chunk_cache_key(chunk)) == [{"question": "Q", "answer": "A"}]
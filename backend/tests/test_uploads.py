@@ -0,0 +1,99 @@
+import hashlib
+import io
+import os
+import tempfile
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers, UploadFile
+
+from app.core.middleware import MaxBodySizeMiddleware
+from app.services import pdf_extraction
+from app.services.pdf_extraction import extract_text
+from app.services.uploads import spool_upload
+from tests.pdf_utils import build_pdf
+
+
+def make_upload(data: bytes, content_type: str = "application/pdf") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="doc.pdf", headers=Headers({"content-type": content_type}))
+
+
+@pytest.mark.asyncio
+async def test_large_upload_is_spooled_to_disk_and_extractable():
+    """Test that big uploads go to a temp file that extraction reads via mmap"""
+    pdf = build_pdf([f"Spooled page {i}" for i in range(3)])
+
+    upload = await spool_upload(make_upload(pdf), max_memory=64, chunk_size=100)
+    try:
+        assert upload.content is None and os.path.exists(upload.path)
+        assert upload.digest == hashlib.sha256(pdf).hexdigest()
+        assert upload.size == len(pdf)
+        assert "Spooled page 2" in await extract_text(upload.source)
+    finally:
+        pdf_extraction.shutdown_extraction_executor()
+        path = upload.path
+        upload.close()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_large_upload_is_extracted_from_starlettes_spool_file():
+    """Test that a rolled-over upload is shared with the extraction workers, not copied again"""
+    pdf = build_pdf([f"Shared page {i}" for i in range(3)])
+    spooled = tempfile.SpooledTemporaryFile(max_size=64)
+    spooled.write(pdf)
+    spooled.seek(0)
+    file = UploadFile(file=spooled, filename="doc.pdf", headers=Headers({"content-type": "application/pdf"}))
+
+    upload = await spool_upload(file, max_memory=64, chunk_size=100)
+    try:
+        assert upload.content is None and upload.fd is not None
+        assert os.fstat(upload.fd).st_ino == os.fstat(spooled.fileno()).st_ino
+        assert upload.digest == hashlib.sha256(pdf).hexdigest()
+        # Still readable once Starlette closes its file, as happens before a stream finishes
+        await file.close()
+        assert "Shared page 2" in await extract_text(upload.source)
+        assert upload.read_bytes() == pdf
+    finally:
+        pdf_extraction.shutdown_extraction_executor()
+        upload.close()
+    assert upload.fd is None
+
+
+@pytest.mark.asyncio
+async def test_small_upload_stays_in_memory():
+    """Test that uploads under the spool threshold are kept as bytes"""
+    pdf = build_pdf(["Tiny"])
+    with await spool_upload(make_upload(pdf)) as upload:
+        assert upload.path is None
+        assert upload.source == pdf
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("data,content_type,status", [
+    (b"%PDF-1.4" + b"x" * 100, "text/plain", 400),
+    (b"PK\x03\x04" + b"x" * 2000, "application/pdf", 400),
+    (b"%PDF-1.4" + b"x" * 2000, "application/pdf", 413),
+])
+async def test_bad_uploads_rejected(data, content_type, status):
+    """Test type, magic byte and size checks"""
+    with pytest.raises(HTTPException) as exc_info:
+        await spool_upload(make_upload(data, content_type), max_size=1024, chunk_size=256)
+    assert exc_info.value.status_code == status
+
+
+def test_max_body_size_middleware():
+    """Test that oversized bodies get a 413 whether or not Content-Length is declared"""
+    app = FastAPI()
+    app.add_middleware(MaxBodySizeMiddleware, max_body_size=100)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    client = TestClient(app)
+    assert client.post("/echo", content=b"x" * 50).json() == {"size": 50}
+    assert client.post("/echo", content=b"x" * 500).status_code == 413
+    chunked = client.post("/echo", content=iter([b"x" * 60, b"x" * 60]))
+    assert chunked.status_code == 413